@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import replicas, throttling
+
+        replicas.check_configuration()
+        throttling.check_configuration()
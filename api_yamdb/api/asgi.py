@@ -0,0 +1,181 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import Resolver404, resolve
+
+# Горячие маршруты чтения: обрабатываются в отдельном пуле потоков.
+READ_ROUTES = {"titles-list", "titles-detail", "reviews-list", "comments-list"}
+READ_METHODS = {"GET", "HEAD"}
+
+
+def build_environ(scope, body):
+    """WSGI environ запроса из ASGI scope и прочитанного тела."""
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin1"),
+        "PATH_INFO": scope["path"].encode().decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("ascii"),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    server = scope.get("server") or ("localhost", 80)
+    environ["SERVER_NAME"], environ["SERVER_PORT"] = server[0], str(server[1])
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_LENGTH", "CONTENT_TYPE"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    return environ
+
+
+class ASGIHandler:
+    """
+    ASGI-приложение поверх WSGI-обработчика Django 2.2, в котором
+    нет асинхронных view и асинхронного ORM.
+
+    Обмен с клиентом идёт в цикле событий: тело запроса читается,
+    а ответ отправляется асинхронно, поэтому медленный клиент не занимает
+    поток. Сам запрос (view и ORM) выполняется в пуле потоков; горячие
+    маршруты чтения (READ_ROUTES) - в своём пуле, чтобы медленные записи
+    и отправка почты не задерживали чтение. У каждого потока своё
+    соединение с БД: соединений на процесс не больше суммы размеров пулов.
+    """
+
+    def __init__(self, wsgi_handler, read_threads, threads):
+        self.wsgi_handler = wsgi_handler
+        self.read_executor = ThreadPoolExecutor(
+            read_threads, thread_name_prefix="asgi-read"
+        )
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix="asgi"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(
+                f"Тип соединения {scope['type']} не поддерживается"
+            )
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            self.get_executor(scope), self.handle, scope, body, send, loop
+        )
+        if result is not None:
+            status, headers, content = result
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": headers,
+            })
+            await send({"type": "http.response.body", "body": content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.read_executor.shutdown(wait=False)
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        """Тело запроса или None, если клиент отключился."""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                return bytes(body)
+
+    def get_executor(self, scope):
+        if scope["method"] in READ_METHODS:
+            try:
+                match = resolve(scope["path"])
+            except Resolver404:
+                return self.executor
+            if match.view_name in READ_ROUTES:
+                return self.read_executor
+        return self.executor
+
+    def handle(self, scope, body, send, loop):
+        """
+        Обрабатывает запрос в потоке пула.
+
+        Обычный ответ возвращается целиком и отправляется из цикла событий.
+        Потоковый ответ читает БД по мере отправки, поэтому отправляется
+        из этого же потока с учётом скорости клиента; тогда возвращается
+        None.
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in headers
+            ]
+
+        response = self.wsgi_handler(
+            build_environ(scope, body), start_response
+        )
+        head = scope["method"] == "HEAD"
+        try:
+            if not response.streaming:
+                content = b"" if head else response.content
+                return started["status"], started["headers"], content
+
+            def send_threadsafe(message):
+                asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+            send_threadsafe({
+                "type": "http.response.start",
+                "status": started["status"],
+                "headers": started["headers"],
+            })
+            if not head:
+                for chunk in response:
+                    send_threadsafe({
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": True,
+                    })
+            send_threadsafe({"type": "http.response.body", "body": b""})
+        finally:
+            # Сигнал request_finished закрывает соединения с БД потока.
+            response.close()
+
+
+def get_asgi_application():
+    """ASGI-приложение проекта, аналог get_wsgi_application()."""
+    django.setup(set_prefix=False)
+    return ASGIHandler(
+        WSGIHandler(),
+        read_threads=settings.ASGI["READ_THREADS"],
+        threads=settings.ASGI["THREADS"],
+    )
@@ -0,0 +1,131 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+VERSION_KEY = "catalog:version:{}"
+MODIFIED_KEY = "catalog:modified:{}"
+STATS_KEY = "catalog:stats:{}"
+RESPONSE_KEY = "catalog:response:{}:{}:{}"
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def is_shared(cache):
+    """Видят ли записи кэша другие процессы: у locmem и dummy - нет."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def _incr(key, initial):
+    """Атомарно увеличивает счётчик, создавая его при отсутствии."""
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, initial, timeout=None):
+            return initial
+        return cache.incr(key)
+
+
+def _now():
+    return int(time.time() * 1_000_000)
+
+
+def get_versions(resources):
+    """
+    Версии ресурсов в порядке resources и время последнего изменения
+    любого из них в микросекундах (0 для пустого resources).
+
+    Версия - счётчик изменений ресурса. Счётчик, созданный заново после
+    вытеснения из кэша, начинается с текущего времени в микросекундах
+    и не совпадёт ни с одной из прежних версий.
+    """
+    cache = get_cache()
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    modified_keys = [MODIFIED_KEY.format(resource) for resource in resources]
+    values = cache.get_many(keys + modified_keys)
+    for key in keys + modified_keys:
+        if key not in values:
+            cache.add(key, _now(), timeout=None)
+            values[key] = cache.get(key)
+    return (
+        [values[key] for key in keys],
+        max((values[key] for key in modified_keys), default=0),
+    )
+
+
+def changed_within(modified, seconds):
+    """Было ли последнее изменение (get_versions) за seconds секунд."""
+    return _now() - modified < seconds * 1_000_000
+
+
+def bump_versions(*resources):
+    """
+    Отмечает изменение ресурсов, инвалидируя их закэшированные ответы.
+
+    Счётчик повышается атомарным incr: одновременные изменения не
+    теряются. Время изменения пишется последним из них.
+    """
+    for resource in resources:
+        _incr(VERSION_KEY.format(resource), _now())
+    now = _now()
+    get_cache().set_many(
+        {MODIFIED_KEY.format(resource): now for resource in resources},
+        timeout=None,
+    )
+
+
+def invalidate_on_commit(*resources):
+    """Повышает версии ресурсов после фиксации текущей транзакции."""
+    transaction.on_commit(lambda: bump_versions(*resources))
+
+
+def request_digest(request):
+    """
+    Отпечаток запроса: схема и хост (ответы содержат абсолютные ссылки
+    next/previous), путь, отсортированные параметры (фильтры и страница)
+    и формат ответа.
+    """
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return hashlib.md5("|".join((
+        request.scheme, request.get_host(), request.path, query,
+        request.accepted_media_type,
+    )).encode()).hexdigest()
+
+
+def response_key(basename, versions, request):
+    """Ключ ответа: ресурс, версии зависимостей и отпечаток запроса."""
+    return RESPONSE_KEY.format(
+        basename,
+        ".".join(str(version) for version in versions),
+        request_digest(request),
+    )
+
+
+def record(hit):
+    """Учитывает попадание или промах кэша."""
+    _incr(STATS_KEY.format("hits" if hit else "misses"), 1)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кэша каталога."""
+    stats = get_cache().get_many(
+        [STATS_KEY.format("hits"), STATS_KEY.format("misses")]
+    )
+    return {
+        "hits": stats.get(STATS_KEY.format("hits"), 0),
+        "misses": stats.get(STATS_KEY.format("misses"), 0),
+    }
+
+
+def reset_stats():
+    get_cache().delete_many(
+        [STATS_KEY.format("hits"), STATS_KEY.format("misses")]
+    )
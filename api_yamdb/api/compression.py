@@ -0,0 +1,81 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def available():
+    """Поддерживаемые кодирования в порядке предпочтения."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding):
+    """
+    Кодирование ответа по заголовку Accept-Encoding или None.
+    При равном q выбирается brotli: он сжимает JSON плотнее gzip.
+    """
+    offered = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for coding in available():
+        quality = offered.get(coding, offered.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compressible(response):
+    """Можно ли сжать ответ: не потоковый, не сжат и не меньше MIN_SIZE."""
+    return (
+        not response.streaming
+        and not response.has_header("Content-Encoding")
+        and "no-transform" not in response.get("Cache-Control", "")
+        and len(response.content) >= settings.COMPRESSION["MIN_SIZE"]
+    )
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(
+            content, quality=settings.COMPRESSION["BROTLI_QUALITY"]
+        )
+    # gzip без времени в заголовке: одинаковые ответы - одинаковые байты.
+    compressor = zlib.compressobj(
+        settings.COMPRESSION["GZIP_LEVEL"], zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    return compressor.compress(content) + compressor.flush()
+
+
+def apply(response, content, encoding):
+    """Подставляет в ответ сжатое тело content."""
+    response.content = content
+    response["Content-Encoding"] = encoding
+    response["Content-Length"] = str(len(content))
+    patch_vary_headers(response, ("Accept-Encoding",))
+    response.negotiated_encoding = encoding
+
+
+def weaken_etag(response):
+    """Сжатое тело не совпадает побайтно с исходным: ETag становится слабым."""
+    if response.has_header("ETag"):
+        response["ETag"] = re.sub(r'^"', 'W/"', response["ETag"])
+
+
+def cache_key(key, encoding):
+    """Ключ сжатого варианта закэшированного ответа."""
+    return f"{key}:{encoding}"
@@ -0,0 +1,112 @@
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from rest_framework.utils.encoders import JSONEncoder
+from reviews.models import Comment, Review, Title, TitleGenre
+
+# Что можно добавить к произведениям параметром ?include=.
+EXPORT_INCLUDES = ("reviews", "comments")
+
+
+def _chunks(iterator, size):
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _titles(since, chunk_size):
+    titles = Title.objects.select_related("category").order_by("pk")
+    if since is not None:
+        titles = titles.filter(updated_at__gte=since)
+    for chunk in _chunks(titles.iterator(chunk_size=chunk_size), chunk_size):
+        # iterator() не поддерживает prefetch_related: жанры пачки
+        # читаются одним запросом.
+        genres = defaultdict(list)
+        links = TitleGenre.objects.filter(
+            title__in=[title.pk for title in chunk]
+        ).select_related("genre").order_by("genre__name")
+        for link in links:
+            genres[link.title_id].append(
+                {"name": link.genre.name, "slug": link.genre.slug}
+            )
+        for title in chunk:
+            yield {
+                "type": "title",
+                "id": title.pk,
+                "name": title.name,
+                "year": title.year,
+                "description": title.description,
+                "rating": title.rating,
+                "review_count": title.review_count,
+                "category": title.category and {
+                    "name": title.category.name,
+                    "slug": title.category.slug,
+                },
+                "genre": genres[title.pk],
+                "updated_at": title.updated_at,
+            }
+
+
+def _rows(queryset, row_type, fields, since, chunk_size):
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    rows = queryset.order_by("pk").values(*fields.values())
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "type": row_type,
+            **{name: row[field] for name, field in fields.items()},
+        }
+
+
+def export_rows(includes=(), since=None, chunk_size=2000):
+    """
+    Записи выгрузки каталога: произведения, затем рецензии
+    и комментарии, если они указаны в includes.
+
+    Таблицы читаются курсором пачками по chunk_size строк, поэтому
+    память не зависит от размера каталога. С since выгружаются только
+    записи, изменённые начиная с этого момента; удаления в инкрементальную
+    выгрузку не попадают.
+    """
+    yield from _titles(since, chunk_size)
+    if "reviews" in includes:
+        yield from _rows(Review.objects, "review", {
+            "id": "id",
+            "title_id": "title_id",
+            "author": "author__username",
+            "text": "text",
+            "score": "score",
+            "pub_date": "pub_date",
+            "updated_at": "updated_at",
+        }, since, chunk_size)
+    if "comments" in includes:
+        yield from _rows(Comment.objects, "comment", {
+            "id": "id",
+            "review_id": "review_id",
+            "author": "author__username",
+            "text": "text",
+            "pub_date": "pub_date",
+            "updated_at": "updated_at",
+        }, since, chunk_size)
+
+
+def ndjson(rows, chunk_size):
+    """Строки NDJSON, собранные в блоки по chunk_size записей."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    for chunk in _chunks(iter(rows), chunk_size):
+        yield "".join(
+            encoder.encode(row) + "\n" for row in chunk
+        ).encode()
+
+
+def gzipped(blocks):
+    """Сжимает поток блоков в один gzip-поток."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
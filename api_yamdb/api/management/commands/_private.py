@@ -0,0 +1,104 @@
+from csv import DictReader
+from io import StringIO
+from itertools import islice
+
+from django.apps import apps
+
+from ...cache import get_cache, is_shared
+
+
+def warn_if_cache_is_local(command):
+    """
+    Предупреждает, что повышение версий из команды не увидят
+    веб-процессы: у каждого процесса свой кэш каталога.
+    """
+    if not is_shared(get_cache()):
+        command.stderr.write(command.style.WARNING(
+            "Кэш каталога локален для процесса (CACHE_BACKEND): веб-процессы "
+            "будут отдавать прежние ответы до CATALOG_CACHE_TIMEOUT секунд. "
+            "Настройте общий бэкенд кэша или перезапустите веб-процессы."
+        ))
+
+
+def read_batches(filename, fields, batch_size):
+    """
+    Построчно читает CSV-файл и отдаёт пачки словарей
+    {поле модели: значение} размером не больше batch_size.
+    """
+    with open(filename, encoding="UTF-8", newline="") as csv_file:
+        rows = (
+            {key: row[column] for key, column in fields.items()}
+            for row in DictReader(csv_file)
+        )
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def model_dependencies(model):
+    """Модели, на которые ссылаются внешние ключи модели."""
+    return {
+        field.related_model
+        for field in model._meta.concrete_fields
+        if field.is_relation and field.related_model is not model
+    }
+
+
+def table_dependents(models):
+    """
+    Модели (вместе с промежуточными таблицами many-to-many), которые
+    прямо или через другие ссылаются на models.
+    """
+    found = set()
+    targets = set(models)
+    while targets:
+        targets = {
+            model for model in apps.get_models(include_auto_created=True)
+            if model not in found
+            and model_dependencies(model) & (targets | found | set(models))
+        } - set(models)
+        found |= targets
+    return found
+
+
+def _copy_value(value):
+    """Значение поля в текстовом формате COPY."""
+    if value is None:
+        return r"\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_objects(connection, model, objs):
+    """
+    Загружает экземпляры модели через COPY FROM STDIN (PostgreSQL).
+
+    Значения готовятся так же, как при bulk_create: с учётом
+    pre_save полей и преобразования в формат БД.
+    """
+    fields = model._meta.concrete_fields
+    buffer = StringIO()
+    for obj in objs:
+        buffer.write("\t".join(
+            _copy_value(field.get_db_prep_save(
+                field.pre_save(obj, add=True), connection=connection
+            ))
+            for field in fields
+        ))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN",
+            buffer,
+        )
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from ...cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Выводит счётчики попаданий и промахов кэша каталога"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Обнулить счётчики"
+        )
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(
+            f"hits: {stats['hits']}\n"
+            f"misses: {stats['misses']}\n"
+            f"hit ratio: {ratio:.2%}"
+        )
+        if options["reset"]:
+            reset_stats()
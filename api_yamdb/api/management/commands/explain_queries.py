@@ -0,0 +1,52 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from ...query_plans import capture, explain, hot_requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет чтения api через EXPLAIN и отмечает чтение таблиц "
+        "целиком и сортировки без индекса"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="EXPLAIN ANALYZE с фактическим временем (PostgreSQL)",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Завершиться с ошибкой, если есть замечания",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"EXPLAIN для {vendor} не поддерживается")
+        if options["analyze"] and vendor == "sqlite":
+            self.stderr.write("SQLite не поддерживает EXPLAIN ANALYZE")
+        total = flagged = 0
+        for name, path in hot_requests():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: {path}"))
+            for sql in capture(path):
+                lines, problems = explain(sql, analyze=options["analyze"])
+                total += 1
+                flagged += bool(problems)
+                if not problems and options["verbosity"] < 2:
+                    continue
+                self.stdout.write(f"  {sql}")
+                if options["verbosity"] >= 2:
+                    for line in lines:
+                        self.stdout.write(f"    {line}")
+                for problem in problems:
+                    self.stdout.write(self.style.WARNING(f"    ! {problem}"))
+        summary = f"Запросов: {total}, с замечаниями: {flagged}"
+        if flagged and options["fail"]:
+            raise CommandError(summary)
+        self.stdout.write(
+            self.style.WARNING(summary) if flagged
+            else self.style.SUCCESS(summary)
+        )
@@ -1,101 +1,228 @@
-from csv import DictReader
+import os
+from time import monotonic
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, TitleScoreStats)
+from users.models import User
 
-from api_yamdb.reviews.models import (Category, Comment, Genre, Review, Title,
-                                      TitleGenre)
-from api_yamdb.users.models import User
+from ...cache import bump_versions
+from ._private import (copy_objects, model_dependencies, read_batches,
+                       table_dependents, warn_if_cache_is_local)
+
+# Порядок загрузки: каждая таблица идёт после тех, на которые ссылается.
+TABLES = {
+    User: {
+        "filename": "users.csv",
+        "fields": {
+            "id": "id",
+            "username": "username",
+            "email": "email",
+            "role": "role",
+            "bio": "bio",
+            "first_name": "first_name",
+            "last_name": "last_name",
+        },
+    },
+    Category: {
+        "filename": "category.csv",
+        "fields": {
+            "id": "id",
+            "name": "name",
+            "slug": "slug",
+        },
+    },
+    Genre: {
+        "filename": "genre.csv",
+        "fields": {
+            "id": "id",
+            "name": "name",
+            "slug": "slug",
+        },
+    },
+    Title: {
+        "filename": "titles.csv",
+        "fields": {
+            "id": "id",
+            "name": "name",
+            "year": "year",
+            "category_id": "category",
+        },
+    },
+    TitleGenre: {
+        "filename": "genre_title.csv",
+        "fields": {
+            "id": "id",
+            "title_id": "title_id",
+            "genre_id": "genre_id",
+        },
+    },
+    Review: {
+        "filename": "review.csv",
+        "fields": {
+            "id": "id",
+            "title_id": "title_id",
+            "text": "text",
+            "author_id": "author",
+            "score": "score",
+            "pub_date": "pub_date",
+        },
+    },
+    Comment: {
+        "filename": "comments.csv",
+        "fields": {
+            "id": "id",
+            "review_id": "review_id",
+            "text": "text",
+            "author_id": "author",
+            "pub_date": "pub_date",
+        },
+    },
+}
+
+
+# Таблицы, которые команда пересчитывает после загрузки: их можно
+# очищать вместе с таблицами, на которые они ссылаются.
+DERIVED = (TitleScoreStats,)
 
 
 class Command(BaseCommand):
     help = "Загружает данные из папки static/data в базу данных"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=os.path.join("static", "data"),
+            help="Папка с CSV-файлами",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Количество строк в одной пачке INSERT/COPY",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=[model.__name__.lower() for model in TABLES],
+            help="Загрузить только указанную таблицу (можно повторять)",
+        )
+        parser.add_argument(
+            "--truncate",
+            action="store_true",
+            help="Очистить загружаемые таблицы перед загрузкой",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Не использовать COPY даже на PostgreSQL",
+        )
+
     def handle(self, *args, **options):
-        databases = {
-            User: {
-                "filename": "static/data/users.csv",
-                "fields": {
-                    "id": "id",
-                    "username": "username",
-                    "email": "email",
-                    "role": "role",
-                    "bio": "bio",
-                    "first_name": "first_name",
-                    "last_name": "last_name",
-                },
-            },
-            Category: {
-                "filename": "static/data/category.csv",
-                "fields": {
-                    "id": "id",
-                    "name": "name",
-                    "slug": "slug",
-                },
-            },
-            Genre: {
-                "filename": "static/data/genre.csv",
-                "fields": {
-                    "id": "id",
-                    "name": "name",
-                    "slug": "slug",
-                },
-            },
-            Title: {
-                "filename": "static/data/titles.csv",
-                "fields": {
-                    "id": "id",
-                    "name": "name",
-                    "year": "year",
-                    "category_id": "category",
-                },
-            },
-            TitleGenre: {
-                "filename": "static/data/genre_title.csv",
-                "fields": {
-                    "id": "id",
-                    "title_id": "title_id",
-                    "genre_id": "genre_id",
-                },
-            },
-            Review: {
-                "filename": "static/data/review.csv",
-                "fields": {
-                    "id": "id",
-                    "title_id": "title_id",
-                    "text": "text",
-                    "author_id": "author",
-                    "score": "score",
-                    "pub_date": "pub_date",
-                },
-            },
-            Comment: {
-                "filename": "static/data/comments.csv",
-                "fields": {
-                    "id": "id",
-                    "review_id": "review_id",
-                    "text": "text",
-                    "author_id": "author",
-                    "pub_date": "pub_date",
-                },
-            },
-        }
-        for obj in databases:
-            if obj.objects.exists():
-                print(
-                    f"В таблице {obj.__name__} уже имеются данные.\n"
-                    f"Для загрузки необходимо очистить таблицу"
-                )
-                continue
-            print(f"Загружаю данные в {obj.__name__}")
+        models = [
+            model for model in TABLES
+            if not options["only"]
+            or model.__name__.lower() in options["only"]
+        ]
+        self.check_order(models)
+        use_copy = (
+            connection.vendor == "postgresql" and not options["no_copy"]
+        )
+
+        if options["truncate"]:
+            self.truncate(models)
+        not_empty = [m.__name__ for m in models if m.objects.exists()]
+        if not_empty:
+            raise CommandError(
+                f"В таблицах {', '.join(not_empty)} уже имеются данные. "
+                f"Для загрузки используйте --truncate"
+            )
+
+        for model in models:
+            self.load(
+                model,
+                os.path.join(options["path"], TABLES[model]["filename"]),
+                options["batch_size"],
+                use_copy,
+            )
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        if Title in models or Review in models:
+            Title.objects.rebuild_rating()
+            Title.objects.rebuild_stats()
+        bump_versions("categories", "genres", "titles")
+        warn_if_cache_is_local(self)
+        self.stdout.write(self.style.SUCCESS("Данные успешно загружены"))
+
+    def check_order(self, models):
+        """
+        Проверяет, что таблицы, на которые ссылаются загружаемые,
+        загружаются раньше или уже заполнены.
+        """
+        order = list(TABLES)
+        for model in models:
+            for parent in model_dependencies(model):
+                if order.index(parent) > order.index(model):
+                    raise CommandError(
+                        f"{parent.__name__} должна загружаться "
+                        f"раньше {model.__name__}"
+                    )
+                if parent not in models and not parent.objects.exists():
+                    raise CommandError(
+                        f"Для загрузки {model.__name__} сначала "
+                        f"загрузите {parent.__name__}"
+                    )
+
+    def truncate(self, models):
+        """
+        Очищает таблицы, начиная с зависимых. Таблицы со ссылками на
+        очищаемые должны быть пусты или пересчитываться после загрузки,
+        иначе команда ничего не удаляет.
+        """
+        dependents = table_dependents(models) - set(models)
+        not_empty = sorted(
+            model._meta.label for model in dependents
+            if model not in DERIVED and model._default_manager.exists()
+        )
+        if not_empty:
+            raise CommandError(
+                f"На очищаемые таблицы ссылаются данные "
+                f"{', '.join(not_empty)}. Добавьте эти таблицы в --only "
+                f"или очистите их"
+            )
+        if connection.vendor == "postgresql":
+            # Без CASCADE: всё, что ссылается на таблицы, перечислено явно.
+            tables = ", ".join(
+                connection.ops.quote_name(model._meta.db_table)
+                for model in [*models, *dependents]
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"TRUNCATE {tables}")
+            return
+        with transaction.atomic():
+            for model in [*dependents, *reversed(models)]:
+                model._default_manager.all().delete()
 
-            for row in DictReader(
-                open(databases[obj].get("filename"), encoding="UTF-8")
-            ):
-                kwargs = {
-                    key: row[val] for key, val in databases[obj][
-                        "fields"
-                    ].items()
-                }
-                record = obj(**kwargs)
-                record.save()
-        print("Данные успешно загружены")
+    def load(self, model, filename, batch_size, use_copy):
+        """Загружает одну таблицу пачками в одной транзакции."""
+        self.stdout.write(f"Загружаю данные в {model.__name__}")
+        fields = TABLES[model]["fields"]
+        started = monotonic()
+        count = 0
+        with transaction.atomic():
+            for batch in read_batches(filename, fields, batch_size):
+                objs = [model(**kwargs) for kwargs in batch]
+                if use_copy:
+                    copy_objects(connection, model, objs)
+                else:
+                    model.objects.bulk_create(objs, batch_size=batch_size)
+                count += len(objs)
+        elapsed = monotonic() - started
+        self.stdout.write(
+            f"  {count} строк за {elapsed:.2f} с "
+            f"({count / elapsed if elapsed else count:.0f} строк/с)"
+        )
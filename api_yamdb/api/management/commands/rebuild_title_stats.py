@@ -0,0 +1,33 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews.models import Title
+
+from ...cache import bump_versions
+from ._private import warn_if_cache_is_local
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает распределение оценок произведений по месяцам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Количество произведений, пересчитываемых в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        pks = list(Title.objects.order_by("pk").values_list("pk", flat=True))
+        rows = 0
+        for start in range(0, len(pks), chunk_size):
+            chunk = pks[start:start + chunk_size]
+            with transaction.atomic():
+                rows += len(Title.objects.filter(pk__in=chunk).rebuild_stats())
+        bump_versions("titles")
+        warn_if_cache_is_local(self)
+        self.stdout.write(self.style.SUCCESS(
+            f"Статистика оценок пересчитана для {len(pks)} произведений "
+            f"({rows} строк)"
+        ))
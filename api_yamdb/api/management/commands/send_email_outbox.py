@@ -0,0 +1,46 @@
+import time
+
+from django.core.management import BaseCommand
+from users.outbox import drain, get_stats, run_worker
+
+
+class Command(BaseCommand):
+    help = "Отправляет письма из очереди EmailOutbox пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Писем в одной пачке (по умолчанию EMAIL_OUTBOX)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Пауза между проверками очереди, с",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Отправить готовые письма и завершиться",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Показать глубину очереди и задержку отправки",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            for name, value in get_stats().items():
+                self.stdout.write(f"{name}: {value:g}")
+            return
+        if options["once"]:
+            started = time.monotonic()
+            sent, failed = drain(options["batch_size"])
+            self.stdout.write(
+                f"Отправлено {sent}, отложено {failed} "
+                f"за {time.monotonic() - started:.2f} с"
+            )
+            return
+        run_worker(options["interval"], options["batch_size"], self.stdout)
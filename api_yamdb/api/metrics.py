@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from common.db_pool.pool import COUNTERS, GAUGES, pool_stats
+from django.conf import settings
+
+# Порядок значений в записи метрик маршрута.
+COUNT, DURATION, QUERIES, SQL_DURATION, SIZE, BUCKETS = range(6)
+
+
+class MetricsStore:
+    """
+    Метрики запросов процесса с агрегацией между процессами gunicorn.
+
+    Каждый процесс копит метрики в памяти и не чаще раза в
+    flush_interval секунд атомарно сохраняет их в свой файл в directory.
+    /metrics суммирует файлы всех процессов, включая завершившиеся,
+    поэтому счётчики не убывают; текущее состояние пулов соединений
+    с БД берётся только у живых процессов. Без directory метрики только
+    локальные.
+    """
+
+    def __init__(self, directory, flush_interval, buckets):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self.routes = {}
+        self.flushed_at = 0.0
+        self._lock = threading.Lock()
+        # Проверка интервала и запись файла - под одной блокировкой:
+        # файл процесса пишет один поток.
+        self._flush_lock = threading.Lock()
+
+    def _empty(self):
+        return [0, 0.0, 0, 0.0, 0, [0] * (len(self.buckets) + 1)]
+
+    def observe(self, route, method, duration, queries, sql_duration, size):
+        with self._lock:
+            values = self.routes.get((route, method))
+            if values is None:
+                values = self.routes[(route, method)] = self._empty()
+            values[COUNT] += 1
+            values[DURATION] += duration
+            values[QUERIES] += queries
+            values[SQL_DURATION] += sql_duration
+            values[SIZE] += size
+            values[BUCKETS][bisect_left(self.buckets, duration)] += 1
+        if self.directory:
+            self.flush(due_only=True)
+
+    def flush(self, due_only=False):
+        """
+        Атомарно сохраняет метрики процесса в его файл. С due_only -
+        только если прошло flush_interval секунд и файл не пишет другой
+        поток.
+        """
+        if not self._flush_lock.acquire(blocking=not due_only):
+            return
+        try:
+            now = time.monotonic()
+            if due_only and now - self.flushed_at < self.flush_interval:
+                return
+            self.flushed_at = now
+            with self._lock:
+                routes = [
+                    [route, method, values]
+                    for (route, method), values in self.routes.items()
+                ]
+            data = {"routes": routes, "pools": pool_stats()}
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(data, file)
+            os.replace(tmp_path, path)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """
+        Метрики всех процессов за одно чтение файлов: маршруты
+        {(route, method): values} и пулы соединений с БД {alias: stats}.
+        """
+        if not self.directory:
+            with self._lock:
+                routes = {
+                    key: self._merge(self._empty(), values)
+                    for key, values in self.routes.items()
+                }
+            return routes, pool_stats()
+        routes, pools = {}, {}
+        for pid, data in self._load():
+            for route, method, values in data["routes"]:
+                total = routes.setdefault((route, method), self._empty())
+                self._merge(total, values)
+            alive = _alive(pid)
+            for alias, stats in data.get("pools", {}).items():
+                total = pools.setdefault(
+                    alias, dict.fromkeys(COUNTERS + GAUGES, 0)
+                )
+                for name in COUNTERS + GAUGES if alive else COUNTERS:
+                    total[name] += stats.get(name, 0)
+        return routes, pools
+
+    def _load(self):
+        """Сохранённые метрики процессов: (pid, data)."""
+        self.flush()
+        for name in os.listdir(self.directory):
+            if not (name.startswith("metrics_") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as file:
+                    data = json.load(file)
+                pid = int(name[len("metrics_"):-len(".json")])
+            except (OSError, ValueError):
+                continue
+            yield pid, data
+
+    @staticmethod
+    def _merge(total, values):
+        for index in (COUNT, DURATION, QUERIES, SQL_DURATION, SIZE):
+            total[index] += values[index]
+        total[BUCKETS] = [
+            a + b for a, b in zip(total[BUCKETS], values[BUCKETS])
+        ]
+        return total
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+store = MetricsStore(
+    directory=settings.METRICS["DIR"],
+    flush_interval=settings.METRICS["FLUSH_INTERVAL"],
+    buckets=settings.METRICS["BUCKETS"],
+)
+
+
+def _labels(route, method, **extra):
+    return _format_labels({"route": route, "method": method, **extra})
+
+
+def _format_labels(labels):
+    return ",".join(
+        '{}="{}"'.format(
+            name, str(value).replace("\\", "\\\\").replace('"', '\\"')
+        )
+        for name, value in labels.items()
+    )
+
+
+def render(routes, buckets, pools=None):
+    """Метрики в текстовом формате Prometheus."""
+    lines = []
+
+    def family(name, kind, help_text, index):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (route, method), values in sorted(routes.items()):
+            lines.append(f"{name}{{{_labels(route, method)}}} {values[index]}")
+
+    family(
+        "yamdb_http_requests_total", "counter",
+        "Количество запросов.", COUNT,
+    )
+    name = "yamdb_http_request_duration_seconds"
+    lines.append(f"# HELP {name} Время обработки запроса.")
+    lines.append(f"# TYPE {name} histogram")
+    for (route, method), values in sorted(routes.items()):
+        cumulative = 0
+        bounds = [str(bound) for bound in buckets] + ["+Inf"]
+        for bound, count in zip(bounds, values[BUCKETS]):
+            cumulative += count
+            labels = _labels(route, method, le=bound)
+            lines.append(f"{name}_bucket{{{labels}}} {cumulative}")
+        labels = _labels(route, method)
+        lines.append(f"{name}_sum{{{labels}}} {values[DURATION]}")
+        lines.append(f"{name}_count{{{labels}}} {values[COUNT]}")
+    family(
+        "yamdb_db_queries_total", "counter",
+        "Количество SQL-запросов.", QUERIES,
+    )
+    family(
+        "yamdb_db_query_duration_seconds_total", "counter",
+        "Суммарное время SQL-запросов.", SQL_DURATION,
+    )
+    family(
+        "yamdb_http_response_size_bytes_total", "counter",
+        "Суммарный размер ответов.", SIZE,
+    )
+    if pools:
+        lines.extend(render_pools(pools))
+    return "\n".join(lines) + "\n"
+
+
+POOL_COUNTERS = (
+    ("yamdb_db_pool_checkouts_total",
+     "Количество выдач соединений из пула.", "checkouts"),
+    ("yamdb_db_pool_checkout_wait_seconds_total",
+     "Суммарное время получения соединения из пула.", "wait_seconds"),
+    ("yamdb_db_pool_checkout_timeouts_total",
+     "Количество отказов по таймауту ожидания соединения.", "timeouts"),
+    ("yamdb_db_pool_connections_created_total",
+     "Количество открытых соединений.", "created"),
+    ("yamdb_db_pool_connections_closed_total",
+     "Количество закрытых соединений.", "closed"),
+)
+
+
+def render_pools(pools):
+    """Метрики пулов соединений; загрузка - in_use / max_connections."""
+    lines = []
+    pools = sorted(pools.items())
+    for name, help_text, key in POOL_COUNTERS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for alias, stats in pools:
+            labels = _format_labels({"alias": alias})
+            lines.append(f"{name}{{{labels}}} {stats[key]}")
+    name = "yamdb_db_pool_connections"
+    lines.append(f"# HELP {name} Соединения пулов по состоянию.")
+    lines.append(f"# TYPE {name} gauge")
+    for alias, stats in pools:
+        for state in ("in_use", "idle"):
+            labels = _format_labels({"alias": alias, "state": state})
+            lines.append(f"{name}{{{labels}}} {stats[state]}")
+    name = "yamdb_db_pool_max_connections"
+    lines.append(f"# HELP {name} Наибольший размер пулов.")
+    lines.append(f"# TYPE {name} gauge")
+    for alias, stats in pools:
+        labels = _format_labels({"alias": alias})
+        lines.append(f"{name}{{{labels}}} {stats['max_size']}")
+    return lines
@@ -0,0 +1,101 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import compression
+from .metrics import store
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """Execute wrapper: считает SQL-запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики запросов по имени маршрута и методу для /metrics/.
+    Ошибка записи метрик пишется в лог и не портит ответ.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.view_name if match else "unmatched"
+        if route != "metrics":
+            try:
+                store.observe(
+                    route,
+                    request.method,
+                    duration,
+                    timer.count,
+                    timer.duration,
+                    self.response_size(response),
+                )
+            except Exception:
+                logger.exception("Не удалось записать метрики запроса")
+        return response
+
+    @staticmethod
+    def response_size(response):
+        if response.has_header("Content-Length"):
+            return int(response["Content-Length"])
+        if response.streaming:
+            return 0
+        return len(response.content)
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы от COMPRESSION["MIN_SIZE"] байт в brotli или gzip
+    по Accept-Encoding. Ответы каталога приходят уже сжатыми из кэша
+    (CatalogCacheMixin); потоковые ответы не сжимаются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(response, "negotiated_encoding", None):
+            compression.weaken_etag(response)
+            return response
+        if not compression.compressible(response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if encoding is None:
+            return response
+        compressed = compression.compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        compression.apply(response, compressed, encoding)
+        compression.weaken_etag(response)
+        return response
@@ -0,0 +1,163 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагинация по паре (pub_date, id) от новых записей к старым.
+
+    Страница выбирается условием по ключу последней показанной записи,
+    а не OFFSET, поэтому стоимость запроса не зависит от глубины страницы
+    при наличии индекса (<родитель>, pub_date, id).
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.reverse, position = self.decode_cursor(request)
+
+        if position is not None:
+            pub_date, pk = position
+            lookup = "gt" if self.reverse else "lt"
+            queryset = queryset.filter(
+                Q(**{f"pub_date__{lookup}e": pub_date}),
+                Q(**{f"pub_date__{lookup}": pub_date})
+                | Q(**{f"pk__{lookup}": pk}),
+            )
+        ordering = ("pub_date", "pk") if self.reverse else ("-pub_date", "-pk")
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        """Возвращает направление и позицию (pub_date, id) из курсора."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            pub_date = parse_datetime(tokens["d"][0])
+            pk = int(tokens["i"][0])
+        except (KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, (pub_date, pk)
+
+    def encode_cursor(self, instance, reverse):
+        """
+        Возвращает url страницы, соседней с записью instance: объектом
+        модели или строкой .values() (RowSerializer).
+        """
+        if isinstance(instance, dict):
+            pub_date, pk = instance["pub_date"], instance["id"]
+        else:
+            pub_date, pk = instance.pub_date, instance.pk
+        tokens = {"d": pub_date.isoformat(), "i": str(pk)}
+        if reverse:
+            tokens["r"] = "1"
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по умолчанию; при наличии параметра
+    ?cursor= (в том числе пустого) включается KeysetPagination.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class PageNumberWithoutCountPagination(BasePagination):
+    """
+    Постраничная пагинация без COUNT: читается page_size + 1 записей,
+    лишняя только сообщает о следующей странице. Страница - один запрос.
+    """
+
+    page_query_param = "page"
+    page_size = api_settings.PAGE_SIZE
+    invalid_page_message = "Invalid page."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if self.page < 1:
+            raise NotFound(self.invalid_page_message)
+        offset = (self.page - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        if not rows and self.page > 1:
+            raise NotFound(self.invalid_page_message)
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_page_link(self, page):
+        url = self.request.build_absolute_uri()
+        if page == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict((
+            ("next", self.get_page_link(self.page + 1)
+             if self.has_next else None),
+            ("previous", self.get_page_link(self.page - 1)
+             if self.page > 1 else None),
+            ("results", data),
+        )))
@@ -0,0 +1,45 @@
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from .renderers import JSONRenderer, MessagePackRenderer, msgpack, orjson
+
+UTF8 = {"utf-8", "utf8"}
+
+
+class JSONParser(parsers.JSONParser):
+    """
+    JSONParser DRF на orjson, если он установлен. Тело, которое orjson
+    не принял (NaN, числа вне int64, одиночные суррогаты, ошибки),
+    разбирает JSONParser, поэтому результат и ошибки те же.
+    """
+
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+        content = stream.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().parse(
+                BytesIO(content), media_type, parser_context
+            )
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Тело запроса в MessagePack (Content-Type: application/msgpack)."""
+
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as error:
+            raise ParseError(f"MessagePack parse error - {error}")
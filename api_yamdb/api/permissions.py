@@ -28,3 +28,14 @@ class IsOwnerOrModeratorOrAdmin(permissions.BasePermission):
             or request.user.is_moderator
             or request.user.is_superuser
         )
+
+
+class IsModeratorOrAdmin(permissions.BasePermission):
+    """Moderator or Admin permission."""
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_admin
+            or request.user.is_moderator
+            or request.user.is_superuser
+        )
@@ -0,0 +1,152 @@
+import re
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from reviews.models import Comment, Genre, Title
+
+SQLITE_SCAN = re.compile(r"SCAN (?:TABLE )?(\w+)")
+SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR (?:.* )?ORDER BY")
+
+# Запросы выполняются мимо кэша каталога и реплик: в отдельном locmem,
+# очищаемом перед каждым запросом, и с основной базой.
+AUDIT_SETTINGS = {
+    "CACHES": {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "query-plans",
+        },
+    },
+    "CATALOG_CACHE_ALIAS": "default",
+    "THROTTLE_CACHE_ALIAS": "default",
+    "DATABASE_ROUTERS": [],
+}
+
+
+def hot_requests():
+    """
+    Чтения api, которые проверяет аудит: (название, путь). Идентификаторы
+    и значения фильтров берутся из данных базы.
+    """
+    requests = [
+        ("categories-list", "/api/v1/categories/"),
+        ("genres-list", "/api/v1/genres/"),
+        ("titles-list", "/api/v1/titles/"),
+        ("titles-ordered", "/api/v1/titles/?ordering=-rating"),
+        ("titles-by-year", "/api/v1/titles/?ordering=year"),
+        ("titles-top", "/api/v1/titles/top/"),
+    ]
+    title = Title.objects.filter(category__isnull=False).order_by("pk").first()
+    if title is not None:
+        requests.append((
+            "titles-year-category",
+            "/api/v1/titles/?" + urlencode(
+                {"year": title.year, "category": title.category.slug}
+            ),
+        ))
+    genre = Genre.objects.order_by("pk").first()
+    if genre is not None:
+        requests.append(
+            ("titles-genre", f"/api/v1/titles/?genre={genre.slug}")
+        )
+    title = Title.objects.order_by("-review_count", "pk").first()
+    if title is not None:
+        reviews = f"/api/v1/titles/{title.pk}/reviews/"
+        requests += [
+            ("titles-detail", f"/api/v1/titles/{title.pk}/"),
+            ("titles-stats", f"/api/v1/titles/{title.pk}/stats/"),
+            ("reviews-list", reviews),
+            ("reviews-list-cursor", reviews + "?cursor="),
+        ]
+    comment = Comment.objects.order_by("pk").select_related("review").first()
+    if comment is not None:
+        comments = (
+            f"/api/v1/titles/{comment.review.title_id}/reviews/"
+            f"{comment.review_id}/comments/"
+        )
+        requests += [
+            ("comments-list", comments),
+            ("comments-list-cursor", comments + "?cursor="),
+        ]
+    return requests
+
+
+def capture(path, using="default"):
+    """SQL-запросы, которые выполняет viewset для GET path."""
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != "*"]
+    request = RequestFactory().get(
+        path, HTTP_HOST=hosts[0].lstrip(".") if hosts else "localhost"
+    )
+    match = resolve(path.split("?")[0])
+    with override_settings(**AUDIT_SETTINGS):
+        caches["default"].clear()
+        with CaptureQueriesContext(connections[using]) as context:
+            response = match.func(request, *match.args, **match.kwargs)
+            response.render()
+    return [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].lstrip().upper().startswith("SELECT")
+    ]
+
+
+def explain(sql, using="default", analyze=False):
+    """
+    План запроса: (строки плана, замечания). Замечания - чтение таблицы
+    целиком и сортировка без индекса.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            # У SQLite нет EXPLAIN ANALYZE: analyze не применим.
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return _sqlite_plan(cursor.fetchall())
+        if connection.vendor == "postgresql":
+            options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+            cursor.execute(f"EXPLAIN ({options}) " + sql)
+            return _postgresql_plan(cursor.fetchone()[0][0]["Plan"])
+    raise NotImplementedError(
+        f"EXPLAIN для {connection.vendor} не поддерживается"
+    )
+
+
+def _sqlite_plan(rows):
+    depths = {0: -1}
+    lines, problems = [], []
+    for node, parent, _, detail in rows:
+        depths[node] = depths.get(parent, -1) + 1
+        lines.append("  " * depths[node] + detail)
+        scan = SQLITE_SCAN.fullmatch(detail)
+        if scan:
+            problems.append(f"чтение таблицы целиком: {scan.group(1)}")
+        if SQLITE_SORT.match(detail):
+            problems.append(f"сортировка без индекса: {detail}")
+    return lines, problems
+
+
+def _postgresql_plan(plan, depth=0):
+    node = plan["Node Type"]
+    line = "  " * depth + node
+    if "Relation Name" in plan:
+        line += f" on {plan['Relation Name']}"
+    if "Index Name" in plan:
+        line += f" using {plan['Index Name']}"
+    line += f" (rows={plan['Plan Rows']}"
+    if "Actual Total Time" in plan:
+        line += f", actual rows={plan['Actual Rows']}"
+        line += f", time={plan['Actual Total Time']} ms"
+    lines, problems = [line + ")"], []
+    if node == "Seq Scan":
+        problems.append(f"чтение таблицы целиком: {plan['Relation Name']}")
+    if node == "Sort":
+        problems.append(
+            f"сортировка без индекса: {', '.join(plan['Sort Key'])}"
+        )
+    for child in plan.get("Plans", ()):
+        child_lines, child_problems = _postgresql_plan(child, depth + 1)
+        lines += child_lines
+        problems += child_problems
+    return lines, problems
@@ -0,0 +1,84 @@
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# JSONRenderer экранирует разделители строк JS U+2028 и U+2029, orjson - нет.
+LINE_SEPARATORS = (
+    (b"\xe2\x80\xa8", b"\\u2028"),
+    (b"\xe2\x80\xa9", b"\\u2029"),
+)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer DRF на orjson, если он установлен.
+
+    Вывод совпадает с JSONRenderer байт в байт (tests/test_renderers.py):
+    компактный JSON без экранирования не-ASCII, типы, которых orjson
+    не знает, преобразует JSONEncoder DRF. С отступами (indent=),
+    ensure_ascii, на числах вне int64 и строках с одиночными суррогатами
+    используется JSONRenderer. Отличаются только float в экспоненциальной
+    записи (меньше 1e-4 и от 1e16: "1e16" вместо "1e+16") и NaN,
+    которых API не выдаёт: оценки округлены до сотых.
+    """
+
+    # Даты и время - через JSONEncoder DRF: orjson пишет UTC как "+00:00",
+    # DRF - как "Z".
+    options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            content = orjson.dumps(
+                data, default=encoders.JSONEncoder().default,
+                option=self.options,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    MessagePack (Accept: application/msgpack) - те же данные, что в JSON;
+    список произведений компактнее примерно на 15%. Требует пакета msgpack.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(
+            data, default=encoders.JSONEncoder().default, use_bin_type=True
+        )
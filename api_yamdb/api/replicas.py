@@ -0,0 +1,76 @@
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import is_shared
+
+PINNED_KEY = "db:primary:{}"
+
+_state = threading.local()
+
+
+def get_replicas():
+    return settings.DATABASE_REPLICAS["ALIASES"]
+
+
+def set_replica_reads(enabled):
+    """Включает чтение с реплик для запросов текущего потока."""
+    _state.replica = random.choice(get_replicas()) if enabled else None
+
+
+def sticky_seconds():
+    return settings.DATABASE_REPLICAS["STICKY_SECONDS"]
+
+
+def _cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def check_configuration():
+    """
+    Реплики требуют общего для процессов CATALOG_CACHE_ALIAS: в нём
+    хранятся отметки pin_to_primary, и с locmem следующий запрос
+    пользователя, попавший в другой процесс, читал бы с реплики.
+    """
+    if get_replicas() and not is_shared(_cache()):
+        raise ImproperlyConfigured(
+            "DB_REPLICA_HOSTS требует общего кэша (CACHE_BACKEND): "
+            "locmem у каждого процесса свой."
+        )
+
+
+def pin_to_primary(user):
+    """Чтения пользователя идут в основную базу STICKY_SECONDS секунд."""
+    if user.is_authenticated:
+        _cache().set(PINNED_KEY.format(user.pk), 1, sticky_seconds())
+
+
+def is_pinned(user):
+    return (
+        user.is_authenticated
+        and _cache().get(PINNED_KEY.format(user.pk)) is not None
+    )
+
+
+class ReplicaRouter:
+    """
+    Чтения безопасных запросов viewset'ов api идут на реплику
+    (api.viewsets.ReplicaReadMixin), остальные запросы - в основную базу.
+
+    Реплика выбирается случайно одна на запрос, поэтому все чтения
+    запроса видят один снимок данных.
+    """
+
+    def db_for_read(self, model, **hints):
+        return getattr(_state, "replica", None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Без явного ответа Django пишет в базу, из которой прочитан объект.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -1,13 +1,13 @@
 from django.contrib.auth import authenticate
-from django.contrib.auth.models import update_last_login
-from django.db.models import Avg
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.auth import get_token_claims
+from users.last_login import last_login_buffer
 from users.models import User
 
 
@@ -57,7 +57,9 @@ class TokenSerializer(TokenObtainPairSerializer):
             )
 
         if api_settings.UPDATE_LAST_LOGIN:
-            update_last_login(None, user)
+            # Без UPDATE на каждый токен: пишется пачкой, с задержкой.
+            user.last_login = timezone.now()
+            last_login_buffer.touch(user.pk, user.last_login)
 
         return {
             "username": attrs[self.username_field],
@@ -67,8 +69,11 @@ class TokenSerializer(TokenObtainPairSerializer):
 
     @classmethod
     def get_token(cls, user):
-        """Возвращает токен."""
-        return cls.token_class.for_user(user)
+        """Возвращает токен с ролью и версией токенов пользователя."""
+        token = cls.token_class.for_user(user)
+        for claim, value in get_token_claims(user).items():
+            token[claim] = value
+        return token
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -120,7 +125,7 @@ class TitlesSerializer(serializers.ModelSerializer):
 
     genre = GenresSerializer(read_only=True, many=True)
     category = CategoriesSerializer(read_only=True)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
@@ -128,13 +133,6 @@ class TitlesSerializer(serializers.ModelSerializer):
             "id", "name", "year", "rating", "description", "genre", "category"
         )
 
-    def get_rating(self, obj):
-        """Возвращает рейтинг."""
-        score = obj.reviews.all().aggregate(
-            Avg("score")
-        ).get("score__avg", 0.00)
-        return round(score, 2) if score else None
-
     def validate_year(self, year):
         """Проверяем что год не больше текущего."""
         if year > timezone.now().year:
@@ -144,6 +142,60 @@ class TitlesSerializer(serializers.ModelSerializer):
         return year
 
 
+class TitleTopSerializer(serializers.ModelSerializer):
+    """Сериализатор строки рейтинга произведений."""
+
+    category = CategoriesSerializer(read_only=True)
+    rating = serializers.FloatField(read_only=True)
+    weighted_rating = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = (
+            "id", "name", "year", "rating", "weighted_rating",
+            "review_count", "category",
+        )
+
+    def get_weighted_rating(self, title):
+        return round(title.rating_weighted, 2)
+
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Распределение оценок произведения и средняя оценка по месяцам."""
+
+    rating = serializers.FloatField(read_only=True)
+    histogram = serializers.SerializerMethodField()
+    monthly = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ("id", "rating", "review_count", "histogram", "monthly")
+
+    def get_histogram(self, title):
+        histogram = {str(score): 0 for score in range(1, 11)}
+        for stats in title.score_stats.all():
+            key = str(stats.score)
+            histogram[key] = histogram.get(key, 0) + stats.count
+        return histogram
+
+    def get_monthly(self, title):
+        months = {}
+        for stats in title.score_stats.all():
+            count, total = months.get(stats.month, (0, 0))
+            months[stats.month] = (
+                count + stats.count, total + stats.score * stats.count
+            )
+        return [
+            {
+                "month": f"{month:%Y-%m}",
+                "count": count,
+                "rating": round(total / count, 2),
+            }
+            for month, (count, total) in sorted(months.items())
+            if count
+        ]
+
+
 class TitlesSlugSerializer(TitlesSerializer):
     """Сериализатор для модели Post по slug"""
 
@@ -170,7 +222,11 @@ class ReviewsSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """Валидация отзыва на произведение."""
-        if self.context.get("request").method == "POST":
+        # Пачка проверяет повторы одним запросом (BatchCreateMixin).
+        if (
+            self.context.get("request").method == "POST"
+            and not self.context.get("batch")
+        ):
             author = self.context.get("request").user
             title = self.context.get("title")
             if Review.objects.filter(title=title, author=author).exists():
@@ -192,3 +248,104 @@ class CommentsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ("id", "text", "author", "pub_date")
+
+
+class RowSerializer:
+    """
+    Быстрый сериализатор list(): строки .values() в словари без экземпляров
+    моделей и полей DRF на каждую строку.
+
+    Вывод совпадает байт в байт с соответствующим ModelSerializer
+    (tests/test_fast_list.py); при изменении полей правятся оба.
+    """
+
+    values = ()
+    pub_date = serializers.DateTimeField()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    def get_rows(self, queryset):
+        """Запрос строк: без prefetch, который к словарям не применим."""
+        return queryset.prefetch_related(None).values(*self.values)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.represent(row) for row in rows]
+
+    def prepare(self, rows):
+        """Дополнительные запросы для страницы строк."""
+
+    def represent(self, row):
+        raise NotImplementedError
+
+
+class TitleRowSerializer(RowSerializer):
+    """Строки произведений для TitleViewSet.list (как TitlesSerializer)."""
+
+    values = (
+        "id", "name", "year", "rating_sum", "review_count", "description",
+        "category__name", "category__slug",
+    )
+
+    def prepare(self, rows):
+        # Жанры одним запросом в порядке Genre.Meta.ordering, как prefetch.
+        self.genres = {}
+        links = TitleGenre.objects.filter(
+            title_id__in=[row["id"] for row in rows]
+        ).order_by("genre__name").values_list(
+            "title_id", "genre__name", "genre__slug"
+        )
+        for title_id, name, slug in links:
+            self.genres.setdefault(title_id, []).append(
+                {"name": name, "slug": slug}
+            )
+
+    def represent(self, row):
+        count = row["review_count"]
+        category = None
+        if row["category__slug"] is not None:
+            category = {
+                "name": row["category__name"], "slug": row["category__slug"]
+            }
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "year": row["year"],
+            "rating": (
+                float(round(row["rating_sum"] / count, 2)) if count else None
+            ),
+            "description": row["description"],
+            "genre": self.genres.get(row["id"], []),
+            "category": category,
+        }
+
+
+class ReviewRowSerializer(RowSerializer):
+    """Строки рецензий для ReviewViewSet.list (как ReviewsSerializer)."""
+
+    values = ("id", "text", "author__username", "score", "pub_date")
+
+    def represent(self, row):
+        return {
+            "id": row["id"],
+            "text": row["text"],
+            "author": row["author__username"],
+            "score": row["score"],
+            "pub_date": self.pub_date.to_representation(row["pub_date"]),
+        }
+
+
+class CommentRowSerializer(RowSerializer):
+    """Строки комментариев для CommentViewSet.list (как CommentsSerializer)."""
+
+    values = ("id", "text", "author__username", "pub_date")
+
+    def represent(self, row):
+        return {
+            "id": row["id"],
+            "text": row["text"],
+            "author": row["author__username"],
+            "pub_date": self.pub_date.to_representation(row["pub_date"]),
+        }
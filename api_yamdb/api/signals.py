@@ -0,0 +1,56 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+
+from .cache import invalidate_on_commit
+
+# Ресурсы каталога, ответы которых зависят от модели.
+CATALOG_DEPENDENCIES = {
+    Category: ("categories", "titles"),
+    Genre: ("genres", "titles"),
+    Title: ("titles",),
+    TitleGenre: ("titles",),
+    Review: ("titles",),
+}
+
+
+def catalog_changed(sender, **kwargs):
+    """Инвалидирует кэш каталога при изменении его моделей."""
+    invalidate_on_commit(*CATALOG_DEPENDENCIES[sender])
+
+
+for model in CATALOG_DEPENDENCIES:
+    post_save.connect(catalog_changed, sender=model)
+    post_delete.connect(catalog_changed, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, action, **kwargs):
+    """Инвалидирует кэш произведений при изменении их жанров."""
+    if action.startswith("post_"):
+        invalidate_on_commit("titles")
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def reviews_changed(sender, instance, **kwargs):
+    """Отмечает изменение списка рецензий произведения."""
+    invalidate_on_commit(f"reviews:{instance.title_id}")
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comments_changed(sender, instance, **kwargs):
+    """Отмечает изменение списка комментариев к рецензии."""
+    invalidate_on_commit(f"comments:{instance.review_id}")
+
+
+@receiver(post_save, sender=User)
+def users_changed(sender, created, update_fields=None, **kwargs):
+    """
+    Имя автора входит в ответы с рецензиями и комментариями: отмечаем
+    изменение пользователей, кроме новых и обновления служебных полей.
+    """
+    if not created and (update_fields is None or "username" in update_fields):
+        invalidate_on_commit("users")
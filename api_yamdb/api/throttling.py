@@ -0,0 +1,163 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import SimpleRateThrottle
+
+from .cache import is_shared
+
+# GCRA (token bucket в виде одного числа): в ключе хранится TAT -
+# теоретическое время прибытия следующего запроса в миллисекундах.
+# Запрос проходит, если TAT + interval не дальше period от текущего
+# момента; тогда TAT сдвигается на interval. Скрипт возвращает, сколько
+# миллисекунд ждать (0 - запрос пропущен).
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local wait = tat + interval - period - now
+if wait > 0 then return wait end
+redis.call('SET', KEYS[1], tat + interval, 'PX', tat + interval - now)
+return 0
+"""
+
+
+def gcra(tat, now, interval, period):
+    """Возвращает (новое TAT, ожидание в мс) для запроса в момент now."""
+    tat = max(tat or now, now)
+    wait = tat + interval - period - now
+    if wait > 0:
+        return tat, wait
+    return tat + interval, 0
+
+
+def _redis_client(cache):
+    """Клиент redis-py бэкенда django-redis или None для других бэкендов."""
+    get_client = getattr(getattr(cache, "client", None), "get_client", None)
+    return get_client(write=True) if get_client else None
+
+
+def take(cache, key, interval, period):
+    """
+    Берёт из ведра key один токен; возвращает ожидание в мс (0 - взят).
+
+    С django-redis (docker-compose) проверка - один атомарный EVAL.
+    Остальные бэкенды - запасной вариант без Redis: чтение и запись,
+    под гонкой ведро может пропустить лишний запрос, но не отклонить
+    допустимый.
+    """
+    now = int(time.time() * 1000)
+    client = _redis_client(cache)
+    if client is not None:
+        return int(client.eval(
+            GCRA_SCRIPT, 1, cache.make_key(key), now, interval, period
+        ))
+    tat, wait = gcra(cache.get(key), now, interval, period)
+    if not wait:
+        cache.set(key, tat, timeout=math.ceil((tat - now) / 1000))
+    return wait
+
+
+def check_configuration():
+    """
+    Без DEBUG кэш THROTTLE_CACHE_ALIAS должен быть общим для процессов:
+    с locmem каждый воркер gunicorn ведёт свои вёдра, и ставка
+    умножается на число воркеров.
+    """
+    if not settings.DEBUG and not is_shared(
+        caches[settings.THROTTLE_CACHE_ALIAS]
+    ):
+        raise ImproperlyConfigured(
+            "THROTTLE_CACHE_BACKEND должен быть общим для процессов: "
+            "locmem у каждого процесса свой."
+        )
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket вместо скользящего окна SimpleRateThrottle.
+
+    Ставка "N/period" из DEFAULT_THROTTLE_RATES: ведро на N запросов,
+    которое пополняется равномерно за period, - после всплеска запросы
+    пропускаются раз в period / N, а не после окончания окна. Состояние
+    ведра - одно число в кэше THROTTLE_CACHE_ALIAS, общем для процессов.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        super().__init__()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        # Целые миллисекунды: Lua в Redis передаёт числа как целые.
+        period = self.duration * 1000
+        self.wait_ms = take(
+            self.cache, self.key, period // self.num_requests, period
+        )
+        return not self.wait_ms
+
+    def wait(self):
+        return self.wait_ms / 1000
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Запросы регистрации и токена с одного адреса."""
+
+    scope = "auth_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope, "ident": self.get_ident(request)
+        }
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    """
+    Запросы регистрации и токена для одного имени пользователя с любых
+    адресов: перебор кода подтверждения и рассылка писем на чужой адрес.
+    """
+
+    scope = "auth_username"
+
+    def get_cache_key(self, request, view):
+        data = request.data
+        username = data.get("username") if hasattr(data, "get") else None
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {
+            "scope": self.scope, "ident": username.lower()
+        }
+
+
+class UserWriteThrottle(TokenBucketThrottle):
+    """
+    POST пользователя в представление с throttle_scope; остальные
+    методы и представления без throttle_scope не ограничиваются.
+    """
+
+    def __init__(self):
+        # Ставка зависит от представления и известна в allow_request.
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None)
+        if not self.scope or request.method != "POST":
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if not request.user.is_authenticated:
+            return None
+        return self.cache_format % {
+            "scope": self.scope, "ident": request.user.pk
+        }
@@ -3,7 +3,7 @@ from rest_framework import routers
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                     ReviewViewSet, TitleViewSet, UsersViewSet, auth_signup,
-                    auth_token)
+                    auth_token, export)
 
 router_v1 = routers.DefaultRouter()
 router_v1.register("categories", CategoryViewSet, basename="categories")
@@ -26,5 +26,6 @@ auth_urls = [
 
 urlpatterns = [
     path("v1/auth/", include(auth_urls)),
+    path("v1/export/", export, name="export"),
     path("v1/", include(router_v1.urls)),
 ]
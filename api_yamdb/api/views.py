@@ -1,25 +1,58 @@
+from collections import Counter
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from reviews.filters import TitleFilter
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleScoreStats)
+from reviews.signals import shift_title_rating, shift_title_stats
 from users.exceptions import ConfirmationCodeIsIncorrectError, UserNotFound
 from users.models import User
 
-from .permissions import IsAdminOrSuperUser, IsOwnerOrModeratorOrAdmin
+from .cache import invalidate_on_commit
+from .export import EXPORT_INCLUDES, export_rows, gzipped, ndjson
+from .metrics import render, store
+from .pagination import (PageNumberOrKeysetPagination,
+                         PageNumberWithoutCountPagination)
+from .permissions import (IsAdminOrSuperUser, IsModeratorOrAdmin,
+                          IsOwnerOrModeratorOrAdmin)
 from .serializers import (AuthSignupSerializer, CategoriesSerializer,
-                          CommentsSerializer, GenresSerializer,
-                          ReviewsSerializer, TitlesSerializer,
-                          TitlesSlugSerializer, TokenSerializer,
-                          UserSerializer)
-from .viewsets import ListCreateDestroyModelViewSet
+                          CommentRowSerializer, CommentsSerializer,
+                          GenresSerializer, ReviewRowSerializer,
+                          ReviewsSerializer, TitleRowSerializer,
+                          TitlesSerializer, TitlesSlugSerializer,
+                          TitleStatsSerializer, TitleTopSerializer,
+                          TokenSerializer, UserSerializer)
+from .throttling import AuthIPThrottle, AuthUsernameThrottle, UserWriteThrottle
+from .viewsets import (BatchCreateMixin, CatalogCacheMixin,
+                       ConditionalGetMixin, ListCreateDestroyModelViewSet,
+                       NestedResourceMixin, ReplicaReadMixin, RowListMixin)
+
+# Поле оценки, по которому строится рейтинг titles/top/ (?rank=).
+TOP_RANKS = {"bayesian": "rating_weighted", "average": "rating_avg"}
+
+
+def metrics(request):
+    """Метрики запросов в текстовом формате Prometheus."""
+    routes, pools = store.collect()
+    return HttpResponse(
+        render(routes, store.buckets, pools),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 @api_view(["POST"])
+@throttle_classes((AuthIPThrottle, AuthUsernameThrottle))
 def auth_signup(request):
     """Регистрация пользователя."""
     serializer = AuthSignupSerializer(data=request.data)
@@ -27,12 +60,13 @@ def auth_signup(request):
         user_instance = serializer.save(
             confirmation_code=User.objects.make_random_password(),
         )
-        user_instance.send_confirmation_code()
+        user_instance.queue_confirmation_code()
         return Response(serializer.data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["POST"])
+@throttle_classes((AuthIPThrottle, AuthUsernameThrottle))
 def auth_token(request):
     """Получение токена."""
     serializer = TokenSerializer(data=request.data)
@@ -49,7 +83,50 @@ def auth_token(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+@api_view(["GET"])
+@permission_classes((IsAdminOrSuperUser,))
+def export(request):
+    """
+    Потоковая выгрузка каталога в NDJSON: ?include=reviews,comments,
+    ?updated_since=<ISO 8601>, ?compression=gzip.
+    """
+    includes = [
+        name for name in request.query_params.get("include", "").split(",")
+        if name
+    ]
+    if set(includes) - set(EXPORT_INCLUDES):
+        raise ParseError(
+            f"include может содержать: {', '.join(EXPORT_INCLUDES)}"
+        )
+    since = request.query_params.get("updated_since")
+    if since is not None:
+        try:
+            # Формат верный, но даты нет (2020-13-45) - ValueError.
+            since = parse_datetime(since)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ParseError("updated_since должен быть датой в ISO 8601")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+    compression = request.query_params.get("compression")
+    if compression not in (None, "gzip"):
+        raise ParseError("compression может быть только gzip")
+
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    content = ndjson(export_rows(includes, since, chunk_size), chunk_size)
+    filename = "catalog.ndjson"
+    content_type = "application/x-ndjson"
+    if compression == "gzip":
+        content = gzipped(content)
+        filename += ".gz"
+        content_type = "application/gzip"
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+class UsersViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """View класс для модели User."""
 
     queryset = User.objects.all()
@@ -63,7 +140,7 @@ class UsersViewSet(viewsets.ModelViewSet):
         permission_classes=(IsOwnerOrModeratorOrAdmin,),
     )
     def me(self, request):
-        user = get_object_or_404(User, username=request.user.username)
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == "GET":
             serializer = UserSerializer(instance=user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -79,9 +156,12 @@ class UsersViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(ListCreateDestroyModelViewSet):
+class CategoryViewSet(
+    ReplicaReadMixin, CatalogCacheMixin, ListCreateDestroyModelViewSet
+):
     """View класс для модели Category."""
 
+    cache_resources = ("categories",)
     queryset = Category.objects.all()
     serializer_class = CategoriesSerializer
     lookup_field = "slug"
@@ -98,32 +178,108 @@ class CategoryViewSet(ListCreateDestroyModelViewSet):
 class GenreViewSet(CategoryViewSet):
     """View класс для модели Genre."""
 
+    cache_resources = ("genres",)
     queryset = Genre.objects.all()
     serializer_class = GenresSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    RowListMixin,
+    viewsets.ModelViewSet,
+):
     """View класс для модели Title."""
 
-    queryset = Title.objects.all()
+    cache_resources = ("titles",)
+    row_serializer_class = TitleRowSerializer
+    queryset = Title.objects.select_related("category").prefetch_related(
+        "genre"
+    ).order_by("pk")
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
 
     def get_permissions(self):
-        if self.action in ("list", "retrieve"):
+        if self.action in ("list", "retrieve", "stats", "top"):
             return (IsAuthenticatedOrReadOnly(),)
         return (IsAdminOrSuperUser(),)
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
             return TitlesSerializer
+        if self.action == "stats":
+            return TitleStatsSerializer
+        if self.action == "top":
+            return TitleTopSerializer
         return TitlesSlugSerializer
 
+    @action(detail=False, pagination_class=PageNumberWithoutCountPagination)
+    def top(self, request):
+        """
+        Рейтинг произведений: ?rank=bayesian (по умолчанию) или average,
+        ?min_reviews=, ?category= и ?genre= по slug.
+        """
+        return self.conditional_response(self.get_top, request)
+
+    def get_top(self, request):
+        page = self.paginate_queryset(self.get_top_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def get_top_queryset(self):
+        params = self.request.query_params
+        if params.get("rank", "bayesian") not in TOP_RANKS:
+            raise ParseError(
+                f"rank должен быть одним из: {', '.join(TOP_RANKS)}"
+            )
+        try:
+            min_reviews = int(params.get(
+                "min_reviews", settings.TITLE_RATING["TOP_MIN_REVIEWS"]
+            ))
+        except ValueError:
+            raise ParseError("min_reviews должен быть целым числом")
+        queryset = Title.objects.select_related("category").filter(
+            review_count__gte=min_reviews
+        )
+        if "category" in params:
+            queryset = queryset.filter(category__slug=params["category"])
+        if "genre" in params:
+            queryset = queryset.filter(genre__slug=params["genre"])
+        field = TOP_RANKS[params.get("rank", "bayesian")]
+        return queryset.order_by(f"-{field}", "-pk")
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """Распределение оценок и средняя оценка по месяцам."""
+        return self.conditional_response(self.get_stats, request, pk=pk)
+
+    def get_stats(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.prefetch_related("score_stats"), pk=pk
+        )
+        return Response(self.get_serializer(title).data)
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ReplicaReadMixin,
+    BatchCreateMixin,
+    NestedResourceMixin,
+    ConditionalGetMixin,
+    RowListMixin,
+    viewsets.ModelViewSet,
+):
     """View класс для модели Review."""
 
     serializer_class = ReviewsSerializer
+    row_serializer_class = ReviewRowSerializer
+    pagination_class = PageNumberOrKeysetPagination
+    throttle_classes = (UserWriteThrottle,)
+    throttle_scope = "reviews"
+    parent_field = "title"
+
+    def get_cache_resources(self):
+        return (f"reviews:{self.kwargs['title_id']}", "users")
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -131,35 +287,93 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return context
 
     def get_permissions(self):
+        if self.action == "batch":
+            return (IsModeratorOrAdmin(),)
         if self.action in ("partial_update", "update", "destroy"):
             return (IsOwnerOrModeratorOrAdmin(),)
         return (IsAuthenticatedOrReadOnly(),)
 
-    def get_title(self):
+    def get_parent(self):
         return get_object_or_404(Title, pk=self.kwargs.get("title_id"))
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs.get("title_id")
+        ).select_related("author")
 
     def perform_create(self, serializer):
-        serializer.save(title=self.get_title(), author=self.request.user)
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+        serializer.save(title=self.get_parent(), author=self.request.user)
+
+    def get_batch_conflicts(self, parent, objs):
+        """Повторные рецензии автора: в пачке и уже сохранённые."""
+        seen = set(
+            Review.objects.filter(
+                title=parent,
+                author__in=[review.author_id for review in objs.values()],
+            ).values_list("author_id", flat=True)
+        )
+        conflicts = {}
+        for index, review in objs.items():
+            if review.author_id in seen:
+                conflicts[index] = self.conflict(
+                    "Автор уже оставлял рецензию на это произведение!"
+                )
+            seen.add(review.author_id)
+        return conflicts
+
+    def batch_created(self, parent, objs):
+        shift_title_rating(
+            parent.pk, sum(review.score for review in objs), len(objs)
+        )
+        shift_title_stats(parent.pk, Counter(
+            (TitleScoreStats.month_of(review.pub_date), review.score)
+            for review in objs
+        ))
+        invalidate_on_commit("titles", f"reviews:{parent.pk}")
+
+
+class CommentViewSet(
+    ReplicaReadMixin,
+    BatchCreateMixin,
+    NestedResourceMixin,
+    ConditionalGetMixin,
+    RowListMixin,
+    viewsets.ModelViewSet,
+):
     """View класс для модели Comment."""
 
     serializer_class = CommentsSerializer
+    row_serializer_class = CommentRowSerializer
+    pagination_class = PageNumberOrKeysetPagination
+    throttle_classes = (UserWriteThrottle,)
+    throttle_scope = "comments"
+    parent_field = "review"
+
+    def get_cache_resources(self):
+        return (f"comments:{self.kwargs['review_id']}", "users")
 
     def get_permissions(self):
+        if self.action == "batch":
+            return (IsModeratorOrAdmin(),)
         if self.action in ("partial_update", "update", "destroy"):
             return (IsOwnerOrModeratorOrAdmin(),)
         return (IsAuthenticatedOrReadOnly(),)
 
-    def get_reviews(self):
-        return get_object_or_404(Review, pk=self.kwargs.get("review_id"))
+    def get_parent(self):
+        return get_object_or_404(
+            Review,
+            pk=self.kwargs.get("review_id"),
+            title_id=self.kwargs.get("title_id"),
+        )
 
     def get_queryset(self):
-        return self.get_reviews().comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get("review_id"),
+            review__title_id=self.kwargs.get("title_id"),
+        ).select_related("author")
 
     def perform_create(self, serializer):
-        serializer.save(review=self.get_reviews(), author=self.request.user)
+        serializer.save(review=self.get_parent(), author=self.request.user)
+
+    def batch_created(self, parent, objs):
+        invalidate_on_commit(f"comments:{parent.pk}")
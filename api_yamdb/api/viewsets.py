@@ -1,6 +1,21 @@
-from rest_framework import mixins
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
 
+from . import cache, compression, replicas
+
 
 class ListCreateDestroyModelViewSet(
     mixins.CreateModelMixin,
@@ -14,3 +29,375 @@ class ListCreateDestroyModelViewSet(
     """
 
     pass
+
+
+class ReplicaReadMixin:
+    """
+    Безопасные запросы читают с реплик (api.replicas.ReplicaRouter).
+
+    В основную базу читают: пользователь в течение STICKY_SECONDS после
+    своей записи, чтобы видеть её, и запросы к ресурсам, версия которых
+    (ResourceVersionMixin) моложе STICKY_SECONDS, - иначе ответ
+    отстающей реплики попал бы в кэш и ETag новой версии.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replicas.set_replica_reads(self.use_replica(request))
+
+    def use_replica(self, request):
+        if request.method not in SAFE_METHODS or not replicas.get_replicas():
+            return False
+        if hasattr(self, "get_last_modified") and cache.changed_within(
+            self.get_last_modified(), replicas.sticky_seconds()
+        ):
+            return False
+        return not replicas.is_pinned(request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replicas.set_replica_reads(False)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            replicas.pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replicas.set_replica_reads(False)
+
+
+class RowListMixin:
+    """
+    list() через row_serializer_class (api.serializers.RowSerializer):
+    страница читается .values() и сериализуется без экземпляров моделей.
+    """
+
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        serializer = self.row_serializer_class(
+            context=self.get_serializer_context()
+        )
+        rows = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(rows))
+
+
+class NestedResourceMixin:
+    """
+    Вложенный ресурс (отзывы произведения, комментарии к отзыву).
+
+    `get_queryset()` отбирает объекты по идентификаторам родителей из URL
+    одним запросом, не загружая родителя. `get_parent()` загружает
+    родителя или возвращает 404: он нужен при создании объекта и при
+    пустой странице списка, чтобы отличить несуществующего родителя
+    от пустого списка.
+    """
+
+    def get_parent(self):
+        raise NotImplementedError
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.get_parent()
+        return page
+
+
+class BatchCreateMixin:
+    """
+    Создание пачки вложенных объектов: POST списка на `.../batch/`.
+
+    Элементы проверяются сериализатором вместе: авторы (`author`,
+    по умолчанию текущий пользователь) ищутся одним запросом на всю пачку,
+    конфликты с БД - одним запросом в `get_batch_conflicts()`. Прошедшие
+    проверку объекты вставляются одним `bulk_create` в одной транзакции,
+    после чего `batch_created()` делает то, что при одиночном сохранении
+    делают сигналы. В ответе - результат по каждому элементу в порядке
+    запроса; статус 201, если созданы все, 207 - часть, 400 - ни один.
+
+    Если между проверкой и вставкой параллельный запрос создал
+    конфликтующий объект, конфликты проверяются заново и вставка
+    повторяется один раз; при второй ошибке оставшиеся элементы
+    отклоняются.
+    """
+
+    parent_field = None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["batch"] = self.action == "batch"
+        return context
+
+    def get_batch_conflicts(self, parent, objs):
+        """Ошибки элементов {индекс: ошибки}, конфликтующих с БД."""
+        return {}
+
+    def batch_created(self, parent, objs):
+        pass
+
+    @action(detail=False, methods=["post"])
+    def batch(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ParseError("Ожидается непустой список объектов.")
+        if len(items) > settings.API_BATCH_MAX_SIZE:
+            raise ParseError(
+                f"В пачке может быть не больше "
+                f"{settings.API_BATCH_MAX_SIZE} объектов."
+            )
+        parent = self.get_parent()
+        objs, errors = self.validate_batch(parent, items)
+        try:
+            self.save_batch(parent, objs)
+        except IntegrityError:
+            self.reject(objs, errors, self.get_batch_conflicts(parent, objs))
+            try:
+                self.save_batch(parent, objs)
+            except IntegrityError:
+                self.reject(objs, errors, dict.fromkeys(objs, self.conflict(
+                    "Объект изменён параллельным запросом, повторите."
+                )))
+
+        results = [
+            {"status": status.HTTP_201_CREATED,
+             "data": self.get_serializer(objs[index]).data}
+            if index in objs else
+            {"status": status.HTTP_400_BAD_REQUEST, "errors": errors[index]}
+            for index in range(len(items))
+        ]
+        if not errors:
+            return Response(results, status=status.HTTP_201_CREATED)
+        if not objs:
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+        return Response(results, status=status.HTTP_207_MULTI_STATUS)
+
+    def get_batch_authors(self, items):
+        usernames = {
+            item["author"] for item in items
+            if isinstance(item, dict) and isinstance(item.get("author"), str)
+        }
+        if not usernames:
+            return {}
+        return {
+            user.username: user
+            for user in get_user_model().objects.filter(
+                username__in=usernames
+            )
+        }
+
+    def validate_batch(self, parent, items):
+        """Объекты {индекс: объект} и ошибки {индекс: ошибки} пачки."""
+        authors = self.get_batch_authors(items)
+        model = self.get_serializer_class().Meta.model
+        objs, errors = {}, {}
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+                continue
+            author = self.request.user
+            if "author" in item:
+                if not isinstance(item["author"], str):
+                    errors[index] = {"author": ["Ожидается имя пользователя."]}
+                    continue
+                author = authors.get(item["author"])
+            if author is None:
+                errors[index] = {"author": ["Пользователь не найден."]}
+                continue
+            objs[index] = model(
+                author=author,
+                **{self.parent_field: parent},
+                **serializer.validated_data,
+            )
+        self.reject(objs, errors, self.get_batch_conflicts(parent, objs))
+        return objs, errors
+
+    def save_batch(self, parent, objs):
+        with transaction.atomic():
+            self.perform_batch_create(parent, list(objs.values()))
+
+    @staticmethod
+    def reject(objs, errors, rejected):
+        """Переносит элементы rejected {индекс: ошибки} из objs в errors."""
+        errors.update(rejected)
+        for index in rejected:
+            objs.pop(index, None)
+
+    def perform_batch_create(self, parent, objs):
+        if not objs:
+            return
+        self.get_queryset().model.objects.bulk_create(objs)
+        if objs[0].pk is None:
+            # Без RETURNING (SQLite) первичные ключи читаем обратно: запись
+            # в SQLite монопольна, последние строки родителя - наши.
+            pks = self.get_queryset().order_by("-pk").values_list(
+                "pk", flat=True
+            )[:len(objs)]
+            for obj, pk in zip(objs, reversed(pks)):
+                obj.pk = pk
+        self.batch_created(parent, objs)
+
+    @staticmethod
+    def conflict(message):
+        return {api_settings.NON_FIELD_ERRORS_KEY: [message]}
+
+
+class ResourceVersionMixin:
+    """
+    Версии ресурсов, от которых зависит ответ view (см. api.cache).
+
+    Версии повышаются сигналами при изменении моделей (api.signals)
+    и читаются не чаще одного раза за запрос.
+    """
+
+    cache_resources = ()
+
+    def get_cache_resources(self):
+        return self.cache_resources
+
+    def get_resource_versions(self):
+        return self.get_resource_state()[0]
+
+    def get_last_modified(self):
+        """Время последнего изменения ресурсов view в микросекундах."""
+        return self.get_resource_state()[1]
+
+    def get_resource_state(self):
+        if not hasattr(self, "_resource_state"):
+            self._resource_state = cache.get_versions(
+                self.get_cache_resources()
+            )
+        return self._resource_state
+
+
+class ConditionalGetMixin(ResourceVersionMixin):
+    """
+    ETag и Last-Modified для `list()` и `retrieve()` по версиям ресурсов.
+
+    Совпавший If-None-Match или If-Modified-Since получает 304
+    до выполнения запросов к БД и сериализации.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions = self.get_resource_versions()
+        etag = quote_etag("{}-{}".format(
+            "-".join(str(version) for version in versions),
+            cache.request_digest(request),
+        ))
+        # Last-Modified - с точностью до секунды, поэтому отдаётся и
+        # сравнивается с If-Modified-Since только после окончания секунды
+        # последнего изменения: иначе изменение в ту же секунду получило
+        # бы прежнее значение и устаревший 304.
+        last_modified = -(-self.get_last_modified() // 1_000_000)
+        if last_modified > time.time():
+            last_modified = None
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class CatalogCacheMixin(ResourceVersionMixin):
+    """
+    Кэширует отрендеренные ответы `list()` и `retrieve()`.
+
+    Ключ включает версии ресурсов из `cache_resources`,
+    поэтому устаревшие ответы просто перестают запрашиваться.
+    Рядом с ответом хранятся его сжатые варианты (api.compression).
+    """
+
+    cache_key = None
+    encoding = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # Browsable API содержит данные пользователя, его не кэшируем.
+        if request.accepted_renderer.format == "api":
+            return handler(request, *args, **kwargs)
+        key = cache.response_key(
+            self.basename, self.get_resource_versions(), request
+        )
+        self.encoding = compression.negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        keys = [key]
+        if self.encoding is not None:
+            keys.append(compression.cache_key(key, self.encoding))
+        cached = cache.get_cache().get_many(keys)
+        cache.record(hit=key in cached)
+        if key in cached:
+            content, content_type = cached[key]
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Cache"] = "HIT"
+            entries = self.compress(response, key, cached.get(keys[-1]))
+            if entries:
+                cache.get_cache().set_many(
+                    entries, settings.CATALOG_CACHE_TIMEOUT
+                )
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.cache_key = key
+        return response
+
+    def compress(self, response, key, compressed=None):
+        """
+        Сжимает ответ в согласованное кодирование готовыми байтами
+        compressed или сжатием сейчас. Возвращает новые записи кэша:
+        сжатый вариант хранится рядом с ответом и сжимается один раз.
+        """
+        if self.encoding is None or not compression.compressible(response):
+            return {}
+        entries = {}
+        if compressed is None:
+            compressed = compression.compress(response.content, self.encoding)
+            entries[compression.cache_key(key, self.encoding)] = compressed
+        compression.apply(response, compressed, self.encoding)
+        return entries
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.cache_key is not None:
+            response.render()
+            entries = {
+                self.cache_key: (response.content, response["Content-Type"])
+            }
+            entries.update(self.compress(response, self.cache_key))
+            cache.get_cache().set_many(
+                entries, settings.CATALOG_CACHE_TIMEOUT
+            )
+            response["X-Cache"] = "MISS"
+        return response
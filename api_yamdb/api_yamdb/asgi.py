@@ -0,0 +1,8 @@
+import os
+
+# Настройки задаются до импорта api.asgi: модулю может понадобиться settings.
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+from api.asgi import get_asgi_application  # noqa: E402
+
+application = get_asgi_application()
@@ -1,5 +1,7 @@
 import os
+import tempfile
 from datetime import timedelta
+from importlib.util import find_spec
 
 from dotenv import load_dotenv
 
@@ -21,14 +23,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework',
     'rest_framework_simplejwt',
-    'api',
-    'reviews',
+    'api.apps.ApiConfig',
+    'reviews.apps.ReviewsConfig',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,6 +43,23 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Метрики /metrics/. METRICS_DIR - общая папка процессов gunicorn,
+# без неё метрики собираются только в текущем процессе.
+METRICS = {
+    'DIR': os.getenv('METRICS_DIR', default=''),
+    'FLUSH_INTERVAL': 1.0,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+}
+
+# Сжатие ответов (api.middleware.CompressionMiddleware): brotli при
+# установленном пакете brotli, иначе gzip; ответы меньше MIN_SIZE байт
+# не сжимаются.
+COMPRESSION = {
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', default=1024)),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+}
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -60,6 +82,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Пулы потоков ASGI-режима (api_yamdb.asgi): для горячих маршрутов чтения
+# и для остальных запросов. У каждого потока своё соединение с БД.
+ASGI = {
+    'READ_THREADS': int(os.getenv('ASGI_READ_THREADS', default=16)),
+    'THREADS': int(os.getenv('ASGI_THREADS', default=8)),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
@@ -67,10 +96,67 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres-pass'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Пул соединений процесса для DB_ENGINE=common.db_pool.
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            # Соединение старше MAX_AGE секунд закрывается.
+            'MAX_AGE': int(os.getenv('DB_POOL_MAX_AGE', default=600)),
+            # Наибольшее ожидание свободного соединения, с.
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            # SELECT 1 перед выдачей соединения, простаивавшего дольше, с.
+            'CHECK_IDLE': float(os.getenv('DB_POOL_CHECK_IDLE', default=0)),
+        },
     }
 }
 
+# Реплики чтения: DB_REPLICA_HOSTS="replica1 replica2" добавляет базы
+# replica_1, replica_2 с настройками default. Безопасные запросы
+# viewset'ов api читают с них (api.replicas.ReplicaRouter), кроме чтений
+# пользователя в течение STICKY_SECONDS после его записи.
+DB_REPLICA_HOSTS = os.getenv('DB_REPLICA_HOSTS', default='').split()
+DATABASES.update({
+    f'replica_{number}': {
+        **DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'},
+    }
+    for number, host in enumerate(DB_REPLICA_HOSTS, start=1)
+})
+DATABASE_REPLICAS = {
+    'ALIASES': [f'replica_{number}' for number in range(
+        1, len(DB_REPLICA_HOSTS) + 1
+    )],
+    'STICKY_SECONDS': int(os.getenv('DB_REPLICA_STICKY_SECONDS', default=5)),
+}
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    },
+    # Вёдра throttling общие для процессов gunicorn. В docker-compose -
+    # Redis (проверка - один EVAL); без него - запасной файловый кэш.
+    # Каждая запись в файловый кэш читает список файлов папки, поэтому
+    # папка небольшая: при 1000 ключах удаляется половина.
+    'throttle': {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'THROTTLE_CACHE_LOCATION',
+            default=os.path.join(tempfile.gettempdir(), 'yamdb_throttle'),
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 1000, 'CULL_FREQUENCY': 2},
+    },
+}
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', default=300))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -106,24 +192,90 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.auth.CachedJWTAuthentication',
     ),
+    # JSON на orjson, если он установлен; MessagePack - при установленном
+    # msgpack (Accept и Content-Type: application/msgpack).
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ) + (('api.renderers.MessagePackRenderer',) if find_spec('msgpack') else ()),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ) + (('api.parsers.MessagePackParser',) if find_spec('msgpack') else ()),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Число прокси перед приложением (nginx): адрес клиента для throttling
+    # берётся из X-Forwarded-For, который nginx перезаписывает.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+    # Token bucket api.throttling: "N/period" - всплеск до N запросов,
+    # дальше по одному раз в period / N.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('THROTTLE_AUTH_IP', default='30/min'),
+        'auth_username': os.getenv(
+            'THROTTLE_AUTH_USERNAME', default='10/hour'
+        ),
+        'reviews': os.getenv('THROTTLE_REVIEWS', default='30/hour'),
+        'comments': os.getenv('THROTTLE_COMMENTS', default='60/hour'),
+    },
 }
 
+# Кэш состояния throttling, общий для всех процессов (см. README);
+# без DEBUG кэш процесса (locmem) не допускается.
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+# Байесовская оценка произведения (titles/top/): средняя, сглаженная
+# к PRIOR_MEAN весом PRIOR_WEIGHT оценок. После изменения -
+# python manage.py rebuild_ratings.
+TITLE_RATING = {
+    'PRIOR_MEAN': float(os.getenv('TITLE_RATING_PRIOR_MEAN', default=6.0)),
+    'PRIOR_WEIGHT': int(os.getenv('TITLE_RATING_PRIOR_WEIGHT', default=5)),
+    'TOP_MIN_REVIEWS': int(os.getenv('TITLE_TOP_MIN_REVIEWS', default=1)),
+}
+
+# Размер пачки курсора и блока ответа потоковой выгрузки /api/v1/export/.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', default=2000))
+
+# Наибольшее число объектов в одном запросе к .../batch/.
+API_BATCH_MAX_SIZE = int(os.getenv('API_BATCH_MAX_SIZE', default=1000))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'UPDATE_LAST_LOGIN': bool(int(os.getenv('JWT_UPDATE_LAST_LOGIN', default=0))),
+}
+
+# Отложенная запись last_login при выдаче токена (users.last_login):
+# last_login в БД отстаёт не больше чем на INTERVAL секунд.
+LAST_LOGIN_BUFFER = {
+    'INTERVAL': int(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', default=30)),
+    'MAX_SIZE': int(os.getenv('LAST_LOGIN_BUFFER_SIZE', default=1000)),
+}
+
+# Кэш пользователей users.auth.CachedJWTAuthentication в каждом процессе.
+# TTL - наибольшая задержка, с которой другие процессы увидят смену роли.
+AUTH_USER_CACHE = {
+    'MAX_SIZE': int(os.getenv('AUTH_USER_CACHE_MAX_SIZE', default=10000)),
+    'TTL': int(os.getenv('AUTH_USER_CACHE_TTL', default=60)),
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 DEFAULT_FROM_EMAIL = 'admin@yamdb.org'
 
+# Очередь писем, отправляемых командой send_email_outbox.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    # Задержка перед повтором, с; удваивается после каждой неудачи.
+    'RETRY_BACKOFF': 30,
+}
+
 AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend',
     'users.auth.Backend',
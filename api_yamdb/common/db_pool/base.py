@@ -0,0 +1,89 @@
+from functools import partial
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from .pool import ConnectionPool, PoolTimeoutError, get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Берёт соединения из пула процесса вместо открытия новых.
+
+    Django закрывает соединение в конце запроса (CONN_MAX_AGE = 0),
+    и оно возвращается в пул. В пул не возвращаются соединения после
+    ошибок БД (кроме IntegrityError и DataError), закрытые внутри
+    транзакции и не прошедшие pool_reusable(). Настройки пула - ключ
+    POOL в настройках базы.
+    """
+
+    pool_discard = False
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get("POOL", {})
+        key = (self.alias, repr(sorted(conn_params.items())))
+        return get_pool(key, partial(
+            ConnectionPool,
+            self.alias,
+            max_size=options.get("MAX_SIZE", 10),
+            max_age=options.get("MAX_AGE"),
+            timeout=options.get("TIMEOUT", 10),
+            check_idle=options.get("CHECK_IDLE", 0),
+        ))
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        try:
+            return self.pool.acquire(
+                partial(super().get_new_connection, conn_params),
+                check=self.pool_check,
+            )
+        except PoolTimeoutError as error:
+            raise self.Database.OperationalError(str(error)) from error
+
+    def pool_check(self, connection):
+        """Проверка свободного соединения перед выдачей."""
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def pool_reusable(self, connection):
+        """Можно ли вернуть соединение в пул."""
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        # Django сбрасывает errors_occurred, если соединение отвечает;
+        # в пул такое соединение всё равно не возвращается.
+        if self.connection is not None and self.errors_occurred:
+            self.pool_discard = True
+        super().close_if_unusable_or_obsolete()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not (
+            self.pool_discard
+            or self.errors_occurred
+            or self.in_atomic_block
+            or not self.pool_reusable(self.connection)
+        )
+        self.pool_discard = False
+        with self.wrap_database_errors:
+            self.pool.release(self.connection, reusable=reusable)
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений: ENGINE = "common.db_pool"."""
+
+    def pool_reusable(self, connection):
+        return (
+            not connection.closed
+            and connection.autocommit
+            and connection.status == extensions.STATUS_READY
+        )
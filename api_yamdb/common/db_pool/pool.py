@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Счётчики пула; остальные значения stats() - текущее состояние процесса.
+COUNTERS = ("checkouts", "wait_seconds", "timeouts", "created", "closed")
+GAUGES = ("in_use", "idle", "max_size")
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Соединения пулов процесса-родителя. Закрывать их после fork нельзя:
+# сокет общий, и закрытие оборвёт сессию родителя. Ссылки держатся,
+# чтобы соединения не закрыл сборщик мусора.
+_inherited = []
+
+
+class PoolTimeoutError(Exception):
+    """Соединение не освободилось за отведённое время."""
+
+
+class ConnectionPool:
+    """
+    Пул соединений с БД одного процесса.
+
+    Соединений, выданных и свободных, не больше max_size; если все заняты,
+    acquire() ждёт освобождения не дольше timeout секунд. Свободное
+    соединение при выдаче закрывается, если оно старше max_age секунд,
+    и проверяется вызовом check, если простаивало дольше check_idle
+    секунд; непрошедшее проверку заменяется новым. Соединение, которое
+    вернули с reusable=False, закрывается.
+    """
+
+    def __init__(self, alias, max_size, max_age=None, timeout=10,
+                 check_idle=0):
+        self.alias = alias
+        self.max_size = max_size
+        self.max_age = max_age
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.pid = os.getpid()
+        self._cond = threading.Condition()
+        # (соединение, время создания, время возврата), последним
+        # выдаётся недавно возвращённое.
+        self._idle = deque()
+        self._created_at = {}
+        self._in_use = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def _reserve(self, deadline):
+        """Занимает место в пуле; свободное соединение или None."""
+        with self._cond:
+            while True:
+                if self._idle:
+                    self._in_use += 1
+                    return self._idle.pop()
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Нет свободного соединения с БД {self.alias} "
+                        f"за {self.timeout} с (размер пула {self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+    def _expired(self, created_at, now):
+        return self.max_age is not None and now - created_at >= self.max_age
+
+    def acquire(self, connect, check=None):
+        """
+        Выдаёт соединение: свободное, если оно годно, иначе новое от
+        connect(). Время ожидания включает проверку и создание.
+        """
+        started = time.monotonic()
+        idle = self._reserve(started + self.timeout)
+        try:
+            connection = None
+            if idle is not None:
+                connection, created_at, released_at = idle
+                now = time.monotonic()
+                if self._expired(created_at, now) or (
+                    check is not None
+                    and now - released_at >= self.check_idle
+                    and not check(connection)
+                ):
+                    self._close(connection)
+                    connection = None
+            if connection is None:
+                connection = connect()
+                created_at = time.monotonic()
+                with self._cond:
+                    self.counters["created"] += 1
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created_at[id(connection)] = created_at
+            self.counters["checkouts"] += 1
+            self.counters["wait_seconds"] += time.monotonic() - started
+        return connection
+
+    def release(self, connection, reusable=True):
+        """Возвращает соединение в пул или закрывает его."""
+        if os.getpid() != self.pid:
+            _inherited.append(connection)
+            return
+        now = time.monotonic()
+        with self._cond:
+            created_at = self._created_at.pop(id(connection), None)
+            if created_at is None:
+                # Соединение выдано не этим пулом.
+                reusable = False
+            else:
+                self._in_use -= 1
+                self._cond.notify()
+            if reusable and not self._expired(created_at, now):
+                self._idle.append((connection, created_at, now))
+                return
+        self._close(connection)
+
+    def _close(self, connection):
+        with self._cond:
+            self.counters["closed"] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Закрывает свободные соединения."""
+        with self._cond:
+            idle, self._idle = self._idle, deque()
+        for connection, _, _ in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self.counters,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+            }
+
+
+def get_pool(key, factory):
+    """
+    Пул процесса по ключу; создаётся вызовом factory().
+
+    После fork (воркеры gunicorn) пулы родителя забываются без закрытия
+    соединений, и процесс открывает свои.
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.pid != os.getpid():
+            _forget_inherited()
+            pool = None
+        if pool is None:
+            _pools[key] = factory()
+        return _pools[key]
+
+
+def _forget_inherited():
+    pid = os.getpid()
+    for key, pool in list(_pools.items()):
+        if pool.pid != pid:
+            _inherited.extend(connection for connection, _, _ in pool._idle)
+            del _pools[key]
+
+
+def pool_stats():
+    """Состояние пулов процесса: {alias: stats}."""
+    stats = {}
+    with _pools_lock:
+        pools = [
+            pool for pool in _pools.values() if pool.pid == os.getpid()
+        ]
+    for pool in pools:
+        total = stats.setdefault(
+            pool.alias, dict.fromkeys(COUNTERS + GAUGES, 0)
+        )
+        for name, value in pool.stats().items():
+            total[name] += value
+    return stats
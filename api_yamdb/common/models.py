@@ -8,3 +8,12 @@ class PubDateModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class UpdatedAtModel(models.Model):
+    """Абстрактная модель. Добавляет дату последнего изменения."""
+
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
+
+    class Meta:
+        abstract = True
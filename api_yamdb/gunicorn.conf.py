@@ -0,0 +1,9 @@
+import os
+import shutil
+
+
+def on_starting(server):
+    """Удаляет файлы метрик процессов предыдущего запуска."""
+    directory = os.getenv("METRICS_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -1,5 +1,25 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def setup_title_search(using, **kwargs):
+    """
+    Пересоздаёт триггеры FTS5 на SQLite: они теряются, когда миграция
+    пересоздаёт таблицу reviews_title.
+    """
+    from django.db import connections
+
+    from .search import setup_search
+
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        setup_search(connection)
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(setup_title_search, sender=self)
@@ -1,8 +1,36 @@
-from django_filters import CharFilter, FilterSet, ModelChoiceFilter
+from django.db.models import Case, IntegerField, Value, When
+from django_filters import (CharFilter, FilterSet, ModelChoiceFilter,
+                            OrderingFilter)
 
 from .models import Category, Genre, Title
 
 
+class TitleOrderingFilter(OrderingFilter):
+    """
+    Сортировка с id последним ключом в том же направлении, что и первый:
+    порядок однозначен, а индексы (<поле>, id) покрывают его целиком.
+
+    Без оценок rating_avg = 0, поэтому по убыванию рейтинга такие
+    произведения и так последние, а по возрастанию перед rating_avg
+    добавляется ключ "есть ли оценки".
+    """
+
+    unrated_last = Case(
+        When(review_count=0, then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if not value:
+            return qs
+        ordering = list(qs.query.order_by)
+        if "rating_avg" in ordering:
+            ordering.insert(ordering.index("rating_avg"), self.unrated_last)
+        return qs.order_by(*ordering, "-pk" if value[0][0] == "-" else "pk")
+
+
 class TitleFilter(FilterSet):
     category = ModelChoiceFilter(
         to_field_name='slug',
@@ -15,7 +43,18 @@ class TitleFilter(FilterSet):
     name = CharFilter(
         lookup_expr='icontains'
     )
+    search = CharFilter(method='filter_search')
+    ordering = TitleOrderingFilter(
+        fields=(
+            ('rating_avg', 'rating'),
+            ('year', 'year'),
+            ('review_count', 'review_count'),
+        )
+    )
 
     class Meta:
         model = Title
         fields = ('year',)
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
@@ -0,0 +1,28 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+from reviews.search import setup_search, teardown_search
+
+
+def forwards(apps, schema_editor):
+    setup_search(schema_editor.connection)
+
+
+def backwards(apps, schema_editor):
+    teardown_search(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_review_comment_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
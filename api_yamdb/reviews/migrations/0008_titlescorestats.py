@@ -0,0 +1,57 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def fill_score_stats(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    TitleScoreStats = apps.get_model('reviews', 'TitleScoreStats')
+    rows = (
+        Review.objects.annotate(month=TruncMonth('pub_date'))
+        .values('title_id', 'month', 'score')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    TitleScoreStats.objects.bulk_create(
+        (
+            TitleScoreStats(
+                title_id=row['title_id'],
+                month=timezone.localtime(row['month']).date(),
+                score=row['score'],
+                count=row['count'],
+            )
+            for row in rows
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleScoreStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='Оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество рецензий')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_stats', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Статистика оценок',
+                'verbose_name_plural': 'Статистика оценок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlescorestats',
+            constraint=models.UniqueConstraint(fields=('title', 'month', 'score'), name='unique_title_month_score'),
+        ),
+        migrations.RunPython(fill_score_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_rating_fields(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    prior_mean = settings.TITLE_RATING['PRIOR_MEAN']
+    prior_weight = settings.TITLE_RATING['PRIOR_WEIGHT']
+    total = Cast(F('rating_sum'), FloatField())
+    Title.objects.update(
+        rating_avg=Coalesce(
+            ExpressionWrapper(
+                total / NullIf(F('review_count'), 0),
+                output_field=FloatField(),
+            ),
+            0.0,
+        ),
+        rating_weighted=Coalesce(
+            ExpressionWrapper(
+                (total + prior_mean * prior_weight)
+                / NullIf(F('review_count') + prior_weight, 0),
+                output_field=FloatField(),
+            ),
+            0.0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_titlescorestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False, help_text='0 у произведений без рецензий', verbose_name='Средняя оценка'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_weighted',
+            field=models.FloatField(default=0, editable=False, verbose_name='Байесовская оценка'),
+        ),
+        migrations.RunPython(fill_rating_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_avg', 'id'], name='title_rating_avg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_weighted', 'id'], name='title_rating_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'rating_weighted', 'id'], name='title_category_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['review_count', 'id'], name='title_review_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_idx'),
+        ),
+    ]
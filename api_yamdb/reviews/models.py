@@ -1,6 +1,11 @@
-from common.models import PubDateModel
+from common.models import PubDateModel, UpdatedAtModel
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf, TruncMonth
 from django.utils import timezone
 from users.models import User
 
@@ -15,6 +20,9 @@ class Category(models.Model):
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
         ordering = ("name",)
+        indexes = [
+            models.Index(fields=["name"], name="category_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -30,12 +38,102 @@ class Genre(models.Model):
         verbose_name = "Жанр"
         verbose_name_plural = "Жанры"
         ordering = ("name",)
+        indexes = [
+            models.Index(fields=["name"], name="genre_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Title(models.Model):
+def rating_fields(total, count):
+    """
+    Выражения средней и байесовской оценок для UPDATE по выражениям суммы
+    total и числа count оценок.
+
+    Оценки хранятся в полях произведения, чтобы сортировка по ним шла
+    по индексу. Байесовская оценка сглаживает среднюю к
+    TITLE_RATING["PRIOR_MEAN"] так, будто у произведения есть ещё
+    TITLE_RATING["PRIOR_WEIGHT"] таких оценок.
+    """
+    prior_mean = settings.TITLE_RATING["PRIOR_MEAN"]
+    prior_weight = settings.TITLE_RATING["PRIOR_WEIGHT"]
+    total = Cast(total, FloatField())
+    return {
+        "rating_avg": Coalesce(
+            ExpressionWrapper(
+                total / NullIf(count, 0), output_field=FloatField()
+            ),
+            0.0,
+        ),
+        "rating_weighted": Coalesce(
+            ExpressionWrapper(
+                (total + prior_mean * prior_weight)
+                / NullIf(count + prior_weight, 0),
+                output_field=FloatField(),
+            ),
+            0.0,
+        ),
+    }
+
+
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений."""
+
+    def rebuild_rating(self):
+        """
+        Пересчитывает сумму оценок и число рецензий по таблице Review,
+        затем среднюю и байесовскую оценки.
+        """
+        reviews = Review.objects.filter(
+            title=OuterRef("pk")
+        ).order_by().values("title")
+        self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum("score")).values("total")),
+                0,
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(total=Count("pk")).values("total")),
+                0,
+            ),
+        )
+        return self.update(
+            **rating_fields(F("rating_sum"), F("review_count"))
+        )
+
+    def rebuild_stats(self):
+        """
+        Пересчитывает распределение оценок по месяцам (TitleScoreStats)
+        одним сгруппированным запросом к таблице Review.
+        """
+        titles = self.values("pk")
+        TitleScoreStats.objects.filter(title__in=titles).delete()
+        rows = (
+            Review.objects.filter(title__in=titles)
+            .annotate(month=TruncMonth("pub_date"))
+            .values("title_id", "month", "score")
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+        return TitleScoreStats.objects.bulk_create(
+            TitleScoreStats(
+                title_id=row["title_id"],
+                month=TitleScoreStats.month_of(row["month"]),
+                score=row["score"],
+                count=row["count"],
+            )
+            for row in rows
+        )
+
+    def search(self, value):
+        """Полнотекстовый поиск по названию и описанию с ранжированием."""
+        from .search import search_titles
+
+        return search_titles(self, value)
+
+
+class Title(UpdatedAtModel):
     """
     Модель для произведений, к которым пишут рецензии
     (определённый фильм, книга или песня).
@@ -66,14 +164,74 @@ class Title(models.Model):
         verbose_name="Жанр",
         help_text="Жанры произведения",
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Сумма оценок",
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество рецензий",
+    )
+    rating_avg = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name="Средняя оценка",
+        help_text="0 у произведений без рецензий",
+    )
+    rating_weighted = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name="Байесовская оценка",
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name="Поисковый вектор",
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
+        indexes = [
+            models.Index(
+                fields=["rating_avg", "id"], name="title_rating_avg_idx"
+            ),
+            models.Index(
+                fields=["rating_weighted", "id"],
+                name="title_rating_weighted_idx",
+            ),
+            models.Index(
+                fields=["category", "rating_weighted", "id"],
+                name="title_category_weighted_idx",
+            ),
+            models.Index(
+                fields=["review_count", "id"], name="title_review_count_idx"
+            ),
+            models.Index(fields=["year", "id"], name="title_year_idx"),
+            # TitleFilter: ?year=&category= в порядке id.
+            models.Index(
+                fields=["category", "year", "id"],
+                name="title_category_year_idx",
+            ),
+            models.Index(
+                fields=["updated_at", "id"], name="title_updated_at_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка произведения по сохранённым агрегатам."""
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
 
 class TitleGenre(models.Model):
     """Модель связей произведений (Titles) с жанрами (Genres)."""
@@ -94,12 +252,18 @@ class TitleGenre(models.Model):
                 fields=["title", "genre"],
             ),
         ]
+        indexes = [
+            # TitleFilter: ?genre= в порядке id произведения.
+            models.Index(
+                fields=["genre", "title"], name="titlegenre_genre_title_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title.name} - {self.genre.name}"
 
 
-class Review(PubDateModel):
+class Review(PubDateModel, UpdatedAtModel):
     """Модель для рецензий."""
 
     title = models.ForeignKey(
@@ -134,12 +298,29 @@ class Review(PubDateModel):
                 name="unique review per title"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["title", "pub_date", "id"],
+                name="review_title_pub_date_idx",
+            ),
+            models.Index(
+                fields=["updated_at", "id"], name="review_updated_at_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет рецензию в транзакции, чтобы агрегаты рейтинга
+        произведения (см. reviews.signals) менялись вместе с ней.
+        """
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
 
-class Comment(PubDateModel):
+
+class Comment(PubDateModel, UpdatedAtModel):
     """Модель для комментариев."""
 
     review = models.ForeignKey(
@@ -163,6 +344,57 @@ class Comment(PubDateModel):
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
         ordering = ("-pub_date",)
+        indexes = [
+            models.Index(
+                fields=["review", "pub_date", "id"],
+                name="comment_review_pub_date_idx",
+            ),
+            models.Index(
+                fields=["updated_at", "id"], name="comment_updated_at_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class TitleScoreStats(models.Model):
+    """
+    Число рецензий произведения с оценкой score за месяц month.
+
+    Распределение оценок и средняя оценка по месяцам складываются из этих
+    строк без группировки таблицы Review. Строки обновляются сигналами
+    при изменении рецензий (см. reviews.signals).
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name="score_stats",
+        verbose_name="Произведение",
+    )
+    month = models.DateField(verbose_name="Месяц")
+    score = models.PositiveSmallIntegerField(verbose_name="Оценка")
+    count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество рецензий"
+    )
+
+    class Meta:
+        verbose_name = "Статистика оценок"
+        verbose_name_plural = "Статистика оценок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["title", "month", "score"],
+                name="unique_title_month_score",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.title_id} {self.month:%Y-%m} {self.score}: {self.count}"
+
+    @staticmethod
+    def month_of(value):
+        """Первое число месяца даты публикации в текущем часовом поясе."""
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date().replace(day=1)
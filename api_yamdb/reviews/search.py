@@ -0,0 +1,151 @@
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connections
+from django.db.models import F, Q
+
+SEARCH_CONFIG = "russian"
+
+POSTGRESQL_SETUP = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE OR REPLACE FUNCTION reviews_title_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector('{SEARCH_CONFIG}',
+                                     coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS reviews_title_search_vector_trigger "
+    "ON reviews_title",
+    """
+    CREATE TRIGGER reviews_title_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector_update()
+    """,
+    "UPDATE reviews_title SET name = name",
+    "CREATE INDEX IF NOT EXISTS reviews_title_search_vector_idx "
+    "ON reviews_title USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS reviews_title_name_trgm_idx "
+    "ON reviews_title USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS reviews_title_description_trgm_idx "
+    "ON reviews_title USING gin (description gin_trgm_ops)",
+)
+
+POSTGRESQL_TEARDOWN = (
+    "DROP INDEX IF EXISTS reviews_title_description_trgm_idx",
+    "DROP INDEX IF EXISTS reviews_title_name_trgm_idx",
+    "DROP INDEX IF EXISTS reviews_title_search_vector_idx",
+    "DROP TRIGGER IF EXISTS reviews_title_search_vector_trigger "
+    "ON reviews_title",
+    "DROP FUNCTION IF EXISTS reviews_title_search_vector_update()",
+)
+
+SQLITE_SETUP = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5(
+        name, description, content='reviews_title', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert
+    AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete
+    AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+)
+
+SQLITE_TEARDOWN = (
+    "DROP TRIGGER IF EXISTS reviews_title_fts_update",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_delete",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_insert",
+    "DROP TABLE IF EXISTS reviews_title_fts",
+)
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def setup_search(connection):
+    """
+    Создаёт триггеры и индексы поиска (повторный вызов безопасен).
+
+    PostgreSQL: столбец search_vector поддерживается триггером, поиск идёт
+    по GIN-индексу tsvector и trigram GIN-индексам name и description.
+    SQLite: внешняя FTS5-таблица reviews_title_fts, синхронизируемая
+    триггерами, - для локальной разработки и тестов.
+    """
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRESQL_SETUP)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_SETUP)
+
+
+def teardown_search(connection):
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRESQL_TEARDOWN)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_TEARDOWN)
+
+
+def search_titles(queryset, value):
+    """Отбирает произведения по запросу и сортирует по релевантности."""
+    words = re.findall(r"\w+", value)
+    if not words:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        query = SearchQuery(value, config=SEARCH_CONFIG)
+        return queryset.annotate(
+            rank=SearchRank(F("search_vector"), query)
+            + TrigramSimilarity("name", value)
+        ).filter(
+            Q(search_vector=query)
+            | Q(name__trigram_similar=value)
+            | Q(description__trigram_similar=value)
+        ).order_by("-rank", "pk")
+    if vendor == "sqlite":
+        return queryset.extra(
+            tables=["reviews_title_fts"],
+            where=[
+                "reviews_title_fts.rowid = reviews_title.id",
+                "reviews_title_fts MATCH %s",
+            ],
+            params=[" ".join(f'"{word}"*' for word in words)],
+            select={"rank": "-bm25(reviews_title_fts, 10.0, 1.0)"},
+        ).order_by("-rank", "pk")
+
+    query = Q()
+    for word in words:
+        query &= Q(name__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(query)
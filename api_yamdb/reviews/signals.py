@@ -0,0 +1,138 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from .models import (Category, Genre, Review, Title, TitleScoreStats,
+                     rating_fields)
+
+
+def shift_title_rating(title_id, score, count):
+    """Атомарно сдвигает агрегаты рейтинга произведения."""
+    total = F("rating_sum") + score
+    reviews = F("review_count") + count
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=total,
+        review_count=reviews,
+        updated_at=Now(),
+        **rating_fields(total, reviews),
+    )
+
+
+def shift_title_stats(title_id, changes):
+    """
+    Атомарно сдвигает статистику оценок произведения:
+    changes - {(месяц, оценка): сдвиг числа рецензий}.
+
+    Существующие строки меняются одним UPDATE, недостающие создаются
+    одним INSERT и только при увеличении: уменьшение приходит и при
+    каскадном удалении произведения вместе с его статистикой.
+    """
+    changes = {key: count for key, count in changes.items() if count}
+    if not changes:
+        return
+    rows = list(
+        TitleScoreStats.objects.select_for_update().filter(
+            title_id=title_id,
+            month__in={month for month, _ in changes},
+            score__in={score for _, score in changes},
+        )
+    )
+    for row in rows:
+        row.count = F("count") + changes.pop((row.month, row.score), 0)
+    TitleScoreStats.objects.bulk_update(rows, ["count"])
+    missing = [
+        TitleScoreStats(title_id=title_id, month=month, score=score,
+                        count=count)
+        for (month, score), count in changes.items() if count > 0
+    ]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            TitleScoreStats.objects.bulk_create(missing)
+    except IntegrityError:
+        # Строку одновременно создала другая транзакция.
+        shift_title_stats(title_id, {
+            (row.month, row.score): row.count for row in missing
+        })
+
+
+@receiver(pre_save, sender=Review)
+def review_lock_previous(sender, instance, using, **kwargs):
+    """
+    Блокирует строку изменяемой рецензии и запоминает её прежние
+    произведение, оценку и дату публикации.
+    """
+    instance._rating_previous = None
+    if instance.pk is not None:
+        instance._rating_previous = (
+            Review.objects.using(using)
+            .select_for_update()
+            .filter(pk=instance.pk)
+            .values_list("title_id", "score", "pub_date")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, **kwargs):
+    """Учитывает созданную или изменённую рецензию в рейтинге."""
+    previous = getattr(instance, "_rating_previous", None)
+    instance._rating_previous = None
+    month = TitleScoreStats.month_of(instance.pub_date)
+    if previous is None:
+        shift_title_rating(instance.title_id, instance.score, 1)
+        shift_title_stats(instance.title_id, {(month, instance.score): 1})
+        return
+    title_id, score, pub_date = previous
+    previous_month = TitleScoreStats.month_of(pub_date)
+    if (title_id, previous_month, score) != (
+        instance.title_id, month, instance.score
+    ):
+        shift_title_stats(title_id, {(previous_month, score): -1})
+        shift_title_stats(instance.title_id, {(month, instance.score): 1})
+    if title_id == instance.title_id:
+        if score != instance.score:
+            shift_title_rating(title_id, instance.score - score, 0)
+        return
+    shift_title_rating(title_id, -score, -1)
+    shift_title_rating(instance.title_id, instance.score, 1)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает удалённую рецензию (в том числе каскадно) из рейтинга."""
+    shift_title_rating(instance.title_id, -instance.score, -1)
+    month = TitleScoreStats.month_of(instance.pub_date)
+    shift_title_stats(instance.title_id, {(month, instance.score): -1})
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Отмечает изменение произведений при изменении их жанров."""
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        Title.objects.filter(pk=instance.pk).update(updated_at=Now())
+    elif pk_set:
+        Title.objects.filter(pk__in=pk_set).update(updated_at=Now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, created=False, **kwargs):
+    """Категория входит в выгрузку произведений (api.export)."""
+    if not created:
+        Title.objects.filter(category=instance).update(updated_at=Now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, created=False, **kwargs):
+    """Жанры входят в выгрузку произведений (api.export)."""
+    if not created:
+        Title.objects.filter(genre=instance).update(updated_at=Now())
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import EmailOutbox, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -15,3 +15,18 @@ class UserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(User, UserAdmin)
+
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = [
+        'recipient',
+        'subject',
+        'created_at',
+        'sent_at',
+        'attempts',
+        'next_attempt_at',
+    ]
+    list_filter = ['sent_at']
+
+
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
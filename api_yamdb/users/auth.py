@@ -1,8 +1,23 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
 
 from .exceptions import ConfirmationCodeIsIncorrectError, UserNotFound
 from .models import User
 
+ROLE_CLAIM = "role"
+SUPERUSER_CLAIM = "is_superuser"
+TOKEN_VERSION_CLAIM = "ver"
+
 
 class Backend(ModelBackend):
     """Класс процедуры аутентификации."""
@@ -38,3 +53,92 @@ class Backend(ModelBackend):
         except User.DoesNotExist:
             return None
         return user if self.user_can_authenticate(user) else None
+
+
+class UserCache:
+    """
+    Ограниченный LRU-кэш пользователей процесса с временем жизни записей.
+
+    Запись хранит версию токенов пользователя (User.token_version) и
+    выдаётся только токену с той же версией. get возвращает копию:
+    запросы в разных потоках не делят один объект пользователя.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            entry_version, expires, user = entry
+            if entry_version != version or expires < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return copy.deepcopy(user)
+
+    def set(self, user_id, version, user):
+        with self._lock:
+            self._users[user_id] = (
+                version, time.monotonic() + self.ttl, user
+            )
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    max_size=settings.AUTH_USER_CACHE["MAX_SIZE"],
+    ttl=settings.AUTH_USER_CACHE["TTL"],
+)
+
+
+def get_token_claims(user):
+    """Дополнительные claims токена: роль и версия токенов."""
+    return {
+        ROLE_CLAIM: user.role,
+        SUPERUSER_CLAIM: user.is_superuser,
+        TOKEN_VERSION_CLAIM: user.token_version,
+    }
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без запроса к БД для пользователя из кэша.
+
+    Пользователь загружается из БД только при промахе user_cache.
+    Токен, выпущенный до смены роли, is_active или is_superuser
+    (а значит, с устаревшим claim "ver"), отклоняется.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            if user.token_version != version:
+                raise AuthenticationFailed(
+                    _("Token is outdated"), code="token_outdated"
+                )
+            user_cache.set(user_id, version, user)
+        return user
@@ -0,0 +1,110 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Отложенная запись User.last_login: время входа копится в памяти
+    процесса (последнее на пользователя) и пишется одним bulk UPDATE.
+
+    Сброс - в потоке таймера: через interval секунд после первой записи
+    в пустой буфер, сразу при max_size пользователях в буфере и при
+    завершении процесса. Поэтому last_login в БД отстаёт не больше чем на
+    interval секунд (плюс время самого UPDATE), а выдача токена не ждёт
+    записи и не падает из-за ошибки БД. Неудачный сброс возвращает
+    значения в буфер и повторяется через interval секунд; при аварийном
+    завершении процесса несброшенные значения теряются.
+    """
+
+    def __init__(self, interval, max_size):
+        self.interval = interval
+        self.max_size = max_size
+        self._pending = {}
+        self._timer = None
+        self._retrying = False
+        self._lock = threading.Lock()
+
+    def touch(self, user_id, when):
+        with self._lock:
+            self._merge({user_id: when})
+            if len(self._pending) >= self.max_size and not self._retrying:
+                self._schedule(0)
+            elif self._timer is None:
+                self._schedule(self.interval)
+
+    def flush(self):
+        """Пишет буфер в БД; возвращает число обновлённых пользователей."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        if not pending:
+            return 0
+        try:
+            User.objects.bulk_update(
+                [
+                    User(pk=user_id, last_login=pending[user_id])
+                    for user_id in sorted(pending)
+                ],
+                ["last_login"],
+            )
+        except Exception:
+            # Не теряем значения: они уйдут с повторным сбросом.
+            with self._lock:
+                self._merge(pending)
+                self._retrying = True
+                self._schedule(self.interval)
+            raise
+        self._retrying = False
+        return len(pending)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _merge(self, logins):
+        for user_id, when in logins.items():
+            current = self._pending.get(user_id)
+            if current is None or when > current:
+                self._pending[user_id] = when
+
+    def _schedule(self, delay):
+        """Под self._lock: сброс через delay секунд, если не назначен ранее."""
+        if self._timer is not None:
+            if self._timer.interval <= delay:
+                return
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._flush_later)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_later(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Не удалось записать last_login")
+        finally:
+            # Соединения потока таймера не переиспользуются.
+            connections.close_all()
+
+
+last_login_buffer = LastLoginBuffer(
+    interval=settings.LAST_LOGIN_BUFFER["INTERVAL"],
+    max_size=settings.LAST_LOGIN_BUFFER["MAX_SIZE"],
+)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        last_login_buffer.flush()
+    except Exception:
+        logger.exception("Не удалось записать last_login")
@@ -1,10 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, send_mail
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
     """Модель пользователя User."""
+    # Изменение этих полей отзывает выданные пользователю токены.
+    TOKEN_FIELDS = ("role", "is_active", "is_superuser", "is_staff")
+
     USER = "user"
     MODERATOR = "moderator"
     ADMIN = "admin"
@@ -35,6 +42,11 @@ class User(AbstractUser):
         blank=True,
         max_length=10,
     )
+    token_version = models.PositiveIntegerField(
+        "Версия токенов",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Пользователь"
@@ -52,6 +64,15 @@ class User(AbstractUser):
                 fail_silently=True,
             )
 
+    def queue_confirmation_code(self):
+        """Поставить письмо с кодом подтверждения в очередь отправки."""
+        if self.email and self.confirmation_code:
+            EmailOutbox.objects.create(
+                subject="API YamDb confirmation code",
+                body=f"confirmation_code: {self.confirmation_code}",
+                recipient=self.email,
+            )
+
     def check_confirmation_code(self, confirmation_code):
         """Проверить код подтверждения."""
         return (
@@ -69,3 +90,52 @@ class User(AbstractUser):
     def is_moderator(self):
         """Проверяет - является ли пользователь модератором."""
         return self.role == User.MODERATOR
+
+
+class EmailOutbox(models.Model):
+    """Очередь исходящих писем, отправляемых командой send_email_outbox."""
+
+    subject = models.CharField("Тема", max_length=255)
+    body = models.TextField("Текст")
+    recipient = models.EmailField("Получатель")
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        "Следующая попытка", null=True, blank=True, default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    sent_at = models.DateTimeField("Отправлено", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                name="email_outbox_pending_idx",
+                condition=models.Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
+
+    def as_email(self):
+        return EmailMessage(
+            subject=self.subject, body=self.body, to=[self.recipient]
+        )
+
+    def schedule_retry(self, error):
+        """
+        Откладывает письмо с экспоненциальной задержкой; после
+        EMAIL_OUTBOX["MAX_ATTEMPTS"] попыток письмо больше не выбирается.
+        """
+        options = settings.EMAIL_OUTBOX
+        self.attempts += 1
+        self.last_error = repr(error)
+        if self.attempts >= options["MAX_ATTEMPTS"]:
+            self.next_attempt_at = None
+        else:
+            self.next_attempt_at = timezone.now() + timedelta(
+                seconds=options["RETRY_BACKOFF"] * 2 ** (self.attempts - 1)
+            )
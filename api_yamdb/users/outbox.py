@@ -0,0 +1,127 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def send_batch(batch_size=None):
+    """
+    Отправляет одну пачку готовых к отправке писем через одно соединение
+    с почтовым бэкендом. Возвращает (отправлено, отложено).
+
+    Если соединение не открылось, вся пачка откладывается с backoff,
+    как при ошибке отправки отдельного письма.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX["BATCH_SIZE"]
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True, next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        sent = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as error:
+            for message in batch:
+                message.schedule_retry(error)
+        else:
+            try:
+                for message in batch:
+                    try:
+                        connection.send_messages([message.as_email()])
+                    except Exception as error:
+                        message.schedule_retry(error)
+                    else:
+                        message.sent_at = timezone.now()
+                        sent += 1
+            finally:
+                _close(connection)
+        EmailOutbox.objects.bulk_update(
+            batch, ["sent_at", "attempts", "next_attempt_at", "last_error"]
+        )
+    return sent, len(batch) - sent
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        # Письма уже отправлены: ошибка закрытия не должна их откатить.
+        logger.exception("Не удалось закрыть соединение с почтовым сервером")
+
+
+def drain(batch_size=None):
+    """Отправляет пачки, пока в очереди есть готовые письма."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = send_batch(batch_size)
+        if not sent and not failed:
+            return total_sent, total_failed
+        total_sent += sent
+        total_failed += failed
+
+
+def get_stats(latency_window=1000):
+    """
+    Глубина очереди и задержка отправки (от постановки в очередь до
+    отправки) по последним latency_window письмам, в секундах.
+    """
+    pending = EmailOutbox.objects.filter(sent_at__isnull=True)
+    oldest = pending.filter(next_attempt_at__isnull=False).aggregate(
+        oldest=Min("created_at")
+    )["oldest"]
+    latencies = sorted(
+        (sent_at - created_at).total_seconds()
+        for created_at, sent_at in EmailOutbox.objects.filter(
+            sent_at__isnull=False
+        ).order_by("-sent_at").values_list(
+            "created_at", "sent_at"
+        )[:latency_window]
+    )
+    return {
+        "pending": pending.filter(next_attempt_at__isnull=False).count(),
+        "dead": pending.filter(next_attempt_at__isnull=True).count(),
+        "oldest_pending_age": (
+            (timezone.now() - oldest).total_seconds() if oldest else 0
+        ),
+        "latency_avg": (
+            sum(latencies) / len(latencies) if latencies else 0
+        ),
+        "latency_p95": (
+            latencies[int(len(latencies) * 0.95)] if latencies else 0
+        ),
+    }
+
+
+def run_worker(interval, batch_size=None, stdout=None):
+    """
+    Бесконечно отправляет очередь, засыпая на interval секунд. Ошибка
+    прохода (например, недоступна БД) пишется в лог и не останавливает
+    воркер.
+    """
+    while True:
+        started = time.monotonic()
+        try:
+            sent, failed = drain(batch_size)
+        except Exception:
+            logger.exception("Не удалось отправить очередь писем")
+            sent = failed = 0
+        if stdout and (sent or failed):
+            stdout.write(
+                f"Отправлено {sent}, отложено {failed} "
+                f"за {time.monotonic() - started:.2f} с"
+            )
+        time.sleep(interval)
@@ -0,0 +1,43 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .auth import user_cache
+from .models import User
+
+
+@receiver(pre_save, sender=User)
+def user_check_token_fields(sender, instance, update_fields=None, **kwargs):
+    """Отмечает изменение полей, от которых зависят права по токену."""
+    instance._token_fields_changed = False
+    if instance.pk is None:
+        return
+    fields = User.TOKEN_FIELDS
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+        if not fields:
+            return
+    previous = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._token_fields_changed = previous is not None and any(
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def user_revoke_tokens(sender, instance, **kwargs):
+    """
+    Повышает версию токенов при смене прав и сбрасывает пользователя
+    из кэша при любом сохранении: username, email и прочие поля
+    закэшированного объекта не должны устаревать.
+    """
+    if getattr(instance, "_token_fields_changed", False):
+        User.objects.filter(pk=instance.pk).update(
+            token_version=F("token_version") + 1
+        )
+        instance.refresh_from_db(fields=["token_version"])
+    user_cache.evict(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
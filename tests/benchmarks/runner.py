@@ -0,0 +1,542 @@
+import json
+import os
+import statistics
+from collections import namedtuple
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BATCH_SIZE = 10
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+Scenario = namedtuple(
+    'Scenario', ('name', 'route', 'method', 'client', 'prepare', 'status')
+)
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def seed(titles, reviews, comments):
+    """
+    Заполняет БД: titles произведений, по reviews рецензий на каждое
+    и по comments комментариев к каждой рецензии.
+    """
+    from reviews.models import (Category, Comment, Genre, Review, Title,
+                                TitleGenre)
+    from users.models import User
+
+    admin = User.objects.create_user(
+        username='bench_admin', email='bench_admin@yamdb.fake', role='admin'
+    )
+    user = User.objects.create_user(
+        username='bench_user', email='bench_user@yamdb.fake',
+        confirmation_code='benchcode',
+    )
+    User.objects.bulk_create(
+        User(
+            username=f'bench_author_{i}', email=f'bench_author_{i}@yamdb.fake'
+        )
+        for i in range(max(reviews, 1))
+    )
+    authors = list(User.objects.filter(username__startswith='bench_author_'))
+
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}') for i in range(3)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(5)
+    )
+    categories = list(Category.objects.all())
+    genres = list(Genre.objects.all())
+
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {i}', year=1950 + i % 70,
+            description=f'Описание произведения {i}',
+            category=categories[i % len(categories)],
+        )
+        for i in range(titles)
+    )
+    title_list = list(Title.objects.order_by('pk'))
+    TitleGenre.objects.bulk_create(
+        TitleGenre(title=title, genre=genres[(i + shift) % len(genres)])
+        for i, title in enumerate(title_list) for shift in (0, 1)
+    )
+    Review.objects.bulk_create(
+        Review(
+            title=title, author=authors[j], text=f'Рецензия {j}',
+            score=1 + (i + j) % 10,
+        )
+        for i, title in enumerate(title_list) for j in range(reviews)
+    )
+    Comment.objects.bulk_create(
+        Comment(review=review, author=authors[k % len(authors)], text=str(k))
+        for review in Review.objects.all() for k in range(comments)
+    )
+    Title.objects.rebuild_rating()
+
+    title = title_list[0]
+    review = title.reviews.order_by('pk').first()
+    return {
+        'authors': [author.username for author in authors],
+        'admin': admin,
+        'user': user,
+        'title': title,
+        'review': review,
+        'comment': review.comments.order_by('pk').first() if review else None,
+    }
+
+
+def _create(model, **kwargs):
+    return model.objects.create(**kwargs)
+
+
+def _reviews_batch(data, i):
+    from reviews.models import Title
+
+    title = _create(
+        Title, name=f'Пачка {i}', year=2000, category=data['title'].category
+    )
+    return f'/api/v1/titles/{title.id}/reviews/batch/', [
+        {'author': username, 'text': 'Рецензия из пачки', 'score': 7}
+        for username in data['authors'][:BATCH_SIZE]
+    ]
+
+
+def scenarios():
+    """Сценарии нагрузки: хотя бы один на каждый маршрут api/urls.py."""
+    from reviews.models import Category, Genre
+
+    def reviews_url(data):
+        return f'/api/v1/titles/{data["title"].id}/reviews/'
+
+    def comments_url(data):
+        return f'{reviews_url(data)}{data["review"].id}/comments/'
+
+    def get(url):
+        return lambda data, i: (url(data) if callable(url) else url, None)
+
+    return [
+        Scenario('api-root', 'api-root', 'get', 'anon', get('/api/v1/'), 200),
+        Scenario(
+            'categories-list', 'categories-list', 'get', 'anon',
+            get('/api/v1/categories/'), 200,
+        ),
+        Scenario(
+            'categories-delete', 'categories-detail', 'delete', 'admin',
+            lambda data, i: (
+                '/api/v1/categories/{}/'.format(_create(
+                    Category, name='bench', slug=f'bench-category-{i}'
+                ).slug),
+                None,
+            ),
+            204,
+        ),
+        Scenario(
+            'genres-list', 'genres-list', 'get', 'anon',
+            get('/api/v1/genres/'), 200,
+        ),
+        Scenario(
+            'genres-delete', 'genres-detail', 'delete', 'admin',
+            lambda data, i: (
+                '/api/v1/genres/{}/'.format(_create(
+                    Genre, name='bench', slug=f'bench-genre-{i}'
+                ).slug),
+                None,
+            ),
+            204,
+        ),
+        Scenario(
+            'titles-list', 'titles-list', 'get', 'anon',
+            get('/api/v1/titles/'), 200,
+        ),
+        Scenario(
+            'titles-list-filtered', 'titles-list', 'get', 'anon',
+            get('/api/v1/titles/?genre=genre-1&category=category-1'), 200,
+        ),
+        Scenario(
+            'titles-search', 'titles-list', 'get', 'anon',
+            get('/api/v1/titles/?search=произведение'), 200,
+        ),
+        Scenario(
+            'titles-detail', 'titles-detail', 'get', 'anon',
+            get(lambda data: f'/api/v1/titles/{data["title"].id}/'), 200,
+        ),
+        Scenario(
+            'titles-ordered', 'titles-list', 'get', 'anon',
+            get('/api/v1/titles/?ordering=-rating'), 200,
+        ),
+        Scenario(
+            'titles-top', 'titles-top', 'get', 'anon',
+            get('/api/v1/titles/top/'), 200,
+        ),
+        Scenario(
+            'titles-top-genre', 'titles-top', 'get', 'anon',
+            get('/api/v1/titles/top/?genre=genre-1&min_reviews=5'), 200,
+        ),
+        Scenario(
+            'titles-stats', 'titles-stats', 'get', 'anon',
+            get(lambda data: f'/api/v1/titles/{data["title"].id}/stats/'),
+            200,
+        ),
+        Scenario(
+            'reviews-list', 'reviews-list', 'get', 'anon',
+            get(reviews_url), 200,
+        ),
+        Scenario(
+            'reviews-list-cursor', 'reviews-list', 'get', 'anon',
+            get(lambda data: reviews_url(data) + '?cursor='), 200,
+        ),
+        Scenario(
+            'reviews-detail', 'reviews-detail', 'get', 'anon',
+            get(lambda data: f'{reviews_url(data)}{data["review"].id}/'), 200,
+        ),
+        Scenario(
+            'reviews-batch', 'reviews-batch', 'post', 'admin',
+            _reviews_batch, 201,
+        ),
+        Scenario(
+            'comments-list', 'comments-list', 'get', 'anon',
+            get(comments_url), 200,
+        ),
+        Scenario(
+            'comments-detail', 'comments-detail', 'get', 'anon',
+            get(lambda data: f'{comments_url(data)}{data["comment"].id}/'),
+            200,
+        ),
+        Scenario(
+            'comments-batch', 'comments-batch', 'post', 'admin',
+            lambda data, i: (
+                comments_url(data) + 'batch/',
+                [{'text': f'Комментарий {j}'} for j in range(BATCH_SIZE)],
+            ),
+            201,
+        ),
+        Scenario(
+            'export', 'export', 'get', 'admin',
+            get('/api/v1/export/?include=reviews,comments'), 200,
+        ),
+        Scenario(
+            'export-gzip', 'export', 'get', 'admin',
+            get('/api/v1/export/?compression=gzip'), 200,
+        ),
+        Scenario(
+            'users-list', 'users-list', 'get', 'admin',
+            get('/api/v1/users/'), 200,
+        ),
+        Scenario(
+            'users-detail', 'users-detail', 'get', 'admin',
+            get(lambda data: f'/api/v1/users/{data["user"].username}/'), 200,
+        ),
+        Scenario(
+            'users-me', 'users-me', 'get', 'user',
+            get('/api/v1/users/me/'), 200,
+        ),
+        Scenario(
+            'signup', 'signup', 'post', 'anon',
+            lambda data, i: ('/api/v1/auth/signup/', {
+                'username': f'bench_signup_{i}',
+                'email': f'bench_signup_{i}@yamdb.fake',
+            }),
+            200,
+        ),
+        Scenario(
+            'token', 'token', 'post', 'anon',
+            lambda data, i: ('/api/v1/auth/token/', {
+                'username': data['user'].username,
+                'confirmation_code': data['user'].confirmation_code,
+            }),
+            200,
+        ),
+    ]
+
+
+def api_routes(patterns=None):
+    """Имена всех маршрутов api/urls.py."""
+    if patterns is None:
+        from api.urls import urlpatterns as patterns
+
+    names = set()
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            names |= api_routes(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_scenario(scenario, client, data, requests):
+    """
+    Выполняет сценарий requests раз после одного прогревочного запроса.
+    Кэш ответов и вёдра throttling очищаются перед каждым запросом:
+    измеряется путь без попадания в кэш и без ответов 429.
+    """
+    latencies, queries = [], []
+    for i in range(requests + 1):
+        url, payload = scenario.prepare(data, i)
+        cache.clear()
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as context:
+            started = perf_counter()
+            response = getattr(client, scenario.method)(
+                url, payload, format='json'
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = perf_counter() - started
+        assert response.status_code == scenario.status, (
+            f'{scenario.name}: {scenario.method.upper()} {url} вернул '
+            f'{response.status_code}, ожидался {scenario.status}'
+        )
+        if i:
+            latencies.append(elapsed)
+            queries.append(len(context.captured_queries))
+    return {
+        'requests': requests,
+        'rps': round(requests / sum(latencies), 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'queries': max(queries),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = {
+        name: {
+            'queries': result['queries'],
+            'p50_ms': result['p50_ms'],
+            'p95_ms': result['p95_ms'],
+        }
+        for name, result in sorted(results.items())
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, indent=2, ensure_ascii=False)
+        file.write('\n')
+
+
+def compare(results, baseline, latency_tolerance, latency_slack_ms):
+    """
+    Нарушения бюджета: больше запросов к БД, чем в baseline, или медиана
+    задержки больше baseline * latency_tolerance + latency_slack_ms.
+    Задержка сравнивается по медиане: p95 на десятках запросов - это
+    единичные выбросы (сборка мусора, соседние процессы), и тест
+    становился бы нестабильным.
+    """
+    failures = []
+    for name, result in sorted(results.items()):
+        budget = baseline.get(name)
+        if budget is None:
+            failures.append(f'{name}: нет бюджета в baseline.json')
+            continue
+        if result['queries'] > budget['queries']:
+            failures.append(
+                f'{name}: {result["queries"]} запросов к БД, '
+                f'бюджет {budget["queries"]}'
+            )
+        latency_budget = (
+            budget['p50_ms'] * latency_tolerance + latency_slack_ms
+        )
+        if result['p50_ms'] > latency_budget:
+            failures.append(
+                f'{name}: p50 {result["p50_ms"]} мс, '
+                f'бюджет {latency_budget:.2f} мс'
+            )
+    return failures
+
+
+def format_report(results):
+    lines = [
+        f'{"scenario":<24}{"rps":>10}{"p50 ms":>10}{"p95 ms":>10}'
+        f'{"queries":>9}'
+    ]
+    for name, result in sorted(results.items()):
+        lines.append(
+            f'{name:<24}{result["rps"]:>10}{result["p50_ms"]:>10}'
+            f'{result["p95_ms"]:>10}{result["queries"]:>9}'
+        )
+    return '\n'.join(lines)
+
+
+def serialization_cases(data):
+    """
+    Страницы list(): (имя, запрос, сериализатор, быстрый сериализатор)
+    для сравнения ModelSerializer с RowSerializer.
+    """
+    from api.serializers import (CommentRowSerializer, CommentsSerializer,
+                                 ReviewRowSerializer, ReviewsSerializer,
+                                 TitleRowSerializer, TitlesSerializer)
+    from reviews.models import Comment, Review, Title
+
+    return [
+        (
+            'titles',
+            Title.objects.select_related('category').prefetch_related(
+                'genre'
+            ).order_by('pk'),
+            TitlesSerializer, TitleRowSerializer,
+        ),
+        (
+            'reviews',
+            Review.objects.filter(title=data['title']).select_related(
+                'author'
+            ),
+            ReviewsSerializer, ReviewRowSerializer,
+        ),
+        (
+            'comments',
+            Comment.objects.filter(review=data['review']).select_related(
+                'author'
+            ),
+            CommentsSerializer, CommentRowSerializer,
+        ),
+    ]
+
+
+def measure_serialization(queryset, serializer_class, row_serializer_class,
+                          rounds):
+    """
+    Время чтения и сериализации одной строки, мкс: медиана по rounds
+    прогонам всего queryset обоими путями list().
+    """
+    def model_path():
+        return serializer_class(list(queryset.all()), many=True).data
+
+    def row_path():
+        serializer = row_serializer_class()
+        return serializer.to_representation(serializer.get_rows(queryset))
+
+    rows = queryset.count()
+    result = {'rows': rows}
+    for name, path in (('model_us', model_path), ('rows_us', row_path)):
+        timings = []
+        for _ in range(rounds + 1):
+            started = perf_counter()
+            path()
+            timings.append(perf_counter() - started)
+        result[name] = round(
+            statistics.median(timings[1:]) * 1_000_000 / max(rows, 1), 1
+        )
+    result['speedup'] = round(result['model_us'] / result['rows_us'], 2)
+    return result
+
+
+def format_serialization_report(results):
+    lines = [
+        f'{"list":<12}{"rows":>8}{"model us/row":>15}{"rows us/row":>14}'
+        f'{"speedup":>10}'
+    ]
+    for name, result in results.items():
+        lines.append(
+            f'{name:<12}{result["rows"]:>8}{result["model_us"]:>15}'
+            f'{result["rows_us"]:>14}{result["speedup"]:>10}'
+        )
+    return '\n'.join(lines)
+
+
+def measure_renderers(rounds):
+    """
+    Кодирование списка произведений (все строки одной страницей):
+    медиана времени, мкс, и размер ответа, байт, по рендерерам.
+    """
+    from api.renderers import JSONRenderer, MessagePackRenderer, msgpack
+    from api.serializers import TitleRowSerializer
+    from rest_framework import renderers
+    from reviews.models import Title
+
+    serializer = TitleRowSerializer()
+    data = {
+        'count': Title.objects.count(),
+        'next': None,
+        'previous': None,
+        'results': serializer.to_representation(
+            serializer.get_rows(Title.objects.order_by('pk'))
+        ),
+    }
+    candidates = {
+        'drf-json': renderers.JSONRenderer(),
+        'json': JSONRenderer(),
+    }
+    if msgpack is not None:
+        candidates['msgpack'] = MessagePackRenderer()
+    results = {}
+    for name, renderer in candidates.items():
+        timings = []
+        for _ in range(rounds + 1):
+            started = perf_counter()
+            content = renderer.render(data, renderer.media_type, {})
+            timings.append(perf_counter() - started)
+        results[name] = {
+            'encode_us': round(statistics.median(timings[1:]) * 1_000_000, 1),
+            'bytes': len(content),
+            'content': content,
+        }
+    return results
+
+
+def format_renderer_report(results):
+    lines = [f'{"renderer":<12}{"encode us":>12}{"bytes":>10}']
+    for name, result in results.items():
+        lines.append(
+            f'{name:<12}{result["encode_us"]:>12}{result["bytes"]:>10}'
+        )
+    return '\n'.join(lines)
+
+
+def measure_compression(client, data, requests):
+    """
+    Размер ответа, байт, и медиана задержки, мс, списков произведений
+    и рецензий без сжатия, с gzip и brotli: промах кэша каталога
+    (сжатие при каждом запросе) и попадание (сжатые байты из кэша).
+    """
+    from api.compression import available
+
+    urls = {
+        'titles': '/api/v1/titles/',
+        'reviews': f'/api/v1/titles/{data["title"].pk}/reviews/',
+    }
+    results = {}
+    for name, url in urls.items():
+        for encoding in ('identity',) + available():
+            result = {}
+            for mode in ('miss', 'hit'):
+                latencies = []
+                for i in range(requests + 1):
+                    if mode == 'miss':
+                        cache.clear()
+                    started = perf_counter()
+                    response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+                    latencies.append(perf_counter() - started)
+                result[f'{mode}_ms'] = round(
+                    statistics.median(latencies[1:]) * 1000, 2
+                )
+            result['bytes'] = len(response.content)
+            results[f'{name} {encoding}'] = result
+    return results
+
+
+def format_compression_report(results):
+    lines = [f'{"response":<20}{"bytes":>10}{"miss ms":>10}{"hit ms":>10}']
+    for name, result in results.items():
+        lines.append(
+            f'{name:<20}{result["bytes"]:>10}{result["miss_ms"]:>10}'
+            f'{result["hit_ms"]:>10}'
+        )
+    return '\n'.join(lines)
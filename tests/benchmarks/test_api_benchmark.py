@@ -0,0 +1,113 @@
+import os
+
+import pytest
+from rest_framework.test import APIClient
+
+from tests.fixtures.fixture_data import _client_for
+
+from . import runner
+
+
+@pytest.mark.django_db
+class TestApiBenchmark:
+    """
+    Нагрузочный прогон API с бюджетами запросов к БД и задержки.
+
+    Размер данных и число запросов задаются переменными окружения
+    BENCH_TITLES, BENCH_REVIEWS, BENCH_COMMENTS, BENCH_REQUESTS;
+    BENCH_UPDATE_BASELINE=1 перезаписывает baseline.json.
+    """
+
+    def test_every_route_has_scenario(self):
+        covered = {scenario.route for scenario in runner.scenarios()}
+        missing = runner.api_routes() - covered
+        assert not missing, (
+            f'Добавьте сценарии бенчмарка для маршрутов: {sorted(missing)}'
+        )
+
+    def test_api_within_budget(self):
+        data = runner.seed(
+            titles=runner.env_int('BENCH_TITLES', 30),
+            reviews=runner.env_int('BENCH_REVIEWS', 12),
+            comments=runner.env_int('BENCH_COMMENTS', 12),
+        )
+        clients = {
+            'anon': APIClient(),
+            'user': _client_for(data['user']),
+            'admin': _client_for(data['admin']),
+        }
+        requests = runner.env_int('BENCH_REQUESTS', 10)
+        results = {
+            scenario.name: runner.run_scenario(
+                scenario, clients[scenario.client], data, requests
+            )
+            for scenario in runner.scenarios()
+        }
+        print('\n' + runner.format_report(results))
+
+        if os.getenv('BENCH_UPDATE_BASELINE'):
+            runner.save_baseline(results)
+            return
+        failures = runner.compare(
+            results,
+            runner.load_baseline(),
+            latency_tolerance=float(os.getenv('BENCH_LATENCY_TOLERANCE', 5)),
+            latency_slack_ms=float(os.getenv('BENCH_LATENCY_SLACK_MS', 25)),
+        )
+        assert not failures, 'Превышен бюджет:\n' + '\n'.join(failures)
+
+    def test_row_serializers_are_faster(self):
+        data = runner.seed(
+            titles=runner.env_int('BENCH_TITLES', 30),
+            reviews=runner.env_int('BENCH_REVIEWS', 12),
+            comments=runner.env_int('BENCH_COMMENTS', 12),
+        )
+        rounds = runner.env_int('BENCH_REQUESTS', 10)
+        results = {
+            name: runner.measure_serialization(
+                queryset, serializer_class, row_serializer_class, rounds
+            )
+            for name, queryset, serializer_class, row_serializer_class
+            in runner.serialization_cases(data)
+        }
+        print('\n' + runner.format_serialization_report(results))
+
+        slower = [name for name, result in results.items() if result['speedup'] <= 1]
+        assert not slower, (
+            f'Быстрая сериализация list() не быстрее ModelSerializer: {slower}'
+        )
+
+    def test_renderers(self):
+        from api.renderers import orjson
+
+        runner.seed(
+            titles=runner.env_int('BENCH_TITLES', 30),
+            reviews=runner.env_int('BENCH_REVIEWS', 12),
+            comments=runner.env_int('BENCH_COMMENTS', 12),
+        )
+        results = runner.measure_renderers(runner.env_int('BENCH_REQUESTS', 10))
+        print('\n' + runner.format_renderer_report(results))
+
+        assert results['json']['content'] == results['drf-json']['content'], (
+            'JSON-рендерер API должен выдавать те же байты, что JSONRenderer DRF'
+        )
+        if orjson is not None:
+            assert results['json']['encode_us'] < results['drf-json']['encode_us'], (
+                'JSON на orjson должен кодировать быстрее JSONRenderer DRF'
+            )
+
+    def test_compression(self):
+        data = runner.seed(
+            titles=runner.env_int('BENCH_TITLES', 30),
+            reviews=runner.env_int('BENCH_REVIEWS', 12),
+            comments=runner.env_int('BENCH_COMMENTS', 12),
+        )
+        results = runner.measure_compression(
+            APIClient(), data, runner.env_int('BENCH_REQUESTS', 10)
+        )
+        print('\n' + runner.format_compression_report(results))
+
+        for name in ('titles', 'reviews'):
+            assert results[f'{name} gzip']['bytes'] < results[f'{name} identity']['bytes'], (
+                f'Ответ {name} должен сжиматься gzip'
+            )
@@ -1,9 +1,56 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(
+    django_db_modify_db_settings_parallel_suffix,
+):
+    """
+    Тесты API работают с SQLite в памяти вместо PostgreSQL из settings.
+    replica - вторая база для тестов чтения с реплик.
+    """
+    from django.conf import settings
+    from django.db import connections
+
+    connections.__dict__.pop('databases', None)
+    connections._databases = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    }
+    # Создание тестовой базы записывает её имя в settings.DATABASES.
+    settings.DATABASES['replica'] = connections._databases['replica']
+    connections._connections = type(connections._connections)()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Каждый тест начинается с пустых кэшей."""
+    from django.conf import settings
+    from django.core.cache import caches
+    from users.auth import user_cache
+
+    def clear():
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        user_cache.clear()
+
+    clear()
+    yield
+    clear()
@@ -0,0 +1,111 @@
+import pytest
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='AnotherUser', email='anotheruser@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='testadmin@yamdb.fake', role='admin'
+    )
+
+
+def _client_for(user):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    return _client_for(user)
+
+
+@pytest.fixture
+def admin_client(admin):
+    return _client_for(admin)
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from reviews.models import Genre
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    from reviews.models import Title
+    title = Title.objects.create(
+        name='Побег из Шоушенка', year=1994, category=category,
+        description='Фильм о надежде',
+    )
+    title.genre.set(genres)
+    return title
+
+
+@pytest.fixture
+def make_titles(category, genres):
+    from reviews.models import Title, TitleGenre
+
+    def make(count):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {i}', year=2000, category=category)
+            for i in range(count)
+        )
+        titles = list(Title.objects.order_by('-pk')[:count])
+        TitleGenre.objects.bulk_create(
+            TitleGenre(title=title, genre=genre)
+            for title in titles for genre in genres
+        )
+        return titles
+
+    return make
+
+
+@pytest.fixture
+def make_reviews(django_user_model):
+    from reviews.models import Review
+
+    def make(title, count, score=5):
+        authors = [
+            django_user_model(
+                username=f'author{title.pk}_{i}',
+                email=f'author{title.pk}_{i}@yamdb.fake',
+            )
+            for i in range(count)
+        ]
+        django_user_model.objects.bulk_create(authors)
+        authors = django_user_model.objects.filter(
+            username__startswith=f'author{title.pk}_'
+        )
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text=f'Отзыв {i}', score=score)
+            for i, author in enumerate(authors)
+        )
+        return list(title.reviews.order_by('-pub_date', '-pk'))
+
+    return make
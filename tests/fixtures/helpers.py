@@ -0,0 +1,33 @@
+"""Общие функции тестов, не являющиеся фикстурами."""
+
+
+def issue_token(user):
+    """Токен доступа пользователя, как его выдаёт auth/token/."""
+    from api.serializers import TokenSerializer
+
+    return str(TokenSerializer.get_token(user))
+
+
+def request_token(user):
+    """Ответ POST auth/token/ с кодом подтверждения пользователя."""
+    from rest_framework.test import APIClient
+
+    return APIClient().post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': user.confirmation_code,
+    })
+
+
+def count_queries(client, url, status=200):
+    """Число SQL-запросов GET url без кэша ответов."""
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == status, (
+        f'Проверьте, что GET `{url}` возвращает {status}'
+    )
+    return len(context.captured_queries)
@@ -0,0 +1,108 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+
+def _request(app, method, path, query=b'', body=b'', headers=()):
+    """Выполняет запрос к ASGI-приложению, тело отдаёт двумя частями."""
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query,
+        'headers': [
+            (name.encode(), value.encode()) for name, value in headers
+        ],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    half = len(body) // 2
+    messages = [
+        {'type': 'http.request', 'body': body[:half], 'more_body': True},
+        {'type': 'http.request', 'body': body[half:], 'more_body': False},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, *chunks = sent
+    assert start['type'] == 'http.response.start'
+    return (
+        start['status'],
+        dict((k.decode(), v.decode()) for k, v in start['headers']),
+        b''.join(chunk.get('body', b'') for chunk in chunks),
+    )
+
+
+@pytest.fixture
+def asgi_app():
+    from api.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+
+    app = ASGIHandler(WSGIHandler(), read_threads=2, threads=1)
+    yield app
+    app.read_executor.shutdown()
+    app.executor.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestASGIHandler:
+
+    def test_read_routes_use_read_pool(self, asgi_app):
+        def executor(method, path):
+            return asgi_app.get_executor({'method': method, 'path': path})
+
+        assert executor('GET', '/api/v1/titles/') is asgi_app.read_executor
+        assert executor('GET', '/api/v1/titles/1/') is asgi_app.read_executor
+        assert executor(
+            'GET', '/api/v1/titles/1/reviews/1/comments/'
+        ) is asgi_app.read_executor
+        assert executor('POST', '/api/v1/titles/') is asgi_app.executor
+        assert executor('GET', '/api/v1/users/') is asgi_app.executor
+        assert executor('GET', '/nowhere/') is asgi_app.executor
+
+    def test_titles_list(self, asgi_app, title):
+        status, headers, content = _request(
+            asgi_app, 'GET', '/api/v1/titles/', query=b'year=1994'
+        )
+        assert status == 200, 'Проверьте GET /api/v1/titles/ через ASGI'
+        assert headers['content-type'] == 'application/json'
+        assert json.loads(content)['results'][0]['id'] == title.id
+
+        status, headers, content = _request(
+            asgi_app, 'HEAD', '/api/v1/titles/'
+        )
+        assert (status, content) == (200, b'')
+
+    def test_post_body(self, asgi_app):
+        body = json.dumps(
+            {'username': 'asgi_user', 'email': 'asgi@yamdb.fake'}
+        ).encode()
+        status, _, content = _request(
+            asgi_app, 'POST', '/api/v1/auth/signup/', body=body,
+            headers=[('content-type', 'application/json'),
+                     ('content-length', str(len(body)))],
+        )
+        assert status == 200, 'Тело запроса должно собираться из частей'
+        assert json.loads(content)['username'] == 'asgi_user'
+
+    def test_streaming_response(self, asgi_app, admin, title):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        status, headers, content = _request(
+            asgi_app, 'GET', '/api/v1/export/', query=b'compression=gzip',
+            headers=[('authorization', f'Bearer {AccessToken.for_user(admin)}')],
+        )
+        assert status == 200
+        rows = gzip.decompress(content).decode().splitlines()
+        assert json.loads(rows[0])['id'] == title.id
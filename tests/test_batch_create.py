@@ -0,0 +1,140 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestBatchCreate:
+
+    def test_reviews_batch(self, admin_client, title, user, another_user,
+                           django_assert_max_num_queries):
+        url = f'/api/v1/titles/{title.id}/reviews/batch/'
+        data = [
+            {'author': user.username, 'text': 'Отлично', 'score': 9},
+            {'author': another_user.username, 'text': 'Неплохо', 'score': 6},
+            {'text': 'От администратора', 'score': 3},
+        ]
+        with django_assert_max_num_queries(13):
+            response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что пачка рецензий создаётся со статусом 201'
+        )
+        results = response.json()
+        assert [item['status'] for item in results] == [201, 201, 201]
+        assert [item['data']['author'] for item in results] == [
+            user.username, another_user.username, 'TestAdmin'
+        ]
+        ids = [item['data']['id'] for item in results]
+        assert None not in ids and len(set(ids)) == 3, (
+            'Проверьте, что в ответе возвращаются id созданных рецензий'
+        )
+        title.refresh_from_db()
+        assert (title.review_count, title.rating) == (3, 6.0), (
+            'Проверьте, что пачка рецензий учитывается в рейтинге'
+        )
+
+    def test_reviews_batch_reports_each_item(self, admin_client, title,
+                                             user, another_user):
+        from reviews.models import Review
+        Review.objects.create(title=title, author=user, text='Было', score=1)
+        url = f'/api/v1/titles/{title.id}/reviews/batch/'
+        data = [
+            {'author': user.username, 'text': 'Повтор', 'score': 5},
+            {'author': another_user.username, 'text': 'Первая', 'score': 5},
+            {'author': another_user.username, 'text': 'Вторая', 'score': 5},
+            {'author': 'nobody', 'text': 'Нет автора', 'score': 5},
+            {'author': another_user.username, 'score': 11},
+        ]
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что частично созданная пачка возвращает 207'
+        )
+        results = response.json()
+        assert [item['status'] for item in results] == [
+            400, 201, 400, 400, 400
+        ]
+        assert set(results[4]['errors']) == {'text', 'score'}
+        assert Review.objects.filter(title=title).count() == 2
+
+    def test_comments_batch(self, admin_client, title, user):
+        from reviews.models import Review
+        review = Review.objects.create(
+            title=title, author=user, text='Рецензия', score=5
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/batch/'
+        data = [{'text': f'Комментарий {i}'} for i in range(5)]
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 201
+        assert [item['data']['text'] for item in response.json()] == [
+            item['text'] for item in data
+        ]
+        assert review.comments.count() == 5
+
+    def test_batch_permissions_and_payload(self, user_client, admin_client,
+                                           title):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        url = f'/api/v1/titles/{title.id}/reviews/batch/'
+        data = [{'text': 'Отлично', 'score': 9}]
+        assert client.post(url, data=data, format='json').status_code == 401
+        assert user_client.post(
+            url, data=data, format='json'
+        ).status_code == 403, (
+            'Пачки могут создавать только модераторы и администраторы'
+        )
+        assert admin_client.post(
+            url, data={'text': 'Отлично'}, format='json'
+        ).status_code == 400, 'Проверьте, что пачка должна быть списком'
+        assert admin_client.post(
+            '/api/v1/titles/0/reviews/batch/', data=data, format='json'
+        ).status_code == 404
+
+    def test_author_must_be_username(self, admin_client, title, user):
+        url = f'/api/v1/titles/{title.id}/reviews/batch/'
+        data = [
+            {'author': [user.username], 'text': 'Список', 'score': 5},
+            {'author': {'username': user.username}, 'text': 'Словарь', 'score': 5},
+            {'author': user.username, 'text': 'Строка', 'score': 5},
+        ]
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что автор не строкой отклоняется для своего элемента'
+        )
+        results = response.json()
+        assert [item['status'] for item in results] == [400, 400, 201]
+        assert set(results[0]['errors']) == {'author'}
+
+    def test_concurrent_review_is_reported(self, admin_client, title, user,
+                                           another_user, monkeypatch):
+        from api.views import ReviewViewSet
+        from reviews.models import Review
+
+        get_conflicts = ReviewViewSet.get_batch_conflicts
+        checks = []
+
+        def racing_conflicts(self, parent, objs):
+            # Рецензия появляется между проверкой пачки и вставкой.
+            checks.append(len(objs))
+            if len(checks) == 1:
+                conflicts = get_conflicts(self, parent, objs)
+                Review.objects.create(
+                    title=title, author=user, text='Параллельно', score=1
+                )
+                return conflicts
+            return get_conflicts(self, parent, objs)
+
+        monkeypatch.setattr(
+            ReviewViewSet, 'get_batch_conflicts', racing_conflicts
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/batch/'
+        data = [
+            {'author': user.username, 'text': 'Повтор', 'score': 5},
+            {'author': another_user.username, 'text': 'Первая', 'score': 5},
+        ]
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что конфликт с параллельным запросом не даёт 500'
+        )
+        assert [item['status'] for item in response.json()] == [400, 201]
+        assert checks == [2, 2]
+        assert Review.objects.filter(title=title).count() == 2
+        title.refresh_from_db()
+        assert title.review_count == 2
@@ -0,0 +1,82 @@
+import pytest
+from rest_framework.test import APIClient
+
+from tests.fixtures.helpers import issue_token
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+
+    def _client(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_token_carries_role_claims(self, admin):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = AccessToken(issue_token(admin))
+        assert token['role'] == 'admin'
+        assert token['is_superuser'] is False
+        assert token['ver'] == 0
+
+    def test_cached_user_makes_no_auth_query(self, admin, django_assert_num_queries):
+        client = self._client(issue_token(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+        with django_assert_num_queries(2):
+            # COUNT и SELECT пользователей, без запроса аутентификации.
+            response = client.get('/api/v1/users/')
+        assert response.status_code == 200
+
+    def test_role_change_revokes_token(self, admin):
+        client = self._client(issue_token(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.role = 'user'
+        admin.save()
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что токен, выпущенный до смены роли, отклоняется'
+        )
+        admin.refresh_from_db()
+        client = self._client(issue_token(admin))
+        assert client.get('/api/v1/users/').status_code == 403
+
+    def test_deactivated_and_deleted_users(self, admin, user):
+        client = self._client(issue_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+        client = self._client(issue_token(admin))
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.delete()
+        assert client.get('/api/v1/users/').status_code == 401
+
+    def test_unrelated_changes_keep_token(self, user):
+        client = self._client(issue_token(user))
+        user.bio = 'Новая биография'
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+    def test_username_change_keeps_me(self, user):
+        client = self._client(issue_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+        response = client.patch('/api/v1/users/me/', {'username': 'renamed'})
+        assert response.status_code == 200
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200, (
+            'Проверьте, что после смены username /users/me/ доступен'
+        )
+        assert response.json()['username'] == 'renamed'
+
+    def test_cached_user_is_copied(self, user):
+        from users.auth import user_cache
+
+        user_cache.set(user.pk, user.token_version, user)
+        first = user_cache.get(user.pk, user.token_version)
+        first.username = 'changed'
+        second = user_cache.get(user.pk, user.token_version)
+        assert second is not first
+        assert second.username == user.username, (
+            'Проверьте, что запросы получают свою копию пользователя'
+        )
@@ -0,0 +1,76 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCatalogCache:
+
+    def test_second_request_is_served_from_cache(self, client, title, django_assert_num_queries):
+        first = client.get('/api/v1/titles/')
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/')
+        assert second['X-Cache'] == 'HIT'
+        assert second.content == first.content
+
+    def test_query_string_is_part_of_key(self, client, title):
+        client.get('/api/v1/titles/?genre=drama&year=1994')
+        assert client.get('/api/v1/titles/?year=1994&genre=drama')['X-Cache'] == 'HIT', (
+            'Порядок параметров запроса не должен влиять на ключ кэша'
+        )
+        response = client.get('/api/v1/titles/?genre=comedy&year=2000')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 0
+
+    def test_review_invalidates_titles(self, client, title, user):
+        from reviews.models import Review
+
+        client.get(f'/api/v1/titles/{title.id}/')
+        client.get('/api/v1/categories/')
+        Review.objects.create(title=title, author=user, text='a', score=9)
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 9.0
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'HIT', (
+            'Рецензия не должна инвалидировать кэш категорий'
+        )
+
+    def test_category_and_genre_changes_invalidate_titles(self, client, title, category, genres):
+        client.get('/api/v1/titles/')
+        category.name = 'Кино'
+        category.save()
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['results'][0]['category']['name'] == 'Кино'
+
+        title.genre.remove(genres[0])
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.json()['results'][0]['genre']) == 1
+
+    def test_stats(self, client, title, capsys):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        call_command('catalog_cache_stats', reset=True)
+        output = capsys.readouterr().out
+        assert 'hits: 1' in output
+        assert 'misses: 1' in output
+
+    def test_host_and_scheme_are_part_of_key(self, client, make_titles):
+        make_titles(12)
+        first = client.get('/api/v1/titles/').json()
+        other_host = client.get('/api/v1/titles/', HTTP_HOST='localhost')
+        secure = client.get('/api/v1/titles/', secure=True)
+
+        assert other_host['X-Cache'] == secure['X-Cache'] == 'MISS', (
+            'Проверьте, что хост и схема входят в ключ кэша'
+        )
+        assert first['next'].startswith('http://testserver/')
+        assert other_host.json()['next'].startswith('http://localhost/')
+        assert secure.json()['next'].startswith('https://testserver/')
+
+    def test_commands_warn_about_local_cache(self, title, capsys):
+        call_command('rebuild_ratings')
+        assert 'Кэш каталога локален для процесса' in capsys.readouterr().err, (
+            'Проверьте предупреждение о locmem в командах, повышающих версии'
+        )
@@ -0,0 +1,106 @@
+import gzip
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def small_threshold(settings):
+    settings.COMPRESSION = {**settings.COMPRESSION, 'MIN_SIZE': 200}
+
+
+class TestNegotiation:
+
+    @pytest.mark.parametrize('header, expected', [
+        ('gzip, deflate', 'gzip'),
+        ('gzip;q=1.0, br;q=0.5', 'gzip'),
+        ('br;q=0, gzip;q=0.3', 'gzip'),
+        ('identity', None),
+        ('', None),
+        ('gzip;q=0', None),
+        ('*;q=0.5', 'best'),
+        ('gzip, deflate, br', 'best'),
+    ])
+    def test_negotiate(self, header, expected):
+        from api import compression
+
+        if expected == 'best':
+            expected = compression.available()[0]
+        assert compression.negotiate(header) == expected, (
+            f'Проверьте выбор кодирования для Accept-Encoding: {header!r}'
+        )
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    def test_compresses_large_responses(self, title, make_titles, small_threshold):
+        make_titles(5)
+        plain = APIClient().get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='identity')
+        response = APIClient().get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert 'Content-Encoding' not in plain
+        assert response['Content-Encoding'] == 'gzip', (
+            'Проверьте, что ответ сжимается gzip по Accept-Encoding'
+        )
+        assert gzip.decompress(response.content) == plain.content
+        assert int(response['Content-Length']) == len(response.content)
+        assert 'Accept-Encoding' in response['Vary']
+        assert response['ETag'].startswith('W/"'), (
+            'Проверьте, что ETag сжатого ответа слабый'
+        )
+
+        cached = APIClient().get(
+            '/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        assert cached.status_code == 304
+
+    def test_small_responses_are_not_compressed(self, category):
+        response = APIClient().get('/api/v1/categories/', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response, (
+            'Проверьте, что ответы меньше COMPRESSION["MIN_SIZE"] не сжимаются'
+        )
+
+    def test_brotli(self, title, make_titles, small_threshold):
+        brotli = pytest.importorskip('brotli')
+
+        make_titles(5)
+        plain = APIClient().get('/api/v1/titles/')
+        response = APIClient().get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip, br')
+
+        assert response['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.content) == plain.content
+
+    def test_cache_stores_compressed_payload(self, title, make_titles, small_threshold,
+                                             monkeypatch):
+        from api import compression
+
+        make_titles(5)
+        calls = []
+        compress = compression.compress
+        monkeypatch.setattr(
+            compression, 'compress',
+            lambda content, encoding: calls.append(encoding) or compress(content, encoding),
+        )
+        first = APIClient().get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+        second = APIClient().get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert (first['X-Cache'], second['X-Cache']) == ('MISS', 'HIT')
+        assert second['Content-Encoding'] == 'gzip'
+        assert second.content == first.content
+        assert calls == ['gzip'], (
+            'Проверьте, что ответ из кэша каталога не сжимается повторно'
+        )
+
+        plain = APIClient().get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='identity')
+        assert plain['X-Cache'] == 'HIT' and 'Content-Encoding' not in plain
+        assert gzip.decompress(second.content) == plain.content
+
+    def test_streaming_export_is_not_compressed(self, admin_client, title, small_threshold):
+        response = admin_client.get('/api/v1/export/', HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response
@@ -0,0 +1,117 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def second_passed(monkeypatch):
+    """Часы view на 2 секунды впереди: секунда изменения закончилась."""
+    from api import viewsets
+
+    monkeypatch.setattr(
+        viewsets, 'time', SimpleNamespace(time=lambda: time.time() + 2)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_reviews_not_modified(self, client, title, user, second_passed,
+                                  django_assert_max_num_queries):
+        from reviews.models import Review
+
+        Review.objects.create(title=title, author=user, text='a', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert response['Last-Modified']
+
+        with django_assert_max_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что совпавший If-None-Match возвращает 304'
+        )
+        assert response['ETag'] == etag
+
+    def test_if_modified_since(self, client, title, second_passed):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    def test_change_in_same_second_is_not_hidden(self, client, title, user,
+                                                 monkeypatch):
+        from api import cache, viewsets
+        from django.utils.http import http_date
+        from reviews.models import Review
+        from users.models import User
+
+        clock = SimpleNamespace(time=lambda: clock.now)
+        monkeypatch.setattr(cache, 'time', clock)
+        monkeypatch.setattr(viewsets, 'time', clock)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        clock.now = 1_000_000_100.2
+        Review.objects.create(title=title, author=user, text='a', score=5)
+        clock.now = 1_000_000_100.5
+        assert 'Last-Modified' not in client.get(url)
+        clock.now = 1_000_000_100.7
+        other = User.objects.create_user(username='other', email='o@yamdb.fake')
+        Review.objects.create(title=title, author=other, text='b', score=6)
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(1_000_000_101)
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что изменение в ту же секунду не даёт устаревший 304'
+        )
+        assert response.json()['count'] == 2
+
+        clock.now = 1_000_000_101.5
+        last_modified = client.get(url)['Last-Modified']
+        assert last_modified == http_date(1_000_000_101)
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    def test_no_last_modified_within_change_second(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200 and response['ETag']
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что Last-Modified не отдаётся до конца секунды изменения'
+        )
+
+    def test_concurrent_bumps_are_not_lost(self):
+        from api.cache import bump_versions, get_versions
+
+        (before,), _ = get_versions(['titles'])
+        for _ in range(3):
+            bump_versions('titles')
+        (after,), modified = get_versions(['titles'])
+        assert after == before + 3, 'Проверьте, что версия повышается incr'
+        assert modified
+
+    def test_new_comment_changes_etag(self, client, title, user, another_user):
+        from reviews.models import Comment, Review
+
+        review = Review.objects.create(title=title, author=user, text='a', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        etag = client.get(url)['ETag']
+        Comment.objects.create(review=review, author=another_user, text='b')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert len(response.json()['results']) == 1
+
+    def test_pages_have_different_etags(self, client, title):
+        url = '/api/v1/titles/'
+        assert client.get(url)['ETag'] != client.get(url + '?year=1994')['ETag']
+
+    def test_review_of_other_title_keeps_etag(self, client, title, category, user):
+        from reviews.models import Review, Title
+
+        other = Title.objects.create(name='Другое', year=2000, category=category)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        Review.objects.create(title=other, author=user, text='a', score=5)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+
+import pytest
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pools():
+    from common.db_pool import pool
+
+    saved = dict(pool._pools)
+    pool._pools.clear()
+    yield pool
+    for item in pool._pools.values():
+        item.close()
+    pool._pools.clear()
+    pool._pools.update(saved)
+
+
+@pytest.fixture
+def pooled_db(tmp_path, pools):
+    from common.db_pool.base import PooledDatabaseWrapperMixin
+    from django.db.backends.sqlite3.base import DatabaseWrapper
+
+    wrapper_class = type(
+        'PooledSQLiteWrapper', (PooledDatabaseWrapperMixin, DatabaseWrapper), {}
+    )
+    settings_dict = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'pool.sqlite3'),
+        'ATOMIC_REQUESTS': False,
+        'AUTOCOMMIT': True,
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+        'TIME_ZONE': None,
+        'USER': '',
+        'PASSWORD': '',
+        'HOST': '',
+        'PORT': '',
+        'TEST': {},
+        'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05},
+    }
+    wrapper = wrapper_class(settings_dict, alias='pooled')
+    yield wrapper
+    wrapper.close()
+
+
+class TestConnectionPool:
+
+    def _pool(self, **kwargs):
+        from common.db_pool.pool import ConnectionPool
+
+        options = {'max_size': 2, 'timeout': 0.05, **kwargs}
+        return ConnectionPool('test', **options)
+
+    def test_reuses_released_connection(self):
+        pool = self._pool()
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        second = pool.acquire(FakeConnection)
+
+        assert second is first, 'Проверьте, что пул выдаёт возвращённое соединение'
+        stats = pool.stats()
+        assert stats['created'] == 1 and stats['checkouts'] == 2
+        assert stats['in_use'] == 1 and stats['idle'] == 0
+
+    def test_limits_size_and_waits_for_release(self):
+        from common.db_pool.pool import PoolTimeoutError
+
+        pool = self._pool(timeout=5)
+        first = pool.acquire(FakeConnection)
+        pool.acquire(FakeConnection)
+        timer = threading.Timer(0.05, pool.release, (first,))
+        timer.start()
+        third = pool.acquire(FakeConnection)
+        timer.join()
+
+        assert third is first, (
+            'Проверьте, что при заполненном пуле acquire() ждёт освобождения соединения'
+        )
+        assert pool.stats()['created'] == 2
+
+        pool.timeout = 0.01
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire(FakeConnection)
+        assert pool.stats()['timeouts'] == 1
+        assert pool.stats()['in_use'] == 2
+
+    def test_checks_idle_connection_on_checkout(self):
+        pool = self._pool()
+        broken = pool.acquire(FakeConnection)
+        pool.release(broken)
+
+        fresh = pool.acquire(FakeConnection, check=lambda connection: False)
+
+        assert fresh is not broken and broken.closed, (
+            'Проверьте, что соединение, не прошедшее проверку, заменяется новым'
+        )
+        assert pool.stats()['closed'] == 1
+
+        pool.release(fresh)
+        pool.check_idle = 60
+        assert pool.acquire(FakeConnection, check=lambda connection: False) is fresh, (
+            'Проверьте, что недавно возвращённое соединение не проверяется'
+        )
+
+    def test_recycles_old_and_failed_connections(self):
+        pool = self._pool(max_age=0)
+        old = pool.acquire(FakeConnection)
+        pool.release(old)
+        assert old.closed, 'Проверьте, что соединение старше max_age закрывается'
+
+        pool.max_age = None
+        failed = pool.acquire(FakeConnection)
+        pool.release(failed, reusable=False)
+        assert failed.closed and pool.stats()['idle'] == 0
+        assert pool.stats()['in_use'] == 0
+
+    def test_forgets_parent_pool_after_fork(self, pools):
+        pool = pools.get_pool('forked', lambda: self._pool())
+        inherited = pool.acquire(FakeConnection)
+        pool.release(inherited)
+        pool.pid = -1
+
+        child = pools.get_pool('forked', lambda: self._pool())
+
+        assert child is not pool, 'Проверьте, что после fork процесс создаёт свой пул'
+        assert not inherited.closed, (
+            'Проверьте, что соединения процесса-родителя не закрываются после fork'
+        )
+        assert child.acquire(FakeConnection) is not inherited
+
+
+@pytest.mark.django_db
+class TestPooledDatabaseWrapper:
+
+    def test_returns_connection_to_pool(self, pooled_db):
+        pooled_db.ensure_connection()
+        raw = pooled_db.connection
+        pooled_db.close()
+        assert pooled_db.connection is None
+        assert pooled_db.pool.stats()['idle'] == 1
+
+        pooled_db.ensure_connection()
+        assert pooled_db.connection is raw, (
+            'Проверьте, что бэкенд берёт соединение из пула вместо нового'
+        )
+        assert pooled_db.pool.stats()['created'] == 1
+
+    def test_discards_connection_after_error(self, pooled_db):
+        from django.db import OperationalError
+
+        with pytest.raises(OperationalError):
+            with pooled_db.cursor() as cursor:
+                cursor.execute('SELECT * FROM missing_table')
+        raw = pooled_db.connection
+        pooled_db.close_if_unusable_or_obsolete()
+
+        assert pooled_db.pool.stats()['idle'] == 0, (
+            'Проверьте, что соединение после ошибки БД не возвращается в пул'
+        )
+        pooled_db.ensure_connection()
+        assert pooled_db.connection is not raw
+
+    def test_checkout_timeout_is_database_error(self, pooled_db):
+        from django.db import OperationalError
+
+        pooled_db.ensure_connection()
+        other = type(pooled_db)(pooled_db.settings_dict, alias='pooled')
+
+        with pytest.raises(OperationalError):
+            other.ensure_connection()
+        assert pooled_db.pool.stats()['timeouts'] == 1
+
+
+@pytest.mark.django_db
+class TestPoolMetrics:
+
+    def test_renders_pool_metrics(self, client, pooled_db, tmp_path):
+        from api.metrics import store
+
+        pooled_db.ensure_connection()
+        pooled_db.close()
+        directory = store.directory
+        store.directory = str(tmp_path)
+        dead_worker = {'routes': [], 'pools': {'pooled': {
+            'checkouts': 5, 'wait_seconds': 0.5, 'timeouts': 0,
+            'created': 2, 'closed': 0, 'in_use': 2, 'idle': 0, 'max_size': 1,
+        }}}
+        path = os.path.join(tmp_path, f'metrics_{2 ** 31 - 1}.json')
+        with open(path, 'w') as file:
+            json.dump(dead_worker, file)
+        try:
+            text = client.get('/metrics/').content.decode()
+        finally:
+            store.directory = directory
+            store.reset()
+
+        assert 'yamdb_db_pool_checkouts_total{alias="pooled"} 6' in text, (
+            'Проверьте, что /metrics/ суммирует выдачи соединений всех процессов'
+        )
+        assert 'yamdb_db_pool_connections{alias="pooled",state="idle"} 1' in text
+        assert 'yamdb_db_pool_connections{alias="pooled",state="in_use"} 0' in text, (
+            'Проверьте, что состояние пулов завершившихся процессов не учитывается'
+        )
+        assert 'yamdb_db_pool_max_connections{alias="pooled"} 1' in text
+        assert 'yamdb_db_pool_checkout_wait_seconds_total{alias="pooled"}' in text
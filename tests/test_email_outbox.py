@@ -0,0 +1,111 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_queues_email(self, client):
+        from users.models import EmailOutbox
+
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'},
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо синхронно'
+        )
+        message = EmailOutbox.objects.get()
+        assert message.recipient == 'newbie@yamdb.fake'
+        assert message.sent_at is None
+
+    def test_worker_sends_batches(self, django_user_model, settings):
+        from users.models import EmailOutbox
+
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, BATCH_SIZE=2)
+        for i in range(5):
+            EmailOutbox.objects.create(
+                subject='code', body=str(i), recipient=f'user{i}@yamdb.fake'
+            )
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open'
+        ) as backend_open:
+            call_command('send_email_outbox', once=True)
+        assert len(mail.outbox) == 5
+        assert backend_open.call_count == 3, (
+            'Проверьте, что на пачку открывается одно соединение'
+        )
+        assert not EmailOutbox.objects.filter(sent_at__isnull=True).exists()
+
+    def test_failed_email_is_retried_with_backoff(self, settings):
+        from users.models import EmailOutbox
+        from users.outbox import get_stats, send_batch
+
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MAX_ATTEMPTS=2)
+        message = EmailOutbox.objects.create(
+            subject='code', body='1', recipient='user@yamdb.fake'
+        )
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('SMTP down'),
+        ):
+            assert send_batch() == (0, 1)
+            message.refresh_from_db()
+            assert message.attempts == 1
+            assert message.next_attempt_at > message.created_at
+            assert send_batch() == (0, 0), 'Письмо отложено до следующей попытки'
+
+            EmailOutbox.objects.update(next_attempt_at=message.created_at)
+            send_batch()
+        message.refresh_from_db()
+        assert message.next_attempt_at is None
+        stats = get_stats()
+        assert (stats['pending'], stats['dead']) == (0, 1)
+
+    def test_connection_error_retries_whole_batch(self):
+        from users.models import EmailOutbox
+        from users.outbox import send_batch
+
+        for i in range(3):
+            EmailOutbox.objects.create(
+                subject='code', body=str(i), recipient=f'user{i}@yamdb.fake'
+            )
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            side_effect=ConnectionRefusedError('SMTP down'),
+        ):
+            assert send_batch() == (0, 3), (
+                'Проверьте, что пачка откладывается, если соединение не открылось'
+            )
+        assert len(mail.outbox) == 0
+        for message in EmailOutbox.objects.all():
+            assert message.attempts == 1
+            assert message.next_attempt_at > message.created_at
+            assert 'SMTP down' in message.last_error
+        assert send_batch() == (0, 0), 'Письма отложены до следующей попытки'
+
+
+def test_worker_survives_errors():
+    from users import outbox
+
+    calls = []
+
+    def drain(batch_size):
+        calls.append(batch_size)
+        if len(calls) == 1:
+            raise OSError('database is down')
+        return 0, 0
+
+    def sleep(interval):
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+
+    with mock.patch.object(outbox, 'drain', drain):
+        with mock.patch.object(outbox.time, 'sleep', sleep):
+            with pytest.raises(KeyboardInterrupt):
+                outbox.run_worker(interval=1)
+    assert len(calls) == 2, 'Проверьте, что воркер продолжает работу после ошибки'
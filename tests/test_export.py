@@ -0,0 +1,97 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+class TestCatalogExport:
+
+    def _rows(self, response, compressed=False):
+        assert response.status_code == 200, (
+            'Проверьте, что администратор может выгрузить каталог'
+        )
+        assert response.streaming, 'Выгрузка должна отдаваться потоком'
+        content = b''.join(response.streaming_content)
+        if compressed:
+            content = gzip.decompress(content)
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_export_requires_admin(self, client, user_client):
+        assert client.get('/api/v1/export/').status_code == 401
+        assert user_client.get('/api/v1/export/').status_code == 403
+
+    def test_export_titles(self, admin_client, title, user, settings,
+                           django_assert_num_queries):
+        from reviews.models import Review
+        settings.EXPORT_CHUNK_SIZE = 1
+        Review.objects.create(title=title, author=user, text='a', score=8)
+        response = admin_client.get('/api/v1/export/')
+        assert response['Content-Type'] == 'application/x-ndjson'
+        with django_assert_num_queries(2):
+            rows = self._rows(response)
+        assert len(rows) == 1
+        row = rows[0]
+        assert (row['type'], row['id'], row['rating']) == ('title', title.id, 8)
+        assert row['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert {genre['slug'] for genre in row['genre']} == {
+            'drama', 'comedy'
+        }
+
+    def test_export_with_reviews_and_comments_gzip(self, admin_client, title,
+                                                   user):
+        from reviews.models import Comment, Review
+        review = Review.objects.create(
+            title=title, author=user, text='Рецензия', score=8
+        )
+        Comment.objects.create(review=review, author=user, text='Коммент')
+        response = admin_client.get(
+            '/api/v1/export/?include=reviews,comments&compression=gzip'
+        )
+        assert response['Content-Type'] == 'application/gzip'
+        rows = self._rows(response, compressed=True)
+        assert [row['type'] for row in rows] == ['title', 'review', 'comment']
+        assert rows[1]['author'] == user.username
+        assert rows[2]['review_id'] == review.id
+
+    def test_export_updated_since(self, admin_client, title, make_titles,
+                                  genres):
+        from reviews.models import Title
+        old = make_titles(2)
+        past = timezone.now() - timedelta(days=1)
+        Title.objects.update(updated_at=past)
+        since = (past + timedelta(hours=1)).isoformat()
+
+        genres[0].name = 'Драма (новое имя)'
+        genres[0].save()
+        rows = self._rows(admin_client.get(
+            '/api/v1/export/', {'updated_since': since}
+        ))
+        assert {row['id'] for row in rows} == {
+            title.id, *(t.id for t in old)
+        }, 'Переименование жанра должно попадать в инкрементальную выгрузку'
+
+        Title.objects.update(updated_at=past)
+        old[0].genre.clear()
+        rows = self._rows(admin_client.get(
+            '/api/v1/export/', {'updated_since': since}
+        ))
+        assert [row['id'] for row in rows] == [old[0].id]
+
+    def test_export_rejects_bad_params(self, admin_client):
+        for query in ('include=users', 'updated_since=вчера',
+                      'compression=zip'):
+            response = admin_client.get(f'/api/v1/export/?{query}')
+            assert response.status_code == 400, (
+                f'Проверьте, что `?{query}` возвращает 400'
+            )
+
+    def test_export_rejects_impossible_date(self, admin_client):
+        response = admin_client.get(
+            '/api/v1/export/', {'updated_since': '2020-13-45T00:00:00'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что несуществующая дата в updated_since возвращает 400'
+        )
@@ -0,0 +1,98 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFastListEquivalence:
+    """list() через RowSerializer отдаёт те же байты, что ModelSerializer."""
+
+    @pytest.fixture
+    def catalog(self, title, category, genres, make_titles, make_reviews):
+        from reviews.models import Comment, Title
+
+        make_titles(12)
+        Title.objects.create(name='Без категории и жанров', year=1950)
+        Title.objects.create(
+            name='Побег', year=1963, category=category, description='',
+        )
+        reviews = make_reviews(title, 3, score=7)
+        reviews[0].score = 8
+        reviews[0].save()
+        Comment.objects.bulk_create(
+            Comment(review=reviews[0], author=review.author, text=f'Ответ {i}')
+            for i, review in enumerate(reviews * 5)
+        )
+        Title.objects.rebuild_rating()
+        return title, reviews[0]
+
+    def _assert_same(self, monkeypatch, viewset, url, params=None):
+        from django.core.cache import cache
+
+        fast = APIClient().get(url, params)
+        cache.clear()
+        with monkeypatch.context() as patch:
+            patch.setattr(viewset, 'row_serializer_class', None)
+            slow = APIClient().get(url, params)
+        cache.clear()
+        assert fast.status_code == slow.status_code == 200
+        assert fast.content == slow.content, (
+            f'Проверьте, что быстрый list() {url} {params} совпадает с сериализатором'
+        )
+        return fast.json()
+
+    @pytest.mark.parametrize('params', [
+        None,
+        {'page': 2},
+        {'genre': 'comedy'},
+        {'category': 'movie', 'year': 2000},
+        {'ordering': '-rating'},
+        {'ordering': 'rating'},
+        {'ordering': 'year'},
+        {'search': 'побег'},
+        {'name': 'Произв'},
+    ])
+    def test_titles(self, monkeypatch, catalog, params):
+        from api.views import TitleViewSet
+
+        data = self._assert_same(monkeypatch, TitleViewSet, '/api/v1/titles/', params)
+        assert data['results'] or params == {'page': 2}
+
+    def test_titles_cover_edge_cases(self, monkeypatch, catalog):
+        from api.views import TitleViewSet
+
+        data = self._assert_same(
+            monkeypatch, TitleViewSet, '/api/v1/titles/', {'ordering': 'year'}
+        )
+        first = data['results'][0]
+        assert first['category'] is None and first['genre'] == []
+        assert first['rating'] is None
+        rated = next(item for item in data['results'] if item['rating'])
+        assert rated['rating'] == 7.33
+
+    @pytest.mark.parametrize('params', [None, {'page': 1}, {'cursor': ''}])
+    def test_reviews(self, monkeypatch, catalog, params):
+        from api.views import ReviewViewSet
+
+        title, _ = catalog
+        data = self._assert_same(
+            monkeypatch, ReviewViewSet, f'/api/v1/titles/{title.id}/reviews/', params
+        )
+        assert len(data['results']) == 3
+
+    @pytest.mark.parametrize('params', [None, {'page': 2}, {'cursor': ''}])
+    def test_comments(self, monkeypatch, catalog, params):
+        from api.views import CommentViewSet
+
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        data = self._assert_same(monkeypatch, CommentViewSet, url, params)
+        assert data['results']
+
+    def test_comments_cursor_pages(self, monkeypatch, catalog):
+        from api.views import CommentViewSet
+
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        data = self._assert_same(monkeypatch, CommentViewSet, url, {'cursor': ''})
+        cursor = data['next'].split('cursor=')[1]
+        self._assert_same(monkeypatch, CommentViewSet, url, {'cursor': cursor})
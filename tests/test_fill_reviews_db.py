@@ -0,0 +1,152 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+CSV_FILES = {
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,reader,reader@yamdb.fake,user,,,\n'
+        '101,critic,critic@yamdb.fake,moderator,"Пишет, много",,\n'
+    ),
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n2,Комедия,comedy\n',
+    'titles.csv': 'id,name,year,category\n1,Мимино,1977,1\n2,Кин-дза-дза!,1986,1\n',
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,1,2\n3,2,2\n',
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Отлично,100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,Хорошо,101,7,2019-09-24T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2019-09-24T21:08:21.567Z\n'
+    ),
+}
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    for filename, content in CSV_FILES.items():
+        (tmp_path / filename).write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestFillReviewsDb:
+
+    def test_loads_all_tables(self, csv_dir):
+        from reviews.models import Comment, Review, Title, TitleGenre
+
+        call_command('fill_reviews_db', path=str(csv_dir), batch_size=1)
+        assert Title.objects.count() == 2
+        assert TitleGenre.objects.count() == 3
+        assert Review.objects.count() == 2
+        assert Comment.objects.count() == 1
+        title = Title.objects.get(pk=1)
+        assert (title.rating_sum, title.review_count) == (17, 2), (
+            'Проверьте, что после загрузки пересчитывается рейтинг произведений'
+        )
+
+    def test_refuses_non_empty_tables(self, csv_dir):
+        call_command('fill_reviews_db', path=str(csv_dir))
+        with pytest.raises(CommandError):
+            call_command('fill_reviews_db', path=str(csv_dir))
+        call_command('fill_reviews_db', path=str(csv_dir), truncate=True)
+
+    def test_only_checks_foreign_key_order(self, csv_dir):
+        from reviews.models import Review
+
+        with pytest.raises(CommandError):
+            call_command('fill_reviews_db', path=str(csv_dir), only=['review'])
+        call_command(
+            'fill_reviews_db', path=str(csv_dir),
+            only=['user', 'category', 'genre', 'title'],
+        )
+        call_command('fill_reviews_db', path=str(csv_dir), only=['review'])
+        assert Review.objects.count() == 2
+
+    def test_truncate_keeps_dependent_tables(self, csv_dir):
+        from reviews.models import Review
+        from users.models import User
+
+        call_command('fill_reviews_db', path=str(csv_dir))
+        with pytest.raises(CommandError):
+            call_command(
+                'fill_reviews_db', path=str(csv_dir),
+                only=['user'], truncate=True,
+            )
+        assert Review.objects.count() == 2, (
+            'Проверьте, что --truncate не удаляет рецензии по каскаду'
+        )
+        assert User.objects.filter(pk=100).exists()
+
+    def test_copy_path(self, csv_dir, monkeypatch):
+        from api.management.commands import fill_reviews_db
+        from django.db import connection
+        from reviews.models import Review
+
+        copied = []
+
+        def copy_objects(conn, model, objs):
+            copied.append(model)
+            model.objects.bulk_create(objs)
+
+        class PostgresConnection:
+            vendor = 'postgresql'
+
+            def __getattr__(self, name):
+                return getattr(connection, name)
+
+        monkeypatch.setattr(fill_reviews_db, 'connection', PostgresConnection())
+        monkeypatch.setattr(fill_reviews_db, 'copy_objects', copy_objects)
+        call_command('fill_reviews_db', path=str(csv_dir))
+        assert copied == list(fill_reviews_db.TABLES), (
+            'Проверьте, что на PostgreSQL таблицы загружаются через COPY'
+        )
+        assert Review.objects.count() == 2
+
+
+class TestCopyObjects:
+
+    def test_copy_format(self):
+        from api.management.commands._private import copy_objects
+        from django.db import connection
+        from reviews.models import Comment
+
+        calls = []
+
+        class Cursor:
+            cursor = type('RawCursor', (), {
+                'copy_expert': lambda self, sql, buffer: calls.append(
+                    (sql, buffer.read())
+                ),
+            })()
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+        class Connection:
+            def cursor(self):
+                return Cursor()
+
+            def __getattr__(self, name):
+                return getattr(connection, name)
+
+        copy_objects(Connection(), Comment, [
+            Comment(id=1, review_id=2, author_id=3,
+                    text='Табуляция\tперевод\nстроки и \\'),
+        ])
+        sql, data = calls[0]
+        assert sql.startswith('COPY "reviews_comment" (')
+        columns = sql[sql.index('(') + 1:sql.index(')')].split(', ')
+        row = dict(zip(columns, data.rstrip('\n').split('\t')))
+        assert row['"text"'] == 'Табуляция\\tперевод\\nстроки и \\\\', (
+            'Проверьте экранирование значений в формате COPY'
+        )
+        assert row['"review_id"'] == '2'
+        assert row['"pub_date"'] != '\\N', (
+            'Проверьте, что COPY учитывает pre_save полей, как bulk_create'
+        )
+        assert data.count('\n') == 1
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def _walk(self, client, url, direction):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data, 'В режиме cursor не должен выполняться COUNT'
+            ids.append([item['id'] for item in data['results']])
+            url = data[direction]
+        return ids
+
+    def test_reviews_cursor_walks_all_pages(self, client, title, make_reviews):
+        reviews = make_reviews(title, 25)
+        pages = self._walk(client, f'/api/v1/titles/{title.id}/reviews/?cursor=', 'next')
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert sum(pages, []) == [review.id for review in reviews], (
+            'Проверьте, что keyset-пагинация отдаёт рецензии по (pub_date, id) '
+            'без пропусков и повторов'
+        )
+
+    def test_previous_link_returns_previous_page(self, client, title, make_reviews):
+        make_reviews(title, 25)
+        url = f'/api/v1/titles/{title.id}/reviews/?cursor='
+        first = client.get(url).json()
+        second = client.get(first['next']).json()
+        back = client.get(second['previous']).json()
+        assert back['results'] == first['results']
+        assert back['previous'] is None
+
+    def test_comments_cursor(self, client, title, user, make_reviews):
+        from reviews.models import Comment
+
+        review = make_reviews(title, 1)[0]
+        Comment.objects.bulk_create(
+            Comment(review=review, author=user, text=str(i)) for i in range(12)
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/?cursor='
+        pages = self._walk(client, url, 'next')
+        assert [len(page) for page in pages] == [10, 2]
+
+    def test_invalid_cursor(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/?cursor=xyz')
+        assert response.status_code == 404
+
+    def test_page_number_mode_by_default(self, client, title, make_reviews):
+        make_reviews(title, 3)
+        data = client.get(f'/api/v1/titles/{title.id}/reviews/').json()
+        assert data['count'] == 3
@@ -0,0 +1,135 @@
+import datetime
+import threading
+
+import pytest
+
+from tests.fixtures.helpers import request_token
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    from api import serializers
+    from rest_framework_simplejwt.settings import api_settings
+    from users.last_login import LastLoginBuffer
+
+    buffer = LastLoginBuffer(interval=3600, max_size=100)
+    monkeypatch.setattr(serializers, 'last_login_buffer', buffer)
+    monkeypatch.setattr(api_settings, 'UPDATE_LAST_LOGIN', True)
+    yield buffer
+    buffer.flush()
+
+
+def _at(minute):
+    return datetime.datetime(2022, 5, 1, 12, minute, tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.django_db
+class TestLastLoginBuffer:
+
+    def test_token_does_not_update_user(self, user, buffer,
+                                        django_assert_num_queries):
+        user.confirmation_code = 'code'
+        user.save()
+        for _ in range(3):
+            assert request_token(user).status_code == 200
+        user.refresh_from_db()
+        assert user.last_login is None, (
+            'Проверьте, что выдача токена не пишет last_login сразу'
+        )
+        assert len(buffer) == 1
+
+        with django_assert_num_queries(1):
+            assert buffer.flush() == 1
+        user.refresh_from_db()
+        assert user.last_login is not None
+
+    def test_flush_is_one_bulk_update(self, user, another_user,
+                                      django_assert_num_queries):
+        from users.last_login import LastLoginBuffer
+
+        buffer = LastLoginBuffer(interval=3600, max_size=100)
+        buffer.touch(user.pk, _at(5))
+        buffer.touch(another_user.pk, _at(1))
+        buffer.touch(user.pk, _at(3))
+
+        with django_assert_num_queries(1):
+            assert buffer.flush() == 2, 'Проверьте, что записи пользователя объединяются'
+        user.refresh_from_db()
+        another_user.refresh_from_db()
+        assert (user.last_login, another_user.last_login) == (_at(5), _at(1)), (
+            'Проверьте, что в БД пишется последнее время входа'
+        )
+        assert buffer.flush() == 0
+
+    def test_failed_flush_keeps_logins(self, user, monkeypatch):
+        from users.last_login import LastLoginBuffer
+        from users.models import User
+
+        buffer = LastLoginBuffer(interval=3600, max_size=100)
+        buffer.touch(user.pk, _at(1))
+        with monkeypatch.context() as patch:
+            patch.setattr(User.objects, 'bulk_update', lambda *args: 1 / 0)
+            with pytest.raises(ZeroDivisionError):
+                buffer.flush()
+        assert buffer._timer is not None, (
+            'Проверьте, что после ошибки сброс назначается повторно'
+        )
+        buffer.touch(user.pk, _at(0))
+        assert buffer.flush() == 1
+        user.refresh_from_db()
+        assert user.last_login == _at(1)
+
+    def test_full_buffer_is_not_flushed_in_request(self, user, buffer,
+                                                    monkeypatch):
+        from users.models import User
+
+        user.confirmation_code = 'code'
+        user.save()
+        buffer.max_size = 1
+        delays = []
+        monkeypatch.setattr(buffer, '_schedule', delays.append)
+        with monkeypatch.context() as patch:
+            patch.setattr(User.objects, 'bulk_update', lambda *args: 1 / 0)
+            assert request_token(user).status_code == 200, (
+                'Проверьте, что ошибка записи last_login не ломает выдачу токена'
+            )
+        assert delays == [0], (
+            'Проверьте, что заполненный буфер сбрасывается в потоке таймера'
+        )
+        assert len(buffer) == 1
+
+
+def _watch(buffer, monkeypatch):
+    """Событие, которое взводится после сброса буфера."""
+    flushed = threading.Event()
+    flush = buffer.flush
+    monkeypatch.setattr(buffer, 'flush', lambda: (flush(), flushed.set()))
+    return flushed
+
+
+@pytest.mark.django_db(transaction=True)
+def test_full_buffer_is_flushed_in_background(user, another_user, monkeypatch):
+    from users.last_login import LastLoginBuffer
+
+    buffer = LastLoginBuffer(interval=3600, max_size=2)
+    flushed = _watch(buffer, monkeypatch)
+    buffer.touch(user.pk, _at(1))
+    assert not flushed.wait(0.1)
+    buffer.touch(another_user.pk, _at(2))
+    assert flushed.wait(5), 'Проверьте сброс заполненного буфера'
+    assert len(buffer) == 0
+    another_user.refresh_from_db()
+    assert another_user.last_login == _at(2)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffer_is_flushed_after_interval(user, monkeypatch):
+    from users.last_login import LastLoginBuffer
+
+    buffer = LastLoginBuffer(interval=0.05, max_size=100)
+    flushed = _watch(buffer, monkeypatch)
+
+    buffer.touch(user.pk, _at(1))
+    assert flushed.wait(5), 'Проверьте, что буфер сбрасывается по таймеру'
+    user.refresh_from_db()
+    assert user.last_login == _at(1)
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def metrics_store(tmp_path):
+    from api.metrics import store
+
+    directory = store.directory
+    store.directory = str(tmp_path)
+    store.reset()
+    yield store
+    store.reset()
+    store.directory = directory
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def _metrics(self, client):
+        response = client.get('/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        return response.content.decode()
+
+    def test_records_route_latency_and_queries(self, client, title, metrics_store):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{title.id}/')
+        text = self._metrics(client)
+
+        labels = 'route="titles-list",method="GET"'
+        assert f'yamdb_http_requests_total{{{labels}}} 2' in text
+        assert f'yamdb_http_request_duration_seconds_count{{{labels}}} 2' in text
+        assert f'yamdb_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+        assert 'yamdb_http_requests_total{route="titles-detail",method="GET"} 1' in text
+        assert f'yamdb_db_queries_total{{{labels}}}' in text
+        assert 'route="metrics"' not in text
+
+    def test_aggregates_across_processes(self, client, metrics_store):
+        client.get('/api/v1/genres/')
+        other_worker = {'routes': [[
+            'genres-list', 'GET',
+            [3, 0.3, 6, 0.01, 300, [3] + [0] * len(metrics_store.buckets)],
+        ]]}
+        with open(os.path.join(metrics_store.directory, 'metrics_1.json'), 'w') as file:
+            json.dump(other_worker, file)
+
+        text = self._metrics(client)
+        assert 'yamdb_http_requests_total{route="genres-list",method="GET"} 4' in text, (
+            'Проверьте, что /metrics/ суммирует метрики всех процессов'
+        )
+
+    def test_concurrent_flushes(self, metrics_store):
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(50):
+                    metrics_store.flush()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=flush) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [], 'Проверьте, что файл процесса пишет один поток'
+
+    def test_write_error_does_not_break_response(self, client, metrics_store,
+                                                 monkeypatch):
+        def fail(*args, **kwargs):
+            raise OSError('No space left on device')
+
+        monkeypatch.setattr(metrics_store, 'flush_interval', 0)
+        monkeypatch.setattr(json, 'dump', fail)
+        assert client.get('/api/v1/genres/').status_code == 200, (
+            'Проверьте, что ошибка записи метрик не попадает в ответ'
+        )
+
+    def test_metrics_read_files_once(self, client, metrics_store, monkeypatch):
+        loads = []
+        load = metrics_store._load
+
+        def counted_load():
+            loads.append(1)
+            return load()
+
+        monkeypatch.setattr(metrics_store, '_load', counted_load)
+        self._metrics(client)
+        assert len(loads) == 1, (
+            'Проверьте, что /metrics/ читает файлы процессов один раз'
+        )
@@ -0,0 +1,84 @@
+import pytest
+
+from tests.fixtures.helpers import count_queries
+
+
+@pytest.mark.django_db
+class TestNestedQueries:
+
+    def _comment(self, review, authors):
+        from reviews.models import Comment
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for author in authors
+        )
+
+    def test_reviews_list_query_count_is_constant(self, client, title,
+                                                  make_reviews, make_titles):
+        other_title = make_titles(1)[0]
+        make_reviews(title, 2)
+        make_reviews(other_title, 10)
+        small_page = count_queries(
+            client, f'/api/v1/titles/{title.id}/reviews/'
+        )
+        full_page = count_queries(
+            client, f'/api/v1/titles/{other_title.id}/reviews/'
+        )
+        assert small_page == full_page == 2, (
+            'Страница отзывов должна загружаться за COUNT и один запрос '
+            'с авторами, не загружая произведение'
+        )
+
+    def test_comments_list_query_count_is_constant(self, client, title,
+                                                   make_reviews):
+        review, *authors = [r.author for r in make_reviews(title, 10)]
+        review = title.reviews.get(author=review)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        self._comment(review, authors[:2])
+        small_page = count_queries(client, url)
+        self._comment(review, authors[2:])
+        full_page = count_queries(client, url)
+        assert small_page == full_page == 2, (
+            'Страница комментариев должна загружаться за COUNT и один '
+            'запрос с авторами, не загружая отзыв и произведение'
+        )
+
+    def test_empty_list_of_existing_parent(self, client, title, make_reviews):
+        count_queries(client, f'/api/v1/titles/{title.id}/reviews/')
+        review = make_reviews(title, 1)[0]
+        count_queries(
+            client, f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        )
+
+    def test_missing_parent_returns_404(self, client, title, make_reviews,
+                                        make_titles):
+        review = make_reviews(title, 1)[0]
+        other_title = make_titles(1)[0]
+        count_queries(client, '/api/v1/titles/0/reviews/', status=404)
+        count_queries(
+            client,
+            f'/api/v1/titles/{other_title.id}/reviews/{review.id}/comments/',
+            status=404,
+        )
+        count_queries(
+            client,
+            f'/api/v1/titles/{other_title.id}/reviews/{review.id}/',
+            status=404,
+        )
+
+    def test_comment_create_checks_title(self, user_client, title,
+                                         make_reviews, make_titles):
+        review = make_reviews(title, 1)[0]
+        other_title = make_titles(1)[0]
+        response = user_client.post(
+            f'/api/v1/titles/{other_title.id}/reviews/{review.id}/comments/',
+            data={'text': 'Комментарий'},
+        )
+        assert response.status_code == 404, (
+            'Комментарий к отзыву другого произведения создаваться не должен'
+        )
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            data={'text': 'Комментарий'},
+        )
+        assert response.status_code == 201
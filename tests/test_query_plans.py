@@ -0,0 +1,103 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+class TestPlanParsing:
+
+    def test_sqlite(self):
+        from api.query_plans import _sqlite_plan
+
+        lines, problems = _sqlite_plan([
+            (2, 0, 0, 'SCAN TABLE reviews_category'),
+            (5, 0, 0, 'SCAN reviews_title USING INDEX title_year_idx'),
+            (7, 5, 0, 'SEARCH reviews_genre USING INTEGER PRIMARY KEY (rowid=?)'),
+            (9, 0, 0, 'USE TEMP B-TREE FOR ORDER BY'),
+        ])
+        assert lines[2] == '  SEARCH reviews_genre USING INTEGER PRIMARY KEY (rowid=?)'
+        assert problems == [
+            'чтение таблицы целиком: reviews_category',
+            'сортировка без индекса: USE TEMP B-TREE FOR ORDER BY',
+        ], 'Проверьте замечания к плану SQLite'
+
+    def test_postgresql(self):
+        from api.query_plans import _postgresql_plan
+
+        lines, problems = _postgresql_plan({
+            'Node Type': 'Limit', 'Plan Rows': 10, 'Plans': [{
+                'Node Type': 'Sort', 'Plan Rows': 10,
+                'Sort Key': ['reviews_genre.name'], 'Plans': [
+                    {
+                        'Node Type': 'Seq Scan', 'Plan Rows': 50,
+                        'Relation Name': 'reviews_genre',
+                    },
+                    {
+                        'Node Type': 'Index Scan', 'Plan Rows': 3,
+                        'Relation Name': 'reviews_title',
+                        'Index Name': 'title_category_year_idx',
+                        'Actual Rows': 2, 'Actual Total Time': 0.1,
+                    },
+                ],
+            }],
+        })
+        assert lines[-1] == (
+            '    Index Scan on reviews_title using title_category_year_idx '
+            '(rows=3, actual rows=2, time=0.1 ms)'
+        )
+        assert problems == [
+            'сортировка без индекса: reviews_genre.name',
+            'чтение таблицы целиком: reviews_genre',
+        ], 'Проверьте замечания к плану PostgreSQL'
+
+
+@pytest.mark.django_db
+class TestHotQueries:
+
+    def _problems(self, path):
+        from api.query_plans import capture, explain
+
+        queries = capture(path)
+        assert queries, f'Проверьте, что {path} выполняет запросы'
+        return [
+            problem for sql in queries
+            for problem in explain(sql)[1]
+            # Жанры страницы сортируются после выборки - их несколько строк.
+            if 'reviews_titlegenre' not in sql or 'LIMIT' in sql
+        ]
+
+    def test_year_and_category_use_index(self, title):
+        path = f'/api/v1/titles/?year={title.year}&category={title.category.slug}'
+        assert self._problems(path) == [], (
+            'Проверьте индекс для фильтра по году и категории'
+        )
+
+    def test_reviews_and_comments_use_index(self, title, make_reviews):
+        from reviews.models import Comment
+
+        review = make_reviews(title, 3)[0]
+        Comment.objects.create(review=review, author=review.author, text='Ответ')
+        reviews = f'/api/v1/titles/{title.id}/reviews/'
+        for path in (reviews, reviews + '?cursor=',
+                     f'{reviews}{review.id}/comments/'):
+            assert self._problems(path) == [], (
+                f'Проверьте индекс для сортировки {path}'
+            )
+
+    def test_catalog_lists_use_index(self, category, genres):
+        for path in ('/api/v1/categories/', '/api/v1/genres/'):
+            assert self._problems(path) == []
+
+    def test_command(self, title, make_reviews):
+        from reviews.models import Comment
+
+        review = make_reviews(title, 1)[0]
+        Comment.objects.create(review=review, author=review.author, text='Ответ')
+        out = StringIO()
+        call_command('explain_queries', '-v', '2', stdout=out)
+        output = out.getvalue()
+        for name in ('titles-year-category', 'titles-genre', 'reviews-list',
+                     'comments-list-cursor'):
+            assert f'{name}: /api/v1/' in output
+        assert 'title_category_year_idx' in output
+        assert 'Запросов: ' in output
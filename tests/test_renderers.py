@@ -0,0 +1,135 @@
+import datetime
+import decimal
+import json
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+
+import pytest
+from rest_framework.test import APIClient
+
+SAMPLES = [
+    None,
+    [],
+    {'results': [], 'next': None, 'count': 0},
+    OrderedDict([('id', 1), ('name', 'Побег из Шоушенка'), ('rating', 7.33)]),
+    {'text': 'строка\u2028с\u2029разделителями', 'control': '\x00\x1f\t\n"\\/'},
+    {'emoji': '😀 ⸻ ', 'empty': '', 'flags': [True, False, None]},
+    {1: 'ключ-число', 'float': 0.1, 'zero': 0.0, 'big': 10 ** 20},
+    {
+        'date': datetime.date(2022, 5, 1),
+        'datetime': datetime.datetime(2022, 5, 1, 12, 30, 15, 123456),
+        'utc': datetime.datetime(2022, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        'moscow': datetime.datetime(
+            2022, 5, 1, 12, 30, 15, 500,
+            tzinfo=datetime.timezone(datetime.timedelta(hours=3)),
+        ),
+        'time': datetime.time(12, 30, 15, 123456),
+        'decimal': decimal.Decimal('7.50'),
+        'uuid': uuid.UUID(int=1),
+        'tuple': (1, 2),
+    },
+]
+
+
+class TestJSONRenderer:
+
+    @pytest.mark.parametrize('data', SAMPLES)
+    @pytest.mark.parametrize('media_type', [None, 'application/json', 'application/json; indent=4'])
+    def test_output_matches_drf(self, data, media_type):
+        from api.renderers import JSONRenderer
+        from rest_framework import renderers
+
+        expected = renderers.JSONRenderer().render(data, media_type, {})
+        assert JSONRenderer().render(data, media_type, {}) == expected, (
+            'Проверьте, что JSONRenderer выдаёт те же байты, что JSONRenderer DRF'
+        )
+
+    def test_unencodable_string_fails_like_drf(self):
+        from api.renderers import JSONRenderer
+
+        with pytest.raises(UnicodeEncodeError):
+            JSONRenderer().render({'surrogate': '\ud800'})
+
+    def test_uses_orjson(self, monkeypatch):
+        from api import renderers
+
+        if renderers.orjson is None:
+            pytest.skip('orjson не установлен')
+        calls = []
+        monkeypatch.setattr(renderers.orjson, 'dumps', lambda *args, **kwargs: calls.append(1) or b'{}')
+        renderers.JSONRenderer().render({'a': 1})
+        assert calls, 'Проверьте, что при установленном orjson JSON кодирует orjson'
+
+
+class TestJSONParser:
+
+    @pytest.mark.parametrize('body', [
+        b'{"name": "\\u041f\\u043e\\u0431\\u0435\\u0433", "year": 1994}',
+        '{"text": "Отличный фильм", "score": 10}'.encode(),
+        b'[1, 2.5, 1e400, 18446744073709551616, null, true]',
+        b'"\\ud800"',
+    ])
+    def test_result_matches_drf(self, body):
+        from api.parsers import JSONParser
+        from rest_framework import parsers
+
+        expected = parsers.JSONParser().parse(BytesIO(body))
+        assert JSONParser().parse(BytesIO(body)) == expected
+
+    @pytest.mark.parametrize('body', [b'{"score": NaN}', b'{"score": ', b'\xff'])
+    def test_errors_match_drf(self, body):
+        from api.parsers import JSONParser
+        from rest_framework import parsers
+        from rest_framework.exceptions import ParseError
+
+        with pytest.raises(ParseError) as expected:
+            parsers.JSONParser().parse(BytesIO(body))
+        with pytest.raises(ParseError) as error:
+            JSONParser().parse(BytesIO(body))
+        assert str(error.value) == str(expected.value)
+
+
+@pytest.mark.django_db
+class TestNegotiation:
+
+    def test_titles_json_matches_drf(self, title, make_titles):
+        from rest_framework import renderers
+
+        make_titles(3)
+        response = APIClient().get('/api/v1/titles/')
+        assert response['Content-Type'] == 'application/json'
+        assert response.content == renderers.JSONRenderer().render(response.data), (
+            'Проверьте, что ответ JSON совпадает с выводом JSONRenderer DRF'
+        )
+
+    def test_msgpack_response(self, title):
+        msgpack = pytest.importorskip('msgpack')
+
+        as_json = APIClient().get('/api/v1/titles/').json()
+        response = APIClient().get(
+            '/api/v1/titles/', HTTP_ACCEPT='application/msgpack'
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/msgpack'
+        assert msgpack.unpackb(response.content, raw=False) == as_json, (
+            'Проверьте, что MessagePack содержит те же данные, что JSON'
+        )
+        cached = APIClient().get('/api/v1/titles/', HTTP_ACCEPT='application/msgpack')
+        assert cached['X-Cache'] == 'HIT' and cached.content == response.content
+
+    def test_msgpack_request(self, user_client, title):
+        msgpack = pytest.importorskip('msgpack')
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(
+            url, msgpack.packb({'text': 'Отзыв', 'score': 9}),
+            content_type='application/msgpack',
+        )
+        assert response.status_code == 201, response.content
+        assert json.loads(response.content)['score'] == 9
+
+        response = user_client.post(
+            url, b'\xc1', content_type='application/msgpack'
+        )
+        assert response.status_code == 400
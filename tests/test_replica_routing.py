@@ -0,0 +1,116 @@
+import pytest
+from rest_framework.test import APIClient
+
+DATABASES = ['default', 'replica']
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = {'ALIASES': ['replica'], 'STICKY_SECONDS': 60}
+
+
+def _age_versions(*resources):
+    """Ресурсы давно не менялись: чтения не прижаты к основной базе."""
+    from api.cache import MODIFIED_KEY, get_cache
+
+    get_cache().set_many(
+        {MODIFIED_KEY.format(resource): 1 for resource in resources},
+        timeout=None,
+    )
+
+
+def _mirror_title(title):
+    """Копия произведения на реплике без отзывов."""
+    from reviews.models import Category, Title
+
+    category = Category.objects.using('replica').create(
+        name=title.category.name, slug=title.category.slug
+    )
+    Title.objects.using('replica').create(
+        pk=title.pk, name=title.name, year=title.year, category=category
+    )
+
+
+@pytest.mark.django_db(databases=DATABASES)
+class TestReplicaRouting:
+
+    def test_safe_requests_read_from_replica(self, title, replica):
+        _age_versions('titles')
+
+        response = APIClient().get('/api/v1/titles/')
+
+        assert response.status_code == 200
+        assert response.json()['count'] == 0, (
+            'Проверьте, что безопасные запросы читают с реплики'
+        )
+
+    def test_recently_changed_resource_reads_primary(self, title, replica):
+        response = APIClient().get('/api/v1/titles/')
+
+        assert response.json()['count'] == 1, (
+            'Проверьте, что ресурс, изменённый недавно, читается из основной базы'
+        )
+
+    def test_writer_reads_own_writes(self, user_client, admin_client, title, replica):
+        _mirror_title(title)
+        _age_versions('titles', f'reviews:{title.id}', 'users')
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+
+        response = user_client.get(url)
+        assert response.json()['count'] == 1, (
+            'Проверьте, что после записи пользователь читает из основной базы'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response.json()['count'] == 0, (
+            'Проверьте, что остальные пользователи продолжают читать с реплики'
+        )
+
+    def test_writes_go_to_primary(self, title, replica):
+        from api.replicas import ReplicaRouter, set_replica_reads
+        from reviews.models import Title
+
+        _mirror_title(title)
+        set_replica_reads(True)
+        try:
+            copy = Title.objects.get(pk=title.pk)
+            assert copy._state.db == 'replica'
+            assert ReplicaRouter().db_for_write(Title, instance=copy) == 'default'
+        finally:
+            set_replica_reads(False)
+        assert Title.objects.get(pk=title.pk)._state.db == 'default'
+
+    def test_without_replicas_reads_primary(self, title):
+        _age_versions('titles')
+
+        response = APIClient().get('/api/v1/titles/')
+
+        assert response.json()['count'] == 1
+
+
+class TestReplicaConfiguration:
+
+    def test_replicas_require_shared_cache(self, replica, settings, tmp_path):
+        from api.replicas import check_configuration
+        from django.core.exceptions import ImproperlyConfigured
+
+        with pytest.raises(ImproperlyConfigured):
+            check_configuration()
+
+        settings.CACHES = {
+            **settings.CACHES,
+            'shared': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(tmp_path),
+            },
+        }
+        settings.CATALOG_CACHE_ALIAS = 'shared'
+        check_configuration()
+
+    def test_locmem_without_replicas(self):
+        from api.replicas import check_configuration
+
+        check_configuration()
@@ -0,0 +1,202 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    from api.throttling import TokenBucketThrottle
+
+    def set_rates(**rates):
+        monkeypatch.setattr(
+            TokenBucketThrottle, 'THROTTLE_RATES',
+            {**TokenBucketThrottle.THROTTLE_RATES, **rates},
+        )
+    return set_rates
+
+
+class TestGCRA:
+
+    def test_burst_then_steady_rate(self):
+        from api.throttling import gcra
+
+        tat, now, interval, period = None, 0, 1000, 3000
+        waits = []
+        for _ in range(4):
+            tat, wait = gcra(tat, now, interval, period)
+            waits.append(wait)
+        assert waits == [0, 0, 0, 1000], (
+            'Проверьте, что ведро пропускает всплеск до N запросов'
+        )
+        now += 1000
+        tat, wait = gcra(tat, now, interval, period)
+        assert wait == 0, 'Проверьте, что ведро пополняется раз в period / N'
+        assert gcra(tat, now, interval, period)[1] == 1000
+
+    def test_redis_backend_uses_single_eval(self):
+        from api.throttling import GCRA_SCRIPT, take
+
+        calls = []
+
+        class Client:
+            def eval(self, *args):
+                calls.append(args)
+                return 1500
+
+        class Cache:
+            client = type('DefaultClient', (), {
+                'get_client': lambda self, write: Client(),
+            })()
+
+            def make_key(self, key):
+                return f':1:{key}'
+
+            def get(self, key):
+                raise AssertionError('Redis не читается отдельным запросом')
+
+        assert take(Cache(), 'throttle_reviews_1', 1000, 3000) == 1500
+        assert len(calls) == 1, (
+            'Проверьте, что проверка в Redis - один EVAL'
+        )
+        assert calls[0][:3] == (GCRA_SCRIPT, 1, ':1:throttle_reviews_1')
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+
+    def test_username_is_limited_across_addresses(self, user, rates):
+        rates(auth_username='2/min')
+        data = {'username': user.username.upper(), 'confirmation_code': 'wrong'}
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = APIClient().post(
+                '/api/v1/auth/token/', data, REMOTE_ADDR=address
+            )
+            assert response.status_code != 429
+
+        response = APIClient().post(
+            '/api/v1/auth/token/', data, REMOTE_ADDR='10.0.0.3'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что попытки получить токен ограничены по имени'
+        )
+        assert 0 < int(response['Retry-After']) <= 30
+
+        response = APIClient().post(
+            '/api/v1/auth/token/',
+            {'username': 'other', 'confirmation_code': 'wrong'},
+            REMOTE_ADDR='10.0.0.3',
+        )
+        assert response.status_code != 429
+
+    def test_address_is_limited_across_usernames(self, rates):
+        rates(auth_ip='2/min')
+        client = APIClient()
+        for number in range(2):
+            response = client.post('/api/v1/auth/signup/', {
+                'username': f'newbie{number}',
+                'email': f'newbie{number}@yamdb.fake',
+            })
+            assert response.status_code == 200
+
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'newbie2', 'email': 'newbie2@yamdb.fake',
+        })
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация ограничена по адресу клиента'
+        )
+        assert 'Retry-After' in response
+
+
+    def test_spoofed_forwarded_for_keeps_bucket(self, rates):
+        rates(auth_ip='2/min')
+        statuses = []
+        for number in range(3):
+            # nginx дописывает адрес клиента последним, подмена - до него.
+            response = APIClient().post(
+                '/api/v1/auth/signup/',
+                {'username': f'newbie{number}',
+                 'email': f'newbie{number}@yamdb.fake'},
+                REMOTE_ADDR='172.18.0.5',
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{number}, 203.0.113.7',
+            )
+            statuses.append(response.status_code)
+        assert statuses == [200, 200, 429], (
+            'Проверьте, что подмена X-Forwarded-For не сбрасывает ведро'
+        )
+        response = APIClient().post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie9', 'email': 'newbie9@yamdb.fake'},
+            REMOTE_ADDR='172.18.0.5',
+            HTTP_X_FORWARDED_FOR='203.0.113.8',
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что у каждого клиента за прокси своё ведро'
+        )
+
+
+class TestThrottleConfiguration:
+
+    def test_shared_cache_by_default(self):
+        from api.cache import is_shared
+        from django.conf import settings
+        from django.core.cache import caches
+
+        assert is_shared(caches[settings.THROTTLE_CACHE_ALIAS]), (
+            'Проверьте, что вёдра по умолчанию общие для процессов'
+        )
+
+    def test_locmem_requires_debug(self, settings):
+        from api.throttling import check_configuration
+        from django.core.exceptions import ImproperlyConfigured
+
+        settings.CACHES = {
+            **settings.CACHES,
+            'throttle': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+        }
+        settings.DEBUG = False
+        with pytest.raises(ImproperlyConfigured):
+            check_configuration()
+        settings.DEBUG = True
+        check_configuration()
+
+
+@pytest.mark.django_db
+class TestWriteThrottling:
+
+    def test_review_posts_are_limited_per_user(self, user_client, admin_client,
+                                               make_titles, rates):
+        rates(reviews='1/hour')
+        first, second = make_titles(2)
+        data = {'text': 'Отзыв', 'score': 7}
+
+        url = f'/api/v1/titles/{first.id}/reviews/'
+        assert user_client.post(url, data).status_code == 201
+        response = user_client.post(
+            f'/api/v1/titles/{second.id}/reviews/', data
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что отзывы пользователя ограничены throttle_scope'
+        )
+        assert int(response['Retry-After']) > 3500
+
+        assert user_client.get(url).status_code == 200, (
+            'Проверьте, что чтение не ограничивается'
+        )
+        assert admin_client.post(url, data).status_code == 201, (
+            'Проверьте, что ведро у каждого пользователя своё'
+        )
+
+    def test_comments_have_own_bucket(self, user_client, title, rates):
+        rates(reviews='1/hour', comments='2/hour')
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Отзыв', 'score': 7}
+        )
+        url = (
+            f'/api/v1/titles/{title.id}/reviews/{response.json()["id"]}/comments/'
+        )
+        statuses = [
+            user_client.post(url, {'text': 'Ответ'}).status_code
+            for _ in range(3)
+        ]
+        assert statuses == [201, 201, 429]
@@ -0,0 +1,28 @@
+import pytest
+from django.core.cache import cache
+
+from tests.fixtures.helpers import count_queries
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+
+    def test_titles_list_query_count_is_constant(self, client, make_titles):
+        make_titles(2)
+        small_page = count_queries(client, '/api/v1/titles/')
+        make_titles(20)
+        full_page = count_queries(client, '/api/v1/titles/')
+        assert small_page == full_page, (
+            'Проверьте, что число запросов к БД для `/api/v1/titles/` '
+            'не зависит от количества произведений на странице'
+        )
+        assert full_page <= 3, (
+            'Список произведений должен загружаться за COUNT, запрос '
+            'с категориями и один запрос жанров'
+        )
+
+    def test_title_detail_query_count(self, client, title, django_assert_num_queries):
+        cache.clear()
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert len(response.json()['genre']) == 2
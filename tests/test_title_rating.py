@@ -0,0 +1,57 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def _refresh(self, title):
+        title.refresh_from_db()
+        return title
+
+    def test_rating_follows_review_changes(self, title, user, another_user):
+        from reviews.models import Review
+
+        assert title.rating is None, 'Рейтинг произведения без рецензий должен быть null'
+
+        first = Review.objects.create(title=title, author=user, text='a', score=10)
+        Review.objects.create(title=title, author=another_user, text='b', score=5)
+        title = self._refresh(title)
+        assert (title.rating_sum, title.review_count) == (15, 2)
+        assert title.rating == 7.5
+
+        first.score = 1
+        first.save()
+        assert self._refresh(title).rating == 3
+
+        first.delete()
+        title = self._refresh(title)
+        assert (title.rating_sum, title.review_count) == (5, 1)
+
+    def test_cascade_delete_updates_rating(self, title, user, another_user):
+        from reviews.models import Review
+
+        Review.objects.create(title=title, author=user, text='a', score=4)
+        Review.objects.create(title=title, author=another_user, text='b', score=8)
+        user.delete()
+        title = self._refresh(title)
+        assert (title.rating_sum, title.review_count) == (8, 1), (
+            'Проверьте, что каскадное удаление рецензий учитывается в рейтинге'
+        )
+
+    def test_rebuild_ratings_command(self, title, user):
+        from reviews.models import Review, Title
+
+        Review.objects.create(title=title, author=user, text='a', score=6)
+        Title.objects.update(rating_sum=0, review_count=0)
+        call_command('rebuild_ratings')
+        title = self._refresh(title)
+        assert (title.rating_sum, title.review_count) == (6, 1)
+
+    def test_api_returns_stored_rating(self, client, title, user):
+        from reviews.models import Review
+
+        Review.objects.create(title=title, author=user, text='a', score=7)
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200
+        assert response.json()['rating'] == 7.0
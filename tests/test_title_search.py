@@ -0,0 +1,55 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitleSearch:
+
+    @pytest.fixture
+    def titles(self, category):
+        from reviews.models import Title
+
+        return {
+            'shawshank': Title.objects.create(
+                name='Побег из Шоушенка', year=1994, category=category,
+                description='Тюремная драма о надежде',
+            ),
+            'escape': Title.objects.create(
+                name='Великий побег', year=1963, category=category,
+                description='Военный фильм',
+            ),
+            'prison': Title.objects.create(
+                name='Зелёная миля', year=1999, category=category,
+                description='Драма о тюрьме и побеге',
+            ),
+        }
+
+    def _names(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()['results']]
+
+    def test_search_ranks_name_matches_first(self, client, titles):
+        names = self._names(client, 'побег')
+        assert set(names) == {'Побег из Шоушенка', 'Великий побег', 'Зелёная миля'}
+        assert names[-1] == 'Зелёная миля', (
+            'Совпадение в названии должно ранжироваться выше совпадения в описании'
+        )
+
+    def test_search_by_description_and_prefix(self, client, titles):
+        assert self._names(client, 'военн') == ['Великий побег']
+
+    def test_search_follows_updates(self, client, titles):
+        title = titles['escape']
+        title.name = 'Большой побег'
+        title.save()
+        assert 'Большой побег' in self._names(client, 'большой')
+        title.delete()
+        assert self._names(client, 'большой') == []
+
+    def test_search_ignores_syntax(self, client, titles):
+        assert self._names(client, '"*(') == []
+        assert self._names(client, 'миля"') == ['Зелёная миля']
+
+    def test_name_filter_still_works(self, client, titles):
+        response = client.get('/api/v1/titles/', {'name': 'Шоу'})
+        assert [item['name'] for item in response.json()['results']] == ['Побег из Шоушенка']
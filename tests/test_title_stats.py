@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def _stats(self, title):
+        from reviews.models import TitleScoreStats
+        return {
+            (row.month.strftime('%Y-%m'), row.score): row.count
+            for row in TitleScoreStats.objects.filter(title=title, count__gt=0)
+        }
+
+    def _review(self, title, author, score, month):
+        from reviews.models import Review
+        review = Review.objects.create(
+            title=title, author=author, text='Рецензия', score=score
+        )
+        pub_date = timezone.make_aware(datetime(2022, month, 15))
+        Review.objects.filter(pk=review.pk).update(pub_date=pub_date)
+        review.refresh_from_db()
+        return review
+
+    def test_stats_follow_review_changes(self, title, user, another_user):
+        from reviews.models import Review
+
+        first = Review.objects.create(
+            title=title, author=user, text='a', score=10
+        )
+        Review.objects.create(
+            title=title, author=another_user, text='b', score=10
+        )
+        month = timezone.localtime(first.pub_date).strftime('%Y-%m')
+        assert self._stats(title) == {(month, 10): 2}
+
+        first.score = 4
+        first.save()
+        assert self._stats(title) == {(month, 10): 1, (month, 4): 1}, (
+            'Проверьте, что изменение оценки переносит рецензию в статистике'
+        )
+        first.delete()
+        assert self._stats(title) == {(month, 10): 1}
+
+    def test_stats_endpoint(self, client, title, user, another_user, admin,
+                            django_assert_num_queries):
+        self._review(title, user, 9, month=5)
+        self._review(title, another_user, 6, month=5)
+        self._review(title, admin, 3, month=7)
+        call_command('rebuild_title_stats')
+
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/{title_id}/stats/` доступен всем'
+        )
+        data = response.json()
+        assert (data['review_count'], data['rating']) == (3, 6.0)
+        assert data['histogram'] == {
+            str(score): int(score in (3, 6, 9)) for score in range(1, 11)
+        }
+        assert data['monthly'] == [
+            {'month': '2022-05', 'count': 2, 'rating': 7.5},
+            {'month': '2022-07', 'count': 1, 'rating': 3.0},
+        ]
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    def test_rebuild_title_stats_command(self, title, user, another_user):
+        from reviews.models import TitleScoreStats
+
+        self._review(title, user, 9, month=5)
+        self._review(title, another_user, 9, month=5)
+        TitleScoreStats.objects.all().delete()
+        call_command('rebuild_title_stats', chunk_size=1)
+        assert self._stats(title) == {('2022-05', 9): 2}
+
+    def test_batch_updates_stats(self, admin_client, title, user,
+                                 another_user):
+        data = [
+            {'author': user.username, 'text': 'a', 'score': 9},
+            {'author': another_user.username, 'text': 'b', 'score': 9},
+        ]
+        response = admin_client.post(
+            f'/api/v1/titles/{title.id}/reviews/batch/',
+            data=data, format='json',
+        )
+        assert response.status_code == 201
+        month = timezone.localtime().strftime('%Y-%m')
+        assert self._stats(title) == {(month, 9): 2}, (
+            'Проверьте, что пачка рецензий учитывается в статистике оценок'
+        )
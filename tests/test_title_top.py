@@ -0,0 +1,94 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleOrderingAndTop:
+
+    @pytest.fixture
+    def rated_titles(self, make_titles, make_reviews, genres):
+        from reviews.models import Title
+        popular, niche, unrated = make_titles(3)
+        make_reviews(popular, 20, score=8)
+        make_reviews(niche, 1, score=10)
+        popular.genre.set(genres[:1])
+        Title.objects.rebuild_rating()
+        return [Title.objects.get(pk=title.pk)
+                for title in (popular, niche, unrated)]
+
+    def _ids(self, response):
+        assert response.status_code == 200
+        return [title['id'] for title in response.json()['results']]
+
+    def test_rating_fields_follow_reviews(self, title, user, settings):
+        from reviews.models import Review
+        settings.TITLE_RATING = {
+            'PRIOR_MEAN': 6.0, 'PRIOR_WEIGHT': 2, 'TOP_MIN_REVIEWS': 1
+        }
+        review = Review.objects.create(
+            title=title, author=user, text='a', score=9
+        )
+        title.refresh_from_db()
+        assert (title.rating_avg, title.rating_weighted) == (9.0, 7.0), (
+            'Проверьте, что средняя и байесовская оценки обновляются '
+            'вместе с рецензиями'
+        )
+        review.delete()
+        title.refresh_from_db()
+        assert (title.rating_avg, title.rating_weighted) == (0.0, 6.0)
+
+    def test_titles_ordering(self, client, rated_titles):
+        popular, niche, unrated = rated_titles
+        assert self._ids(client.get('/api/v1/titles/?ordering=-rating')) == [
+            niche.id, popular.id, unrated.id
+        ]
+        assert self._ids(client.get('/api/v1/titles/?ordering=rating')) == [
+            popular.id, niche.id, unrated.id
+        ], 'Проверьте, что произведения без оценок идут после оценённых'
+        assert self._ids(
+            client.get('/api/v1/titles/?ordering=-review_count')
+        ) == [popular.id, niche.id, unrated.id]
+        response = client.get('/api/v1/titles/?ordering=name')
+        assert response.status_code == 400, (
+            'Проверьте, что сортировка возможна только по rating, year '
+            'и review_count'
+        )
+
+    def test_top_ranks_bayesian_by_default(self, client, rated_titles,
+                                           django_assert_num_queries):
+        popular, niche, unrated = rated_titles
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/titles/top/')
+        assert self._ids(response) == [popular.id, niche.id], (
+            'Байесовский рейтинг должен ставить произведение с одной '
+            'оценкой ниже произведения с множеством высоких оценок'
+        )
+        assert response.json()['results'][0]['category']['slug'] == 'movie'
+        assert self._ids(client.get('/api/v1/titles/top/?rank=average')) == [
+            niche.id, popular.id
+        ]
+        assert self._ids(
+            client.get('/api/v1/titles/top/?rank=average&min_reviews=5')
+        ) == [popular.id]
+
+    def test_top_filters(self, client, rated_titles):
+        popular, niche, unrated = rated_titles
+        assert self._ids(client.get('/api/v1/titles/top/?genre=comedy')) == [
+            niche.id
+        ]
+        assert self._ids(client.get('/api/v1/titles/top/?category=movie')) == [
+            popular.id, niche.id
+        ]
+        assert client.get('/api/v1/titles/top/?rank=best').status_code == 400
+
+    def test_top_pagination(self, client, make_titles, make_reviews):
+        from reviews.models import Title
+        for i, title in enumerate(make_titles(12)):
+            make_reviews(title, 1, score=1 + i % 10)
+        Title.objects.rebuild_rating()
+        response = client.get('/api/v1/titles/top/')
+        data = response.json()
+        assert len(data['results']) == 10 and data['previous'] is None
+        response = client.get(data['next'])
+        data = response.json()
+        assert len(data['results']) == 2 and data['next'] is None
+        assert client.get('/api/v1/titles/top/?page=3').status_code == 404